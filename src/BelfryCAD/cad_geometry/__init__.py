@@ -7,6 +7,7 @@ This package contains all the geometric primitives and operations for BelfryCAD.
 from .transform import Transform2D
 from .shapes import ShapeType, Shape2D
 from .point import Point2D
+from .point_array import PointArray
 from .line import Line2D
 from .polyline import PolyLine2D
 from .polygon import Polygon
@@ -24,6 +25,7 @@ __all__ = [
     'ShapeType',
     'Shape2D', 
     'Point2D',
+    'PointArray',
     'Line2D',
     'PolyLine2D',
     'Polygon',
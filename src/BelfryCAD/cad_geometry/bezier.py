@@ -10,6 +10,7 @@ import numpy as np
 import math
 from .shapes import Shape2D, ShapeType
 from .point import Point2D
+from .point_array import PointArray
 from .line import Line2D
 from .transform import Transform2D
 
@@ -27,7 +28,7 @@ class BezierPath(Shape2D):
     copies of the last point to form complete segments.
     """
     
-    def __init__(self, points: Optional[List[Point2D]] = None):
+    def __init__(self, points: Optional[Union[List[Point2D], PointArray]] = None):
         """
         Initialize a Bezier path with control points.
         
@@ -36,7 +37,7 @@ class BezierPath(Shape2D):
                    start, control1, control2, end. If len(points)%3!=1, the path
                    is padded with copies of the last point.
         """
-        self._points = points or []
+        self._points = PointArray(points)
     
     def __repr__(self) -> str:
         return f"BezierPath({len(self._points)} points, {len(self._get_segments_from_points())} segments)"
@@ -82,13 +83,12 @@ class BezierPath(Shape2D):
         segments = []
         # Each segment needs 4 points: start, control1, control2, end
         # We need len(points) % 3 == 1 for complete segments
-        required_points = len(self._points)
+        padded_points = self._points.to_list()
+        required_points = len(padded_points)
         if required_points % 3 != 1:
             # Pad with copies of the last point
             padding_needed = 3 - (required_points % 3)
-            padded_points = self._points + [self._points[-1]] * padding_needed
-        else:
-            padded_points = self._points
+            padded_points += [padded_points[-1]] * padding_needed
         
         # Create segments from groups of 4 points
         for i in range(0, len(padded_points) - 3, 3):
@@ -126,22 +126,32 @@ class BezierPath(Shape2D):
         return start_pt.distance_to(end_pt) < 1e-6
     
     @property
-    def points(self) -> List[Point2D]:
-        """Get all control points as a list."""
+    def points(self) -> PointArray:
+        """Get a copy of all control points."""
         return self._points.copy()
     
     @points.setter
-    def points(self, value: List[Point2D]):
+    def points(self, value: Union[List[Point2D], PointArray]):
         """Set all control points from a list."""
-        self._points = [Point2D(p) for p in value]
+        self._points = PointArray(value)
+
+    @classmethod
+    def _from_point_array(cls, points: PointArray) -> 'BezierPath':
+        """
+        Make a Bezier path that takes over a PointArray no one else holds,
+        such as one a transform just made, without copying it.
+        """
+        path = cls.__new__(cls)
+        path._points = points
+        return path
     
     def add_point(self, point: Point2D):
         """Add a new control point to the end of the list."""
-        self._points.append(Point2D(point))
+        self._points.append(point)
     
     def insert_point(self, index: int, point: Point2D):
         """Insert a control point at the specified index."""
-        self._points.insert(index, Point2D(point))
+        self._points.insert(index, point)
     
     def remove_point(self, index: int):
         """Remove a control point at the specified index."""
@@ -157,7 +167,7 @@ class BezierPath(Shape2D):
     def set_point(self, index: int, point: Point2D):
         """Set a specific control point by index."""
         if 0 <= index < len(self._points):
-            self._points[index] = Point2D(point)
+            self._points[index] = point
         else:
             raise IndexError(f"Point index {index} out of range")
     
@@ -189,7 +199,7 @@ class BezierPath(Shape2D):
             # Insert at the end
             all_points.extend([Point2D(start), Point2D(control1), Point2D(control2), Point2D(end)])
         
-        self._points = all_points
+        self._points = PointArray(all_points)
     
     def remove_segment(self, index: int):
         """Remove a segment at the specified index."""
@@ -200,7 +210,7 @@ class BezierPath(Shape2D):
             for i, (start, control1, control2, end) in enumerate(segments):
                 if i != index:
                     all_points.extend([start, control1, control2, end])
-            self._points = all_points
+            self._points = PointArray(all_points)
     
     def point_at_parameter(self, t: float) -> Optional[Point2D]:
         """
@@ -429,36 +439,28 @@ class BezierPath(Shape2D):
     @property
     def bounds(self) -> Tuple[Point2D, Point2D]:
         """Get bounding box of the Bezier path."""
-        if not self._points:
-            return Point2D(0, 0), Point2D(0, 0)
-        
-        # Find min and max coordinates of all points
-        min_x = min(pt.x for pt in self._points)
-        max_x = max(pt.x for pt in self._points)
-        min_y = min(pt.y for pt in self._points)
-        max_y = max(pt.y for pt in self._points)
-        
+        min_x, min_y, max_x, max_y = self._points.get_bounds()
         return Point2D(min_x, min_y), Point2D(max_x, max_y)
     
     def translate(self, vector) -> 'BezierPath':
         """Make a new Bezier path, translated by the given vector."""
-        return BezierPath([point.translate(vector) for point in self._points])
+        return BezierPath._from_point_array(self._points.translate(vector))
         
     def rotate(self, angle: float, center = None) -> 'BezierPath':
         """Make a new Bezier path, rotated around the given center."""
-        return BezierPath([point.rotate(angle, center) for point in self._points])
+        return BezierPath._from_point_array(self._points.rotate(angle, center))
         
     def scale(self, scale, center = None) -> 'BezierPath':
         """Make a new Bezier path, scaled around the given center."""
-        return BezierPath([point.scale(scale, center) for point in self._points])
+        return BezierPath._from_point_array(self._points.scale(scale, center))
         
     def transform(self, transform: Transform2D) -> 'BezierPath':
         """Make a new Bezier path, transformed using a transformation matrix."""
-        return BezierPath([point.transform(transform) for point in self._points])
+        return BezierPath._from_point_array(self._points.transform(transform))
         
     def reverse(self) -> 'BezierPath':
         """Make a new Bezier path, reversed."""
-        return BezierPath(list(reversed(self._points)))
+        return BezierPath(self._points.coords[::-1])
     
     def close(self):
         """Close the path by connecting the last point to the first point."""
@@ -499,7 +501,7 @@ class BezierPath(Shape2D):
             return cls([])
         
         points = []
-        polyline_points = polyline.points
+        polyline_points = polyline.points.to_list()
         
         for i in range(len(polyline_points) - 1):
             start = polyline_points[i]
@@ -0,0 +1,279 @@
+"""
+PointArray Class for CAD Geometry
+
+This module provides the PointArray class, a sequence of 2D points stored
+in one contiguous (N, 2) float64 array, for shapes with many vertices.
+"""
+
+import math
+import numbers
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Tuple, Union, TYPE_CHECKING
+
+import numpy as np
+
+from .point import Point2D, EPSILON
+
+if TYPE_CHECKING:
+    from .transform import Transform2D
+
+
+class PointArray:
+    """
+    A mutable sequence of 2D points, stored in one contiguous (N, 2)
+    float64 array instead of a list of Point2D objects.
+
+    It acts like a list of Point2D: indexing and iterating make Point2D
+    objects on demand, and slicing, concatenation, insert, append and del
+    all work.  Since the points are made on demand, changing a point got
+    by indexing doesn't change the array; assign it back instead.
+
+    The coords property is a zero-copy view of the coordinates, for
+    NumPy code, and translate, rotate, scale and transform work on all
+    the points at once.
+    """
+
+    __slots__ = ('_data', '_size')
+
+    def __init__(self, points: Optional[Iterable] = None):
+        """
+        Initialize from Point2D objects, point-like objects, another
+        PointArray or an (N, 2) array.  The coordinates are always copied.
+        """
+        if points is None:
+            data = np.empty((0, 2), dtype=np.float64)
+        elif isinstance(points, PointArray):
+            data = points.coords.copy()
+        elif isinstance(points, np.ndarray):
+            data = np.array(points, dtype=np.float64).reshape(-1, 2)
+        else:
+            points = [p if isinstance(p, Point2D) else Point2D(p) for p in points]
+            data = np.fromiter(
+                chain.from_iterable((p._x, p._y) for p in points),
+                dtype=np.float64, count=2 * len(points),
+            ).reshape(-1, 2)
+        self._data = data
+        self._size = len(data)
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> 'PointArray':
+        """
+        Wrap an (N, 2) array without copying it, if it is already
+        contiguous float64.  Otherwise it is converted.
+        """
+        result = cls.__new__(cls)
+        result._data = np.ascontiguousarray(array, dtype=np.float64).reshape(-1, 2)
+        result._size = len(result._data)
+        return result
+
+    @property
+    def coords(self) -> np.ndarray:
+        """
+        The (N, 2) coordinates, as a view, so writing to it changes the
+        points.  The view stays valid until points are added or removed.
+        """
+        return self._data[:self._size]
+
+    @property
+    def xs(self) -> np.ndarray:
+        """The X coordinates, as a view."""
+        return self._data[:self._size, 0]
+
+    @property
+    def ys(self) -> np.ndarray:
+        """The Y coordinates, as a view."""
+        return self._data[:self._size, 1]
+
+    def __repr__(self) -> str:
+        return f"PointArray({self._size} points)"
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Point2D]:
+        for x, y in self.coords.tolist():
+            yield Point2D(x, y)
+
+    def __reversed__(self) -> Iterator[Point2D]:
+        for x, y in self.coords[::-1].tolist():
+            yield Point2D(x, y)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Point2D, 'PointArray']:
+        """Get a point, or a copy of a slice of the points."""
+        if isinstance(index, slice):
+            return PointArray.from_array(self.coords[index].copy())
+        x, y = self.coords[self._check_index(index)]
+        return Point2D(float(x), float(y))
+
+    def __setitem__(self, index: Union[int, slice], value):
+        if isinstance(index, slice):
+            values = PointArray(value).coords
+            indices = range(*index.indices(self._size))
+            if index.step not in (None, 1) or len(values) == len(indices):
+                self.coords[index] = values
+                return
+            # Slice assignment that resizes, as lists allow.
+            start, stop = indices.start, max(indices.start, indices.stop)
+            self._set_data(np.concatenate(
+                [self.coords[:start], values, self.coords[stop:]]))
+            return
+        self.coords[self._check_index(index)] = _coordinates(value)
+
+    def __delitem__(self, index: Union[int, slice]):
+        if not isinstance(index, slice):
+            index = self._check_index(index)
+        self._set_data(np.delete(self.coords, index, axis=0))
+
+    def __contains__(self, point) -> bool:
+        if not isinstance(point, Point2D):
+            return False
+        diffs = np.abs(self.coords - (point._x, point._y))
+        return bool(np.any((diffs[:, 0] < EPSILON) & (diffs[:, 1] < EPSILON)))
+
+    def __eq__(self, other) -> bool:
+        """Equal to another PointArray, or a list of equal Point2Ds."""
+        if isinstance(other, PointArray):
+            other_coords = other.coords
+        elif isinstance(other, (list, tuple)):
+            if not all(isinstance(p, Point2D) for p in other):
+                return False
+            other_coords = PointArray(other).coords
+        else:
+            return NotImplemented
+        if len(other_coords) != self._size:
+            return False
+        return bool(np.all(np.abs(self.coords - other_coords) < EPSILON))
+
+    __hash__ = None
+
+    def __add__(self, other) -> 'PointArray':
+        if not isinstance(other, (PointArray, list, tuple, np.ndarray)):
+            return NotImplemented
+        return PointArray.from_array(
+            np.concatenate([self.coords, _as_coords(other)]))
+
+    def __radd__(self, other) -> 'PointArray':
+        if not isinstance(other, (list, tuple)):
+            return NotImplemented
+        return PointArray.from_array(
+            np.concatenate([_as_coords(other), self.coords]))
+
+    def __iadd__(self, other) -> 'PointArray':
+        self.extend(other)
+        return self
+
+    def __reduce__(self):
+        return (PointArray.from_array, (self.coords.copy(),))
+
+    def append(self, point):
+        """Add a point to the end, growing the storage geometrically."""
+        if self._size == len(self._data):
+            self._reserve(max(4, 2 * self._size))
+        self._data[self._size] = _coordinates(point)
+        self._size += 1
+
+    def extend(self, points: Iterable):
+        """Add points to the end."""
+        values = _as_coords(points)
+        if self._size + len(values) > len(self._data):
+            self._reserve(max(2 * self._size, self._size + len(values)))
+        self._data[self._size:self._size + len(values)] = values
+        self._size += len(values)
+
+    def insert(self, index: int, point):
+        """Insert a point before index, clamped like list.insert()."""
+        index = min(max(index + self._size if index < 0 else index, 0), self._size)
+        self._set_data(np.insert(self.coords, index, _coordinates(point), axis=0))
+
+    def pop(self, index: int = -1) -> Point2D:
+        """Remove and return a point, the last by default."""
+        point = self[index]
+        del self[index]
+        return point
+
+    def clear(self):
+        self._set_data(np.empty((0, 2), dtype=np.float64))
+
+    def reverse(self):
+        """Reverse the points in place."""
+        self.coords[:] = self.coords[::-1].copy()
+
+    def copy(self) -> 'PointArray':
+        return PointArray(self)
+
+    def index(self, point) -> int:
+        """Get the index of the first point equal to point."""
+        if isinstance(point, Point2D):
+            diffs = np.abs(self.coords - (point._x, point._y))
+            matches = np.flatnonzero((diffs[:, 0] < EPSILON) & (diffs[:, 1] < EPSILON))
+            if len(matches):
+                return int(matches[0])
+        raise ValueError(f"{point} is not in PointArray")
+
+    def to_list(self) -> List[Point2D]:
+        """Materialize all the points as a list of Point2D."""
+        return list(self)
+
+    def get_bounds(self) -> Tuple[float, float, float, float]:
+        """Get the bounds of the points as (min_x, min_y, max_x, max_y)."""
+        if not self._size:
+            return (0.0, 0.0, 0.0, 0.0)
+        min_x, min_y = self.coords.min(axis=0).tolist()
+        max_x, max_y = self.coords.max(axis=0).tolist()
+        return (min_x, min_y, max_x, max_y)
+
+    def translate(self, vector) -> 'PointArray':
+        """Make a new PointArray, translated by a vector."""
+        return PointArray.from_array(self.coords + _coordinates(vector))
+
+    def rotate(self, angle: float, center=None) -> 'PointArray':
+        """Make a new PointArray, rotated by angle radians around a center."""
+        center = np.zeros(2) if center is None else _coordinates(center)
+        cos_a, sin_a = math.cos(angle), math.sin(angle)
+        translated = self.coords - center
+        rotated = np.empty_like(translated)
+        rotated[:, 0] = translated[:, 0] * cos_a - translated[:, 1] * sin_a
+        rotated[:, 1] = translated[:, 0] * sin_a + translated[:, 1] * cos_a
+        return PointArray.from_array(rotated + center)
+
+    def scale(self, scale, center=None) -> 'PointArray':
+        """Make a new PointArray, scaled by a factor or vector around a center."""
+        center = np.zeros(2) if center is None else _coordinates(center)
+        if not isinstance(scale, numbers.Real):
+            scale = _coordinates(scale)
+        return PointArray.from_array((self.coords - center) * scale + center)
+
+    def transform(self, transform: 'Transform2D') -> 'PointArray':
+        """Make a new PointArray, transformed using a transformation matrix."""
+        matrix = transform.matrix
+        return PointArray.from_array(self.coords @ matrix[:2, :2].T + matrix[:2, 2])
+
+    def _check_index(self, index: int) -> int:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("PointArray index out of range")
+        return index
+
+    def _set_data(self, data: np.ndarray):
+        self._data = np.ascontiguousarray(data, dtype=np.float64)
+        self._size = len(self._data)
+
+    def _reserve(self, capacity: int):
+        data = np.empty((capacity, 2), dtype=np.float64)
+        data[:self._size] = self.coords
+        self._data = data
+
+
+def _coordinates(point) -> Tuple[float, float]:
+    """Get the (x, y) coordinates of a point-like object."""
+    if not isinstance(point, Point2D):
+        point = Point2D(point)
+    return (point._x, point._y)
+
+
+def _as_coords(points) -> np.ndarray:
+    """Get the (N, 2) coordinates of a PointArray, array or list of points."""
+    if isinstance(points, PointArray):
+        return points.coords
+    return PointArray(points).coords
@@ -10,6 +10,7 @@ import numpy as np
 import math
 from .shapes import Shape2D, ShapeType
 from .point import Point2D
+from .point_array import PointArray
 from .line import Line2D
 from .transform import Transform2D
 
@@ -22,11 +23,32 @@ EPSILON = 1e-10
 class Polygon(Shape2D):
     """Polygon with geometric operations - optimized with numpy."""
 
-    def __init__(self, points: List[Point2D]):
+    def __init__(self, points: Union[List[Point2D], PointArray]):
         """Initialize a polygon from points."""
         if len(points) < 3:
             raise ValueError("Polygon must have at least 3 points")
-        self.points = points[:]
+        self.points = points
+
+    @property
+    def points(self) -> PointArray:
+        """The vertices, stored in one (N, 2) array."""
+        return self._points
+
+    @points.setter
+    def points(self, points: Union[List[Point2D], PointArray]):
+        self._points = PointArray(points)
+
+    @classmethod
+    def _from_point_array(cls, points: PointArray) -> 'Polygon':
+        """
+        Make a polygon that takes over a PointArray no one else holds,
+        such as one a transform just made, without copying it.
+        """
+        if len(points) < 3:
+            raise ValueError("Polygon must have at least 3 points")
+        polygon = cls.__new__(cls)
+        polygon._points = points
+        return polygon
 
     def __repr__(self) -> str:
         return f"Polygon({len(self.points)} points)"
@@ -57,12 +79,8 @@ class Polygon(Shape2D):
     @property
     def edges(self) -> List[Line2D]:
         """Get polygon edges as line segments."""
-        edges = []
-        for i in range(len(self.points)):
-            start = self.points[i]
-            end = self.points[(i + 1) % len(self.points)]
-            edges.append(Line2D(start, end))
-        return edges
+        points = self.points.to_list()
+        return [Line2D(start, end) for start, end in zip(points, points[1:] + points[:1])]
 
     @property
     def area(self) -> float:
@@ -70,8 +88,7 @@ class Polygon(Shape2D):
         if len(self.points) < 3:
             return 0.0
 
-        # Convert to numpy arrays for faster computation
-        vertices_array = np.array([[v.x, v.y] for v in self.points])
+        vertices_array = self.points.coords
         
         # Use numpy for efficient area calculation
         x_coords = vertices_array[:, 0]
@@ -91,7 +108,7 @@ class Polygon(Shape2D):
             return 0.0
         
         # Use numpy for vectorized distance calculation
-        vertices_array = np.array([[v.x, v.y] for v in self.points])
+        vertices_array = self.points.coords
         # Create array of consecutive pairs
         pairs = np.column_stack([vertices_array, np.roll(vertices_array, -1, axis=0)])
         
@@ -109,12 +126,12 @@ class Polygon(Shape2D):
         area = self.area
         if area == 0:
             # Degenerate polygon, return average of points
-            vertices_array = np.array([[v.x, v.y] for v in self.points])
+            vertices_array = self.points.coords
             centroid_coords = np.mean(vertices_array, axis=0)
             return Point2D(centroid_coords[0], centroid_coords[1])
 
         # Use numpy for efficient centroid calculation
-        vertices_array = np.array([[v.x, v.y] for v in self.points])
+        vertices_array = self.points.coords
         
         # Calculate centroid using area-weighted method
         x_coords = vertices_array[:, 0]
@@ -136,15 +153,8 @@ class Polygon(Shape2D):
     @property
     def bounds(self) -> Tuple[Point2D, Point2D]:
         """Get bounding box as (min_point, max_point) - optimized with numpy."""
-        if not self.points:
-            return Point2D(0, 0), Point2D(0, 0)
-
-        # Use numpy for efficient min/max calculation
-        vertices_array = np.array([[v.x, v.y] for v in self.points])
-        min_coords = np.min(vertices_array, axis=0)
-        max_coords = np.max(vertices_array, axis=0)
-
-        return Point2D(min_coords[0], min_coords[1]), Point2D(max_coords[0], max_coords[1])
+        min_x, min_y, max_x, max_y = self.points.get_bounds()
+        return Point2D(min_x, min_y), Point2D(max_x, max_y)
 
     def is_clockwise(self) -> bool:
         """Check if polygon points are ordered clockwise - optimized."""
@@ -152,7 +162,7 @@ class Polygon(Shape2D):
             return False
 
         # Use numpy for efficient signed area calculation
-        vertices_array = np.array([[v.x, v.y] for v in self.points])
+        vertices_array = self.points.coords
         
         # Calculate signed area using shoelace formula
         x_coords = vertices_array[:, 0]
@@ -176,7 +186,7 @@ class Polygon(Shape2D):
             return True
 
         # Use numpy for efficient cross product calculation
-        points_array = np.array([[v.x, v.y] for v in self.points])
+        points_array = self.points.coords
         
         # Create vectors between consecutive points
         vectors = np.diff(points_array, axis=0)
@@ -202,7 +212,7 @@ class Polygon(Shape2D):
             return False
 
         # Use numpy for efficient ray casting
-        points_array = np.array([[v.x, v.y] for v in self.points])
+        points_array = self.points.coords
         px, py = point.x, point.y
         
         # Extract x and y coordinates
@@ -225,19 +235,19 @@ class Polygon(Shape2D):
 
     def translate(self, vector) -> 'Polygon':
         """Translate polygon by vector."""
-        return Polygon([point.translate(vector) for point in self.points])
+        return Polygon._from_point_array(self.points.translate(vector))
 
     def rotate(self, angle: float, center = None) -> 'Polygon':
         """Rotate polygon around a center point."""
-        return Polygon([point.rotate(angle, center) for point in self.points])
+        return Polygon._from_point_array(self.points.rotate(angle, center))
 
     def scale(self, scale, center = None) -> 'Polygon':
         """Scale polygon around a center point."""
-        return Polygon([point.scale(scale, center) for point in self.points])
+        return Polygon._from_point_array(self.points.scale(scale, center))
         
     def transform(self, transform: Transform2D) -> 'Polygon':
         """Transform polygon using a transformation matrix."""
-        return Polygon([point.transform(transform) for point in self.points])
+        return Polygon._from_point_array(self.points.transform(transform))
 
     @classmethod
     def rectangle(cls, center: Point2D, width: float, height: float) -> 'Polygon':
@@ -273,24 +283,15 @@ class Polygon(Shape2D):
         # Convert Point2D to integer coordinates (PyClipper uses integers)
         # Scale to preserve precision
         scale_factor = Region.clipper_scale_factor
-        path = []
-        for point in self.points:
-            x = int(point.x * scale_factor)
-            y = int(point.y * scale_factor)
-            path.append([x, y])
-        return path
+        return (self.points.coords * scale_factor).astype(np.int64).tolist()
 
     @classmethod
     def _from_clipper_path(cls, path: List[List[int]]) -> 'Polygon':
         """Convert PyClipper path format to Polygon."""
         # Convert back from integer coordinates
         scale_factor = Region.clipper_scale_factor
-        points = []
-        for point in path:
-            x = point[0] / scale_factor
-            y = point[1] / scale_factor
-            points.append(Point2D(x, y))
-        return cls(points)
+        return cls._from_point_array(
+            PointArray.from_array(np.array(path, dtype=np.float64) / scale_factor))
 
     def union(self, other: 'Polygon') -> List['Polygon']:
         """
@@ -563,11 +564,7 @@ class Polygon(Shape2D):
 
     def get_bounds(self) -> Tuple[float, float, float, float]:
         """Get the bounds of the polygon as (min_x, min_y, max_x, max_y)."""
-        if not self.points:
-            return (0.0, 0.0, 0.0, 0.0)
-        xs = [p.x for p in self.points]
-        ys = [p.y for p in self.points]
-        return (min(xs), min(ys), max(xs), max(ys))
+        return self.points.get_bounds()
 
     def minkowski_sum(self, other: 'Polygon') -> List['Polygon']:
         """
@@ -580,16 +577,16 @@ class Polygon(Shape2D):
         except ImportError:
             raise ImportError("pyclipper is required for Minkowski operations")
         # Convert polygons to pyclipper format
-        subj = [[int(p.x * 1e6), int(p.y * 1e6)] for p in self.points]
-        clip = [[int(p.x * 1e6), int(p.y * 1e6)] for p in other.points]
+        subj = (self.points.coords * 1e6).astype(np.int64).tolist()
+        clip = (other.points.coords * 1e6).astype(np.int64).tolist()
         # pyclipper expects lists of polygons
         result_paths = pyclipper.MinkowskiSum2(subj, clip, True)  # type: ignore
         # Convert back to Polygon objects
         result = []
         for path in result_paths:
-            pts = [Point2D(x / 1e6, y / 1e6) for x, y in path]
-            if len(pts) >= 3:
-                result.append(Polygon(pts))
+            if len(path) >= 3:
+                result.append(Polygon._from_point_array(
+                    PointArray.from_array(np.array(path, dtype=np.float64) / 1e6)))
         return result
 
     def minkowski_diff(self, other: 'Polygon') -> List['Polygon']:
@@ -602,12 +599,12 @@ class Polygon(Shape2D):
             import pyclipper
         except ImportError:
             raise ImportError("pyclipper is required for Minkowski operations")
-        subj = [[int(p.x * 1e6), int(p.y * 1e6)] for p in self.points]
-        clip = [[int(p.x * 1e6), int(p.y * 1e6)] for p in other.points]
+        subj = (self.points.coords * 1e6).astype(np.int64).tolist()
+        clip = (other.points.coords * 1e6).astype(np.int64).tolist()
         result_paths = pyclipper.MinkowskiDiff(subj, clip, True)  # type: ignore
         result = []
         for path in result_paths:
-            pts = [Point2D(x / 1e6, y / 1e6) for x, y in path]
-            if len(pts) >= 3:
-                result.append(Polygon(pts))
+            if len(path) >= 3:
+                result.append(Polygon._from_point_array(
+                    PointArray.from_array(np.array(path, dtype=np.float64) / 1e6)))
         return result
@@ -10,6 +10,7 @@ import numpy as np
 import math
 from .shapes import Shape2D, ShapeType
 from .point import Point2D
+from .point_array import PointArray
 from .line import Line2D
 from .transform import Transform2D
 
@@ -24,7 +25,7 @@ class PolyLine2D(Shape2D):
     This class represents a path or contour made up of line segments.
     """
 
-    def __init__(self, points: List[Point2D]):
+    def __init__(self, points: Union[List[Point2D], PointArray]):
         """
         Initialize a polyline with a list of points.
         
@@ -33,7 +34,28 @@ class PolyLine2D(Shape2D):
         """
         if len(points) < 2:
             raise ValueError("PolyLine2D must have at least 2 points")
-        self.points = points.copy()
+        self.points = points
+
+    @property
+    def points(self) -> PointArray:
+        """The points, stored in one (N, 2) array."""
+        return self._points
+
+    @points.setter
+    def points(self, points: Union[List[Point2D], PointArray]):
+        self._points = PointArray(points)
+
+    @classmethod
+    def _from_point_array(cls, points: PointArray) -> 'PolyLine2D':
+        """
+        Make a polyline that takes over a PointArray no one else holds,
+        such as one a transform just made, without copying it.
+        """
+        if len(points) < 2:
+            raise ValueError("PolyLine2D must have at least 2 points")
+        polyline = cls.__new__(cls)
+        polyline._points = points
+        return polyline
 
     def __repr__(self) -> str:
         return f"PolyLine2D({len(self.points)} points)"
@@ -69,31 +91,21 @@ class PolyLine2D(Shape2D):
         if len(self.points) < 2:
             return 0.0
         
-        total_length = 0.0
-        for i in range(len(self.points) - 1):
-            total_length += self.points[i].distance_to(self.points[i + 1])
+        steps = np.diff(self.points.coords, axis=0)
+        total_length = float(np.sum(np.hypot(steps[:, 0], steps[:, 1])))
         return total_length
 
     @property
     def bounds(self) -> Tuple[Point2D, Point2D]:
         """Get bounding box as (min_point, max_point)."""
-        if not self.points:
-            return Point2D(0, 0), Point2D(0, 0)
-
-        # Use numpy for efficient min/max calculation
-        points_array = np.array([[p.x, p.y] for p in self.points])
-        min_coords = np.min(points_array, axis=0)
-        max_coords = np.max(points_array, axis=0)
-
-        return Point2D(min_coords[0], min_coords[1]), Point2D(max_coords[0], max_coords[1])
+        min_x, min_y, max_x, max_y = self.points.get_bounds()
+        return Point2D(min_x, min_y), Point2D(max_x, max_y)
 
     @property
     def segments(self) -> List[Line2D]:
         """Get list of line segments that make up the polyline."""
-        segments = []
-        for i in range(len(self.points) - 1):
-            segments.append(Line2D(self.points[i], self.points[i + 1]))
-        return segments
+        points = self.points.to_list()
+        return [Line2D(start, end) for start, end in zip(points, points[1:])]
 
     def add_point(self, point: Point2D):
         """Add a point to the end of the polyline."""
@@ -115,19 +127,19 @@ class PolyLine2D(Shape2D):
 
     def translate(self, vector) -> 'PolyLine2D':
         """Translate all points in the polyline by vector."""
-        return PolyLine2D([point.translate(vector) for point in self.points])
+        return PolyLine2D._from_point_array(self.points.translate(vector))
 
     def rotate(self, angle: float, center = None) -> 'PolyLine2D':
         """Rotate all points in the polyline around a center point."""
-        return PolyLine2D([point.rotate(angle, center) for point in self.points])
+        return PolyLine2D._from_point_array(self.points.rotate(angle, center))
 
     def scale(self, scale, center = None) -> 'PolyLine2D':
         """Scale all points in the polyline around a center point."""
-        return PolyLine2D([point.scale(scale, center) for point in self.points])
+        return PolyLine2D._from_point_array(self.points.scale(scale, center))
 
     def transform(self, transform: Transform2D) -> 'PolyLine2D':
         """Transform polyline using a transformation matrix."""
-        return PolyLine2D([point.transform(transform) for point in self.points])
+        return PolyLine2D._from_point_array(self.points.transform(transform))
 
     def reverse(self):
         """Reverse the order of points in the polyline."""
@@ -277,12 +289,7 @@ class PolyLine2D(Shape2D):
         # Convert Point2D to integer coordinates (PyClipper uses integers)
         # Scale to preserve precision
         scale_factor = Region.clipper_scale_factor
-        path = []
-        for point in self.points:
-            x = int(point.x * scale_factor)
-            y = int(point.y * scale_factor)
-            path.append([x, y])
-        return path
+        return (self.points.coords * scale_factor).astype(np.int64).tolist()
 
     @classmethod
     def _from_clipper_path(cls, path: List[List[int]]) -> 'PolyLine2D':
@@ -294,12 +301,8 @@ class PolyLine2D(Shape2D):
         
         # Convert back from integer coordinates
         scale_factor = Region.clipper_scale_factor
-        points = []
-        for point in path:
-            x = point[0] / scale_factor
-            y = point[1] / scale_factor
-            points.append(Point2D(x, y))
-        return cls(points)
+        return cls._from_point_array(
+            PointArray.from_array(np.array(path, dtype=np.float64) / scale_factor))
 
     def add_vertex_at_point(self, point: Point2D, tolerance: float = 1e-6) -> int:
         """
@@ -568,22 +571,15 @@ class PolyLine2D(Shape2D):
         # We need to handle the fact that the last point is the same as the first
         # So we rotate the points and ensure the last point matches the new first point
         
-        # Create the reoriented points
-        reoriented_points = []
-        
-        # Add points from new_start_index to the end (excluding the last point if it's the same as first)
-        for i in range(new_start_index, len(self.points) - 1):
-            reoriented_points.append(self.points[i])
-        
-        # Add points from beginning to new_start_index
-        for i in range(new_start_index):
-            reoriented_points.append(self.points[i])
-        
-        # Add the new start point as the last point to close the polyline
-        reoriented_points.append(self.points[new_start_index])
-        
-        # Update the polyline points
-        self.points = reoriented_points
+        # Points from new_start_index to the end (excluding the last point,
+        # which is the same as the first), then from the beginning to
+        # new_start_index, then the new start point to close the polyline
+        coords = self.points.coords
+        self._points = PointArray.from_array(np.concatenate([
+            coords[new_start_index:-1],
+            coords[:new_start_index],
+            coords[new_start_index:new_start_index + 1],
+        ]))
         
         return True
 
@@ -689,8 +685,4 @@ class PolyLine2D(Shape2D):
 
     def get_bounds(self) -> Tuple[float, float, float, float]:
         """Get the bounds of the polyline as (min_x, min_y, max_x, max_y)."""
-        if not self.points:
-            return (0.0, 0.0, 0.0, 0.0)
-        xs = [p.x for p in self.points]
-        ys = [p.y for p in self.points]
-        return (min(xs), min(ys), max(xs), max(ys))
+        return self.points.get_bounds()
@@ -5,7 +5,7 @@ import logging
 from typing import Set
 
 from PySide6.QtCore import (
-    Qt, QSize, QTimer
+    Qt, QSize, QThreadPool, QTimer
 )
 from PySide6.QtGui import (
     QShortcut, QKeySequence, QColor
@@ -43,6 +43,7 @@ from .snaps_system import SnapsSystem
 from .panes.config_pane import ConfigPane
 from .widgets.columnar_toolbar import ColumnarToolbarWidget
 from BelfryCAD.utils.cad_expression import CadExpression
+from BelfryCAD.utils.worker import Worker
 from .panes.parameters_pane import ParametersPane
 from .panes.object_tree_pane import ObjectTreePane
 from BelfryCAD.utils.xml_serializer import (
@@ -70,6 +71,10 @@ class DocumentWindow(QMainWindow):
 
         # Track graphics items by object ID for updates/deletion
         self.graphics_items = {}  # object_id -> list of graphics items
+
+        # The constraint solve running on the thread pool, and its worker
+        self._solve_job = None
+        self._solve_worker = None
         
         # Flag to prevent circular updates when programmatically updating tree selection
         self._updating_tree_programmatically = False
@@ -611,15 +616,17 @@ class DocumentWindow(QMainWindow):
             if not loaded:
                 raise RuntimeError("Failed to load BelfryCAD document")
                 
-            # Replace current document reference
+            # Replace current document reference, stopping the old one's
+            # solver worker processes
+            self.document.constraints_manager.shutdown_executor()
             self.document = loaded
             # Attach document CadExpression (parameters) into main window if available
             if hasattr(self.document, 'cad_expression'):
                 self.cad_expression = self.document.cad_expression
-            # Optionally solve constraints after load
+            # Solve constraints after load, without blocking the window
             try:
-                if hasattr(self.document, 'solve_constraints'):
-                    self.document.solve_constraints()
+                if hasattr(self.document, 'create_solve_job'):
+                    self.solve_constraints_in_background()
             except Exception:
                 logger.debug("Constraint solving after load failed or is not available.")
             # Update panes that depend on document
@@ -656,6 +663,51 @@ class DocumentWindow(QMainWindow):
             msg.exec()
             return False
 
+    def solve_constraints_in_background(self):
+        """
+        Solve the document's constraints on the thread pool, cancelling any
+        solve still running.  The results are applied, and the views of the
+        solved objects updated, once the solve finishes.
+        """
+        self.cancel_background_solve()
+        job = self.document.create_solve_job()
+        if not job.tasks:
+            return
+        worker = Worker(job.run)
+        worker.signals.progress.connect(self._on_solve_progress)
+        worker.signals.result.connect(self._on_solve_finished)
+        self._solve_job = job
+        self._solve_worker = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def cancel_background_solve(self):
+        """Cancel the background constraint solve, if one is running."""
+        if self._solve_job is not None:
+            self._solve_job.cancel()
+            self._solve_job = None
+            self._solve_worker = None
+            self.statusBar().clearMessage()
+
+    def _on_solve_progress(self, percent: float):
+        """Show the progress of the background constraint solve."""
+        self.statusBar().showMessage(f"Solving constraints: {percent:.0f}%")
+
+    def _on_solve_finished(self, job):
+        """Apply a finished background solve, and update the solved objects' views."""
+        if job is not self._solve_job:
+            return  # Cancelled, or replaced by a newer solve
+        self._solve_job = None
+        self._solve_worker = None
+        self.statusBar().clearMessage()
+        if not self.document.apply_solve_job(job):
+            logger.debug("Some constraint components were not solved in the background.")
+        if not hasattr(self, 'cad_scene'):
+            return
+        for object_id in job.object_ids:
+            viewmodel = self._object_viewmodels.get(object_id)
+            if viewmodel:
+                viewmodel.update_view(self.cad_scene)
+
     def _build_viewmodels_for_document(self):
         """Create a CadViewModel for each object and add its views to the scene."""
         if not hasattr(self, 'cad_scene'):
@@ -1414,6 +1466,9 @@ class DocumentWindow(QMainWindow):
 
     def closeEvent(self, event):
         """Handle window close event."""
+        self.cancel_background_solve()
+        self.document.constraints_manager.shutdown_executor()
+
         # Save window geometry to preferences
         geometry = self.geometry()
         self.preferences_viewmodel.set("window_geometry",
@@ -164,11 +164,11 @@ class ArcCadObject(CadObject):
     def update_from_solved_constraints(self, solver: ConstraintSolver):
         """Update object from constraints."""
         # Get updated coordinates from constraints
-        cx, cy, r, start_degrees, span_degrees = \
+        cx, cy, r, start_degrees, end_degrees = \
             self.constraint_arc.get(solver.variables)
 
         # Update the arc geometry directly
-        self.arc = Arc(Point2D(cx, cy), r, start_degrees, span_degrees)
+        self.arc = Arc(Point2D(cx, cy), r, start_degrees, end_degrees - start_degrees)
 
     def get_constrainables(self) -> List[Tuple[str, Constrainable]]:
         """Get list of constrainables for this object."""
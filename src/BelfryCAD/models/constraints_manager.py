@@ -5,13 +5,108 @@ This module provides a centralized way to manage constraints between CAD objects
 including adding, removing, and solving constraints.
 """
 
-from typing import Dict, List, Optional, Set, Tuple, Any, TYPE_CHECKING
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple, Any, TYPE_CHECKING
+
+import numpy as np
+
 from .cad_object import CadObject
-from ..utils.constraints import ConstraintSolver, Constraint, Constrainable
+from ..utils.constraints import (
+    ConstraintSolver, Constraint, Constrainable, ConstrainablePoint2D,
+    DragTargetConstraint, SOLVED_TOLERANCE, SparseConstraintSystem,
+    solve_packed_subproblem
+)
+from ..utils.conflict_isolation import find_minimal_conflict
+from ..utils.constraint_plan import plan_component
+from ..utils.solver_telemetry import ComponentStats, SolverTelemetry
 
 if TYPE_CHECKING:
     from .document import Document
 
+logger = logging.getLogger(__name__)
+
+
+class SolveJob:
+    """
+    A solve of some constraint components on a private copy of the
+    variables, which can run off the GUI thread.
+    
+    ConstraintsManager.create_solve_job() makes the job, and
+    ConstraintsManager.apply_solve_job() copies its results back once it
+    has run.  Running touches nothing but the copy, so the document can
+    be used meanwhile.  cancel() stops the run at the next solver
+    iteration, and leaves nothing to apply.
+    """
+    
+    def __init__(self, variables: List[float], tasks: List[Dict[str, Any]]):
+        """
+        Initialize the job.
+        
+        Args:
+            variables: The private copy of the variables the solvers share
+            tasks: One dict per component, in solving order, holding its
+                solver over the copy and what apply_solve_job() checks
+        """
+        self.variables = variables
+        self.tasks = tasks
+        self._cancelled = threading.Event()
+        self.finished = False
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+    
+    @property
+    def object_ids(self) -> Set[str]:
+        """IDs of the objects in the components the job solves."""
+        return set().union(*(task["component"] for task in self.tasks))
+    
+    def cancel(self):
+        """Stop the run as soon as possible.  Safe to call from any thread."""
+        self._cancelled.set()
+    
+    def run(self, progress_callback=None) -> 'SolveJob':
+        """
+        Solve the components in turn.  Suits Worker, which passes its
+        progress signal as progress_callback.
+        
+        Args:
+            progress_callback: If given, emits the percentage of
+                components done after each one
+            
+        Returns:
+            This job, for the Worker's result signal
+        """
+        total = len(self.tasks)
+        for done, task in enumerate(self.tasks, 1):
+            if self.cancelled:
+                break
+            start = time.perf_counter()
+            stats = task["stats"]
+            component_solver = task["solver"]
+            variable_indices = task["variable_indices"]
+            try:
+                plan = task["plan"]
+                if len(plan) > 1:
+                    stats.solves = component_solver.solve_clusters(
+                        plan, variable_indices, task["max_iter"], task["tol"])
+                else:
+                    component_solver.solve(variable_indices=variable_indices)
+                    stats.solves.append(component_solver.last_stats)
+            except Exception as e:
+                stats.success = False
+                stats.error = str(e)
+            stats.total_time = time.perf_counter() - start
+            task["solved"] = True
+            if progress_callback is not None:
+                progress_callback.emit(100.0 * done / total)
+        self.finished = True
+        return self
+
 
 class ConstraintsManager:
     """
@@ -33,6 +128,8 @@ class ConstraintsManager:
             document: The document this manager belongs to
         """
         self.document = document
+        # The variable store shared by every object's constrainables.
+        # Components are solved as subproblems over these variables.
         self.solver = ConstraintSolver()
         
         # Track which objects have constraints
@@ -45,9 +142,82 @@ class ConstraintsManager:
         
         # Track all constraints by ID
         self.constraints: Dict[str, Constraint] = {}
+
+        # Objects involved in each constraint, by constraint ID
+        self.constraint_objects: Dict[str, FrozenSet[str]] = {}
+        self._constraint_pairs: Dict[str, Tuple[str, Optional[str]]] = {}
+
+        # Constraint IDs involving each object
+        self._object_constraint_ids: Dict[str, Set[str]] = {}
         
         # Track which objects have constrainables created
         self.objects_with_constrainables: Set[str] = set()
+
+        # Connected components of the constraint graph, kept up to date
+        # incrementally as a union-find forest over object IDs.
+        self._component_parent: Dict[str, str] = {}
+        self._component_members: Dict[str, Set[str]] = {}
+        self._component_constraints: Dict[str, Set[str]] = {}
+
+        # Constraint graph adjacency, as edge multiplicities per neighbor.
+        # Single-object constraints are recorded as self-loops.
+        self._object_neighbors: Dict[str, Dict[str, int]] = {}
+
+        # Objects whose component lost an edge and must be re-split.
+        self._split_pending: Set[str] = set()
+
+        # Objects whose component needs solving.
+        self._dirty_objects: Set[str] = set()
+
+        # Persistent solvers, keyed by the constraint IDs of a component,
+        # with the variable indices they solve for.  They are reused,
+        # warm-started from the current variables, until the component's
+        # constraints change.
+        self._component_solvers: Dict[FrozenSet[str], Tuple[ConstraintSolver, List[int]]] = {}
+
+        # The drag in progress, as (point, solver, variable indices,
+        # objects, drag constraint), or None.
+        self._drag: Optional[Tuple[Any, ...]] = None
+
+        # Weight of the soft constraint pulling a dragged point toward the
+        # cursor.  Small, so the hard constraints win when they disagree.
+        self.drag_weight = 0.01
+
+        # Whether to split components into rigid clusters solved in
+        # sequence, and the cached plans, as lists of cluster solvers and
+        # the variable indices each one frees.  Plans are keyed like
+        # _component_solvers.
+        self.decompose_components = True
+        self._component_plans: Dict[FrozenSet[str], List[Tuple[ConstraintSolver, List[int]]]] = {}
+
+        # Opt-in solving of independent components in worker processes.
+        # Only components with at least parallel_min_constraints
+        # constraints are worth the cost of shipping them to a worker.
+        self.parallel_solving = False
+        self.parallel_min_constraints = 64
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        # Timing and convergence of recent component solves.
+        self.telemetry = SolverTelemetry()
+
+        # Whether component solvers compile their constraints into
+        # generated code.  They are cached until their constraints change,
+        # so the compiled code is reused by every drag frame and whole-
+        # component solve until then.  Cluster solvers are small and
+        # rarely re-solved, so they aren't compiled.  Applies to solvers
+        # created after it's set.
+        self.compile_constraints = True
+
+        # Fingerprints of the last converged solve of each component,
+        # keyed like _component_solvers.  A component whose constraints,
+        # parameters and variables still match its fingerprint is already
+        # solved, so solve_constraints() skips it.  Variables are compared
+        # in steps of fingerprint_quantum.  Only components whose hard
+        # residual norm is within fingerprint_tolerance are fingerprinted.
+        self.skip_solved_components = True
+        self.fingerprint_quantum = 1e-9
+        self.fingerprint_tolerance = SOLVED_TOLERANCE
+        self._solved_fingerprints: Dict[FrozenSet[str], int] = {}
     
     def add_constraint(self, constraint_id: str, constraint: Constraint, 
                       object_id1: str, object_id2: Optional[str] = None) -> bool:
@@ -80,6 +250,12 @@ class ConstraintsManager:
         if object_id2 and object_id2 not in self.objects_with_constrainables:
             self._create_constrainables_for_object(object_id2)
         
+        # Take the cached solvers of the components being joined, to
+        # extend the largest one rather than rebuild it from scratch.
+        taken = [self._take_component_solver(object_id1)]
+        if object_id2:
+            taken.append(self._take_component_solver(object_id2))
+        
         # Add constraint to tracking
         self.constraints[constraint_id] = constraint
         self.constrained_objects.add(object_id1)
@@ -91,9 +267,19 @@ class ConstraintsManager:
         if pair_key not in self.object_constraints:
             self.object_constraints[pair_key] = []
         self.object_constraints[pair_key].append(constraint_id)
+        self._constraint_pairs[constraint_id] = pair_key
+        self.constraint_objects[constraint_id] = frozenset(
+            object_id for object_id in pair_key if object_id)
+        for object_id in self.constraint_objects[constraint_id]:
+            self._object_constraint_ids.setdefault(object_id, set()).add(constraint_id)
+        self._link_objects(object_id1, object_id2)
+        root = self._find_root(object_id1)
+        self._component_constraints[root].add(constraint_id)
         
         # Add constraint to solver
-        self.solver.add_constraint(constraint.residual, constraint_id)
+        self.solver.add_constraint(constraint, constraint_id)
+        self._merge_component_solvers(
+            object_id1, [cached for cached in taken if cached is not None])
         
         return True
     
@@ -110,22 +296,28 @@ class ConstraintsManager:
         if constraint_id not in self.constraints:
             return False
         
-        # Remove from solver by rebuilding
-        self._rebuild_solver()
+        # Remove from the solver.  Object variables stay where they are,
+        # so the remaining constraints keep referring to valid indices.
+        self.solver.remove_constraint(constraint_id)
+        taken = self._take_component_solver(self._constraint_pairs[constraint_id][0])
         
         # Remove from tracking
-        constraint = self.constraints.pop(constraint_id)
-        
-        # Find and remove from object_constraints
-        for pair_key, constraint_ids in list(self.object_constraints.items()):
-            if constraint_id in constraint_ids:
-                constraint_ids.remove(constraint_id)
-                if not constraint_ids:
-                    del self.object_constraints[pair_key]
-                break
+        self.constraints.pop(constraint_id)
+        pair_key = self._constraint_pairs.pop(constraint_id)
+        self._component_constraints[self._find_root(pair_key[0])].discard(constraint_id)
+        for object_id in self.constraint_objects.pop(constraint_id):
+            object_ids = self._object_constraint_ids[object_id]
+            object_ids.discard(constraint_id)
+            if not object_ids:
+                del self._object_constraint_ids[object_id]
         
-        # Update constrained_objects set
-        self._update_constrained_objects_set()
+        constraint_ids = self.object_constraints[pair_key]
+        constraint_ids.remove(constraint_id)
+        if not constraint_ids:
+            del self.object_constraints[pair_key]
+        self._unlink_objects(*pair_key)
+        if taken is not None:
+            self._shrink_component_solver(constraint_id, taken)
         
         return True
     
@@ -162,13 +354,7 @@ class ConstraintsManager:
         Returns:
             List of constraint IDs
         """
-        constraint_ids = []
-        
-        for (obj1, obj2), ids in self.object_constraints.items():
-            if obj1 == object_id or obj2 == object_id:
-                constraint_ids.extend(ids)
-        
-        return constraint_ids
+        return list(self._object_constraint_ids.get(object_id, ()))
     
     def get_constraints_between_objects(self, object_id1: str, object_id2: str) -> List[str]:
         """
@@ -195,7 +381,8 @@ class ConstraintsManager:
         
         return constraint_ids
     
-    def solve_constraints(self, max_iter: int = 50, tol: float = 1e-8) -> bool:
+    def solve_constraints(self, max_iter: int = 50, tol: float = 1e-8,
+                          dirty_only: bool = False) -> bool:
         """
         Solve all constraints and update objects.
         
@@ -205,6 +392,9 @@ class ConstraintsManager:
         Args:
             max_iter: Maximum number of solver iterations
             tol: Tolerance for convergence
+            dirty_only: If True, only solve components whose constraints
+                changed, or which contain an object marked dirty, since
+                they were last solved
             
         Returns:
             True if all components converged, False if any failed
@@ -212,18 +402,181 @@ class ConstraintsManager:
         if not self.constraints:
             return True
         
-        # Find connected components in the constraint graph
-        components = self._find_connected_components()
+        self._cancel_drag()
+        if dirty_only:
+            components = self.get_dirty_components()
+        else:
+            components = self._find_connected_components()
+        if self.skip_solved_components:
+            components = [
+                component for component in components
+                if not self._is_component_solved(component)]
         
         # Solve each component independently
         all_successful = True
+        if self.parallel_solving and len(components) > 1:
+            components, failed = self._solve_components_in_parallel(
+                components, max_iter, tol)
+            if failed:
+                all_successful = False
         for component in components:
-            if not self._solve_component(component, max_iter, tol):
+            if self._solve_component(component, max_iter, tol):
+                self._dirty_objects.difference_update(component)
+            else:
                 all_successful = False
-                print(f"Failed to solve constraint component with {len(component)} objects")
         
         return all_successful
 
+    def create_solve_job(self, max_iter: int = 50, tol: float = 1e-8,
+                         dirty_only: bool = False) -> SolveJob:
+        """
+        Make a job that solves the components solve_constraints() would,
+        on a copy of the variables, for running in a background thread.
+        Object values are pushed into the variables first, so the copy
+        holds the document as it is now.
+        
+        Args:
+            max_iter: Maximum number of solver iterations
+            tol: Tolerance for convergence
+            dirty_only: If True, only solve components that need it, as
+                in solve_constraints()
+            
+        Returns:
+            The job, to be run and then passed to apply_solve_job()
+        """
+        self._cancel_drag()
+        components = []
+        if self.constraints:
+            if dirty_only:
+                components = self.get_dirty_components()
+            else:
+                components = self._find_connected_components()
+            if self.skip_solved_components:
+                components = [
+                    component for component in components
+                    if not self._is_component_solved(component)]
+        
+        prepared = []
+        for component in components:
+            cached = self._get_component_solver(component)
+            if cached is None:
+                continue
+            for obj in cached[2]:
+                obj.update_constrainables_before_solving(self.solver)
+            prepared.append((component, cached))
+        
+        # A solver over the copy, which the job's solvers are made from.
+        shadow = ConstraintSolver()
+        shadow.variables = list(self.solver.variables)
+        shadow.fixed_mask = list(self.solver.fixed_mask)
+        shadow.variable_labels = list(self.solver.variable_labels)
+        shadow.variable_kinds = list(self.solver.variable_kinds)
+        tasks: List[Dict[str, Any]] = []
+        job = SolveJob(shadow.variables, tasks)
+        shadow.cancel_check = lambda: job.cancelled
+        for component, (component_solver, variable_indices, objects) in prepared:
+            shadow.length_scale = component_solver.length_scale
+            job_solver = shadow.make_subproblem(
+                component_solver.constraints, component_solver.constraint_labels)
+            plan = self._get_component_plan(component, component_solver) \
+                if self.decompose_components else []
+            job_plan = []
+            if len(plan) > 1:
+                job_plan = [
+                    (shadow.make_subproblem(
+                        cluster_solver.constraints, cluster_solver.constraint_labels),
+                     indices)
+                    for cluster_solver, indices in plan]
+            tasks.append({
+                "component": component,
+                "key": frozenset(component_solver.constraint_labels),
+                "fingerprint": self._component_fingerprint(
+                    component_solver, variable_indices),
+                "solver": job_solver,
+                "variable_indices": variable_indices,
+                "plan": job_plan,
+                "stats": self._make_component_stats(
+                    "background", component_solver, objects),
+                "max_iter": max_iter,
+                "tol": tol,
+                "solved": False,
+            })
+        return job
+
+    def apply_solve_job(self, job: SolveJob) -> bool:
+        """
+        Copy the results of a job that has run back into the document, all
+        at once.  Components whose constraints, parameters or object values
+        changed while the job ran are left alone, and still need solving,
+        as are all of them if the job was cancelled.
+        
+        Args:
+            job: A job from create_solve_job() that has finished running
+            
+        Returns:
+            True if every component was applied and its solve succeeded
+        """
+        if job.cancelled or not job.finished:
+            return False
+        all_successful = True
+        for task in job.tasks:
+            component = task["component"]
+            stats = task["stats"]
+            cached = self._get_component_solver(component) if task["solved"] else None
+            if cached is None or frozenset(cached[0].constraint_labels) != task["key"]:
+                all_successful = False
+                continue
+            component_solver, variable_indices, objects = cached
+            for obj in objects:
+                obj.update_constrainables_before_solving(self.solver)
+            if self._component_fingerprint(
+                    component_solver, variable_indices) != task["fingerprint"]:
+                all_successful = False
+                continue
+            if not stats.success:
+                self._record_failure(stats, RuntimeError(stats.error))
+                all_successful = False
+                continue
+            for index in variable_indices:
+                self.solver.variables[index] = job.variables[index]
+            for obj in objects:
+                obj.update_from_solved_constraints(self.solver)
+            self._dirty_objects.difference_update(component)
+            self._remember_solution(component_solver, variable_indices, objects, stats)
+            self.telemetry.record(stats)
+        return all_successful
+
+    def mark_object_dirty(self, object_id: str):
+        """
+        Mark an object's component as needing a solve, e.g. after its
+        geometry or one of its constraints' values was edited.  The
+        component is solved by the next solve_constraints() even if it
+        still matches its last solve.
+        
+        Args:
+            object_id: ID of the object that changed
+        """
+        if object_id in self._component_parent:
+            self._dirty_objects.add(object_id)
+            if self._solved_fingerprints:
+                key = frozenset(self.get_component_constraint_ids(object_id))
+                self._solved_fingerprints.pop(key, None)
+
+    def get_dirty_components(self) -> List[Set[str]]:
+        """
+        Get the connected components that need solving.
+        
+        Returns:
+            List of sets of object IDs, one per dirty component
+        """
+        self._split_pending_components()
+        roots = {
+            self._find_root(object_id)
+            for object_id in self._dirty_objects
+            if object_id in self._component_parent
+        }
+        return [set(self._component_members[root]) for root in roots]
+
     def _find_connected_components(self) -> List[Set[str]]:
         """
         Find connected components in the constraint graph.
@@ -231,111 +584,700 @@ class ConstraintsManager:
         Returns:
             List of sets, where each set contains object IDs that form a connected component
         """
-        if not self.constrained_objects:
-            return []
-        
-        # Build adjacency list for the constraint graph
-        graph = {}
-        for object_id in self.constrained_objects:
-            graph[object_id] = set()
-        
-        # Add edges based on constraints
-        for (obj1, obj2), constraint_ids in self.object_constraints.items():
-            if obj1 in graph:
-                if obj2:
-                    graph[obj1].add(obj2)
-                if obj2 in graph:
-                    graph[obj2].add(obj1)
-        
-        # Find connected components using DFS
-        visited = set()
-        components = []
+        self._split_pending_components()
+        return [set(members) for members in self._component_members.values()]
+
+    def _find_root(self, object_id: str) -> str:
+        """Find the root of an object's component, halving paths as it goes."""
+        parent = self._component_parent
+        while parent[object_id] != object_id:
+            parent[object_id] = parent[parent[object_id]]
+            object_id = parent[object_id]
+        return object_id
+
+    def _union_components(self, object_id1: str, object_id2: str):
+        """Merge the components of two objects, smaller into larger."""
+        for object_id in (object_id1, object_id2):
+            if object_id not in self._component_parent:
+                self._component_parent[object_id] = object_id
+                self._component_members[object_id] = {object_id}
+                self._component_constraints[object_id] = set()
+        root1 = self._find_root(object_id1)
+        root2 = self._find_root(object_id2)
+        if root1 == root2:
+            return
+        if len(self._component_members[root1]) < len(self._component_members[root2]):
+            root1, root2 = root2, root1
+        self._component_parent[root2] = root1
+        self._component_members[root1].update(self._component_members.pop(root2))
+        self._component_constraints[root1].update(self._component_constraints.pop(root2))
+
+    def _link_objects(self, object_id1: str, object_id2: Optional[str]):
+        """Record a constraint edge between two objects, or a self-loop."""
+        object_id2 = object_id2 or object_id1
+        for a, b in ((object_id1, object_id2), (object_id2, object_id1)):
+            neighbors = self._object_neighbors.setdefault(a, {})
+            neighbors[b] = neighbors.get(b, 0) + 1
+        self._union_components(object_id1, object_id2)
+        self._dirty_objects.update((object_id1, object_id2))
+
+    def _unlink_objects(self, object_id1: str, object_id2: Optional[str]):
+        """
+        Remove a constraint edge between two objects.  If it was the last
+        edge between them, their component is re-split lazily.
+        """
+        object_id2 = object_id2 or object_id1
+        for a, b in ((object_id1, object_id2), (object_id2, object_id1)):
+            neighbors = self._object_neighbors[a]
+            neighbors[b] -= 1
+            if neighbors[b] == 0:
+                del neighbors[b]
+                self._split_pending.add(a)
+            if not neighbors:
+                del self._object_neighbors[a]
+                self.constrained_objects.discard(a)
+        self._dirty_objects.update((object_id1, object_id2))
+
+    def _split_pending_components(self):
+        """Recompute the components that lost edges since the last query."""
+        roots = {
+            self._find_root(object_id)
+            for object_id in self._split_pending
+            if object_id in self._component_parent
+        }
+        self._split_pending.clear()
+        for root in roots:
+            members = self._component_members.pop(root)
+            del self._component_constraints[root]
+            for object_id in members:
+                del self._component_parent[object_id]
+            for start in members:
+                if start in self._component_parent or start not in self._object_neighbors:
+                    continue
+                # Iterative walk, so long chains can't exhaust the stack.
+                component = {start}
+                stack = [start]
+                while stack:
+                    for neighbor in self._object_neighbors[stack.pop()]:
+                        if neighbor not in component:
+                            component.add(neighbor)
+                            stack.append(neighbor)
+                constraint_ids = set()
+                for object_id in component:
+                    self._component_parent[object_id] = start
+                    constraint_ids.update(self._object_constraint_ids[object_id])
+                self._component_members[start] = component
+                self._component_constraints[start] = constraint_ids
+        self._dirty_objects.intersection_update(self._component_parent)
+
+    def _get_component_solver(
+            self, component: Set[str]
+    ) -> Optional[Tuple[ConstraintSolver, List[int], List[CadObject]]]:
+        """
+        Get the cached solver for a component, creating it if needed.
         
-        def dfs(node: str, component: Set[str]):
-            """Depth-first search to find connected component."""
-            if node in visited:
-                return
-            visited.add(node)
-            component.add(node)
+        Args:
+            component: Set of object IDs in the component
             
-            for neighbor in graph.get(node, set()):
-                dfs(neighbor, component)
+        Returns:
+            (solver, variable indices, objects), or None if the component
+            has no constraints
+        """
+        if not component:
+            return None
+        constraint_ids = self.get_component_constraint_ids(next(iter(component)))
+        if not constraint_ids:
+            return None
         
-        # Find all connected components
-        for node in graph:
-            if node not in visited:
-                component = set()
-                dfs(node, component)
-                if component:  # Only add non-empty components
-                    components.append(component)
+        objects = [self.document.get_object(object_id) for object_id in component]
+        objects = [obj for obj in objects if obj]
         
-        return components
+        key = frozenset(constraint_ids)
+        cached = self._component_solvers.get(key)
+        if cached is None:
+            variable_indices = set()
+            for obj in objects:
+                for _, constrainable in obj.get_constrainables():
+                    variable_indices.update(constrainable.get_variable_indices())
+            constraint_ids = sorted(constraint_ids)
+            component_solver = self.solver.make_subproblem(
+                [self.constraints[cid] for cid in constraint_ids], constraint_ids)
+            component_solver.compile_systems = self.compile_constraints
+            cached = (component_solver, sorted(variable_indices))
+            self._component_solvers[key] = cached
+        component_solver, variable_indices = cached
+        if component_solver.scale_variables:
+            component_solver.length_scale = self._component_length_scale(objects)
+        return component_solver, variable_indices, objects
 
-    def _solve_component(self, component: Set[str], max_iter: int, tol: float) -> bool:
+    @staticmethod
+    def _component_length_scale(objects: List[CadObject]) -> Optional[float]:
         """
-        Solve constraints for a single connected component.
+        Get the length a component's solves scale points and lengths by:
+        the larger side of the bounds of its objects, and at least 1.
         
         Args:
-            component: Set of object IDs in the component
-            max_iter: Maximum number of solver iterations
-            tol: Tolerance for convergence
+            objects: The objects in the component
             
         Returns:
-            True if component solved successfully, False otherwise
+            The length scale, or None if there are no objects
+        """
+        if not objects:
+            return None
+        boundslist = [obj.get_bounds() for obj in objects]
+        width = max(b[2] for b in boundslist) - min(b[0] for b in boundslist)
+        height = max(b[3] for b in boundslist) - min(b[1] for b in boundslist)
+        return max(1.0, width, height)
+
+    def _get_component_plan(
+            self, component: Set[str], component_solver: ConstraintSolver
+    ) -> List[Tuple[ConstraintSolver, List[int]]]:
         """
-        # Create a new solver for this component
-        component_solver = ConstraintSolver()
+        Get the cached cluster plan for a component, creating it if needed.
         
-        # Track which objects have constrainables in this component
-        component_objects_with_constrainables = set()
+        Args:
+            component: Set of object IDs in the component
+            component_solver: The component's cached solver
+            
+        Returns:
+            (solver, variable indices) for each cluster, in solving order
+        """
+        key = frozenset(component_solver.constraint_labels)
+        plan = self._component_plans.get(key)
+        if plan is not None:
+            return plan
         
-        # Create constrainables for all objects in the component
+        object_indices = {}
         for object_id in component:
             obj = self.document.get_object(object_id)
-            if obj and hasattr(obj, 'make_constrainables'):
-                obj.make_constrainables(component_solver)
-                component_objects_with_constrainables.add(object_id)
-        
-        # Add constraints that involve objects in this component
-        component_constraints = []
-        for constraint_id, constraint in self.constraints.items():
-            # Find which objects this constraint involves
-            constraint_objects = set()
-            for (obj1, obj2), constraint_ids in self.object_constraints.items():
-                if constraint_id in constraint_ids:
-                    constraint_objects.add(obj1)
-                    if obj2:
-                        constraint_objects.add(obj2)
+            indices = set()
+            if obj:
+                for _, constrainable in obj.get_constrainables():
+                    indices.update(constrainable.get_variable_indices())
+            object_indices[object_id] = sorted(indices)
+        object_dof = {
+            object_id: len(self.solver.get_free_indices(indices))
+            for object_id, indices in object_indices.items()
+        }
+        constraint_rows = {
+            cid: len(SparseConstraintSystem._evaluate(self.constraints[cid], self.solver.variables))
+            for cid in key
+        }
+        clusters = plan_component(
+            {cid: self._constraint_pairs[cid] for cid in key},
+            object_dof, constraint_rows)
+        
+        plan = []
+        for cluster in clusters:
+            indices = []
+            for object_id in cluster.objects - cluster.shared:
+                indices.extend(object_indices[object_id])
+            cluster_solver = self.solver.make_subproblem(
+                [self.constraints[cid] for cid in cluster.constraint_ids],
+                cluster.constraint_ids)
+            cluster_solver.length_scale = component_solver.length_scale
+            plan.append((cluster_solver, sorted(indices)))
+        self._component_plans[key] = plan
+        return plan
+
+    def solve_drag(self, object_id: str, handle: str, target_point,
+                   budget_ms: float = 16.0, tol: float = SOLVED_TOLERANCE) -> bool:
+        """
+        Drag one of an object's constrainable points toward a target.
+        
+        A temporary soft constraint pulls the handle toward the target, and
+        only the dragged object's component is solved.  Solving stops when
+        the time budget runs out, and objects are updated from the best
+        iterate found so far.  Repeated calls for the same handle reuse the
+        drag constraint, just moving its target.  Call end_drag() when the
+        drag is finished.
+        
+        Args:
+            object_id: ID of the object being dragged
+            handle: Name of the point constrainable, as given by
+                the object's get_constrainables()
+            target_point: The (x, y) location to drag the handle toward
+            budget_ms: Time budget for the solve, in milliseconds
+            tol: Tolerance on the hard constraint residuals
             
-            # If all objects in this constraint are in our component, add it
-            if constraint_objects.issubset(component):
-                component_solver.add_constraint(constraint.residual, constraint_id)
-                component_constraints.append(constraint_id)
+        Returns:
+            True if the hard constraints are satisfied by the result
+        """
+        start = time.perf_counter()
+        deadline = start + budget_ms / 1000.0
+        obj = self.document.get_object(object_id)
+        if not obj:
+            return False
+        point = dict(obj.get_constrainables()).get(handle)
+        if not isinstance(point, ConstrainablePoint2D):
+            return False
+        target = tuple(target_point)
         
-        if not component_constraints:
-            return True  # No constraints to solve
+        if self._drag is not None and self._drag[0] is point:
+            _, component_solver, variable_indices, objects, drag = self._drag
+            drag.target = target
+        else:
+            self.end_drag(polish=False)
+            self._split_pending_components()
+            if object_id not in self._component_parent:
+                # Nothing constrains the object, so the handle just moves.
+                point.update_values(*target)
+                obj.update_from_solved_constraints(self.solver)
+                return True
+            component = self._component_members[self._find_root(object_id)]
+            component_solver, variable_indices, objects = \
+                self._get_component_solver(component)
+            for member in objects:
+                member.update_constrainables_before_solving(self.solver)
+            drag = DragTargetConstraint(point, target)
+            component_solver.add_soft_constraint(drag, self.drag_weight)
+            self._drag = (point, component_solver, variable_indices, objects, drag)
+        
+        # The time budget, rather than the iteration count, bounds the solve.
+        stats = self._make_component_stats("drag", component_solver, objects)
+        component_solver.gauss_newton_solve(
+            max_iter=1000,
+            tol=tol * 1e-2,
+            variable_indices=variable_indices,
+            time_budget=max(deadline - time.perf_counter(), 0.0)
+        )
+        for member in objects:
+            member.update_from_solved_constraints(self.solver)
+        stats.solves.append(component_solver.last_stats)
+        stats.total_time = time.perf_counter() - start
+        self.telemetry.record(stats)
+        return component_solver.residual_norm <= tol
+
+    def end_drag(self, polish: bool = True) -> bool:
+        """
+        Finish a drag started by solve_drag(), removing its soft constraint.
         
-        # Update constrainables with current object values
+        Args:
+            polish: If True, re-solve the dragged component without the
+                drag constraint, to tighten up the hard constraints
+            
+        Returns:
+            True if the final solve converged, or there was nothing to solve
+        """
+        if self._drag is None:
+            return True
+        point, component_solver, variable_indices, objects, drag = self._drag
+        self._cancel_drag()
+        if not polish:
+            return True
+        start = time.perf_counter()
+        stats = self._make_component_stats("polish", component_solver, objects)
+        try:
+            component_solver.gauss_newton_solve(variable_indices=variable_indices)
+        except Exception as e:
+            stats.total_time = time.perf_counter() - start
+            self._record_failure(stats, e)
+            return False
+        for member in objects:
+            member.update_from_solved_constraints(self.solver)
+        stats.solves.append(component_solver.last_stats)
+        self._remember_solution(component_solver, variable_indices, objects, stats)
+        stats.total_time = time.perf_counter() - start
+        self.telemetry.record(stats)
+        return component_solver.residual_norm <= SOLVED_TOLERANCE
+
+    def _cancel_drag(self):
+        """Remove the drag constraint, if any, without solving."""
+        if self._drag is not None:
+            component_solver, drag = self._drag[1], self._drag[4]
+            component_solver.remove_soft_constraint(drag)
+            self._drag = None
+
+    def _take_component_solver(
+            self, object_id: str
+    ) -> Optional[Tuple[FrozenSet[str], Tuple[ConstraintSolver, List[int]], Set[str]]]:
+        """
+        Remove the cached solver of the component containing an object,
+        along with its plan and fingerprint, ahead of an edit to the
+        component's constraints.
+        
+        Args:
+            object_id: ID of any object in the component
+            
+        Returns:
+            (constraint IDs, (solver, variable indices), object IDs) of
+            the component, or None if it had no cached solver
+        """
+        self._cancel_drag()
+        if not self._component_solvers:
+            return None
+        self._split_pending_components()
+        if object_id not in self._component_parent:
+            return None
+        root = self._find_root(object_id)
+        key = frozenset(self._component_constraints[root])
+        self._component_plans.pop(key, None)
+        self._solved_fingerprints.pop(key, None)
+        cached = self._component_solvers.pop(key, None)
+        if cached is None:
+            return None
+        return key, cached, set(self._component_members[root])
+
+    def _object_variable_indices(self, object_ids) -> Set[int]:
+        """Get the variable indices of the constrainables of some objects."""
+        indices = set()
+        for object_id in object_ids:
+            obj = self.document.get_object(object_id)
+            if obj:
+                for _, constrainable in obj.get_constrainables():
+                    indices.update(constrainable.get_variable_indices())
+        return indices
+
+    def _merge_component_solvers(self, object_id: str, taken: List[Tuple[Any, ...]]):
+        """
+        Re-cache the largest of the solvers taken from components that a
+        new constraint joined, for the component now containing an
+        object.  The constraints it lacks are added to it, and the
+        variables of objects it didn't cover, so it's warm and most of
+        its state is kept, instead of rebuilding it from every constraint.
+        
+        Args:
+            object_id: ID of any object in the joined component
+            taken: Results of _take_component_solver() for the components
+                joined
+        """
+        if not taken:
+            return
+        key, (component_solver, variable_indices), _ = max(
+            taken, key=lambda entry: len(entry[0]))
+        root = self._find_root(object_id)
+        constraint_ids = self._component_constraints[root]
+        for cid in sorted(constraint_ids - key):
+            component_solver.add_constraint(self.constraints[cid], cid)
+        indices = set(variable_indices)
+        covered = set()
+        for _, (_, other_indices), members in taken:
+            indices.update(other_indices)
+            covered.update(members)
+        indices.update(self._object_variable_indices(
+            self._component_members[root] - covered))
+        self._component_solvers[frozenset(constraint_ids)] = (
+            component_solver, sorted(indices))
+
+    def _shrink_component_solver(self, constraint_id: str, taken: Tuple[Any, ...]):
+        """
+        Re-cache a solver taken from a component that just lost a
+        constraint.  If the component split, the solver is kept for the
+        part with the most constraints, and the other parts get new
+        solvers when they're next solved.
+        
+        Args:
+            constraint_id: ID of the constraint removed
+            taken: Result of _take_component_solver() for the component
+        """
+        key, (component_solver, variable_indices), members = taken
+        self._split_pending_components()
+        roots = {
+            self._find_root(object_id)
+            for object_id in members
+            if object_id in self._component_parent
+        }
+        if not roots:
+            return
+        root = max(roots, key=lambda r: len(self._component_constraints[r]))
+        constraint_ids = self._component_constraints[root]
+        for cid in [constraint_id, *sorted(key - constraint_ids - {constraint_id})]:
+            component_solver.remove_constraint(cid)
+        indices = set(variable_indices)
+        indices.difference_update(self._object_variable_indices(
+            members - self._component_members[root]))
+        self._component_solvers[frozenset(constraint_ids)] = (
+            component_solver, sorted(indices))
+
+    def get_component_constraint_ids(self, object_id: str) -> Set[str]:
+        """
+        Get the IDs of all constraints in the component containing an object.
+        
+        Args:
+            object_id: ID of any object in the component
+            
+        Returns:
+            Set of constraint IDs, empty if the object is unconstrained
+        """
+        self._split_pending_components()
+        if object_id not in self._component_parent:
+            return set()
+        return set(self._component_constraints[self._find_root(object_id)])
+
+    def get_component_dof(self, object_id: str) -> Dict[str, Optional[int]]:
+        """
+        Get the degrees of freedom left to each object in an object's
+        component, from the rank of the constraint Jacobian at the current
+        object values.  Redundant constraints don't count twice.
+        
+        Args:
+            object_id: ID of any object in the component
+            
+        Returns:
+            Remaining DOF by object ID.  Values are None if the component
+            is too large to analyze exactly.  Empty if the object has no
+            constraints.
+        """
+        self._split_pending_components()
+        if object_id not in self._component_parent:
+            return {}
+        component = self._component_members[self._find_root(object_id)]
+        cached = self._get_component_solver(component)
+        if cached is None:
+            return {}
+        component_solver, variable_indices, objects = cached
+        for obj in objects:
+            obj.update_constrainables_before_solving(self.solver)
+        component_solver.check(variable_indices)
+        dof = {}
         for object_id in component:
             obj = self.document.get_object(object_id)
-            if obj and hasattr(obj, 'update_constrainables_before_solving'):
-                obj.update_constrainables_before_solving(component_solver)
+            indices = []
+            if obj:
+                for _, constrainable in obj.get_constrainables():
+                    indices.extend(constrainable.get_variable_indices())
+            dof[object_id] = component_solver.get_free_dof(indices)
+        return dof
+
+    def find_conflicting_constraints(self, object_id: str, tol: float = 1e-6) -> List[str]:
+        """
+        Find a minimal set of conflicting constraints in an object's
+        component: constraints that can't all be satisfied together, but
+        can be once any one of them is removed.  Object values are left
+        as they are.
+        
+        Args:
+            object_id: ID of any object in the component
+            tol: Largest residual norm that counts as satisfied
+            
+        Returns:
+            Constraint IDs of the conflict, or an empty list if the
+            component can be solved
+        """
+        self._split_pending_components()
+        if object_id not in self._component_parent:
+            return []
+        component = self._component_members[self._find_root(object_id)]
+        cached = self._get_component_solver(component)
+        if cached is None:
+            return []
+        component_solver, variable_indices, objects = cached
+        for obj in objects:
+            obj.update_constrainables_before_solving(self.solver)
+        return find_minimal_conflict(component_solver, variable_indices, tol=tol)
+
+    def _solve_component(self, component: Set[str], max_iter: int, tol: float) -> bool:
+        """
+        Solve constraints for a single connected component.
+        
+        The component is solved as a subproblem of the shared solver: only
+        its own constraints are evaluated, and only its objects' variables
+        are free.
+        
+        Args:
+            component: Set of object IDs in the component
+            max_iter: Maximum number of solver iterations
+            tol: Tolerance for convergence
+            
+        Returns:
+            True if component solved successfully, False otherwise
+        """
+        start = time.perf_counter()
+        cached = self._get_component_solver(component)
+        if cached is None:
+            return True  # No constraints to solve
+        component_solver, variable_indices, objects = cached
+        stats = self._make_component_stats("solve", component_solver, objects)
+        
+        # Push current object values into the shared variables.  Unedited
+        # objects still hold the previous solution, which warm-starts the solve.
+        for obj in objects:
+            obj.update_constrainables_before_solving(self.solver)
         
         # Solve the component
         try:
-            component_solver.solve()
+            plan = self._get_component_plan(component, component_solver) \
+                if self.decompose_components else []
+            if len(plan) > 1:
+                stats.solves = component_solver.solve_clusters(
+                    plan, variable_indices, max_iter, tol)
+            else:
+                component_solver.solve(variable_indices=variable_indices)
+                stats.solves.append(component_solver.last_stats)
             
             # Update objects in this component
-            for object_id in component:
-                obj = self.document.get_object(object_id)
-                if obj and hasattr(obj, 'update_from_solved_constraints'):
-                    obj.update_from_solved_constraints(component_solver)
-            
-            return True
+            for obj in objects:
+                obj.update_from_solved_constraints(self.solver)
         except Exception as e:
-            print(f"Component solver failed: {e}")
+            stats.total_time = time.perf_counter() - start
+            self._record_failure(stats, e)
+            return False
+        self._remember_solution(component_solver, variable_indices, objects, stats)
+        stats.total_time = time.perf_counter() - start
+        self.telemetry.record(stats)
+        return True
+
+    def _component_fingerprint(
+            self, component_solver: ConstraintSolver, variable_indices: List[int]) -> int:
+        """
+        Hash a component's constraint IDs and parameters, and its
+        variables and which of them are fixed, with the variables rounded
+        to multiples of fingerprint_quantum.
+        """
+        variables = self.solver.variables
+        values = np.fromiter(
+            (variables[i] for i in variable_indices), dtype=float,
+            count=len(variable_indices))
+        steps = np.round(values / self.fingerprint_quantum)
+        fixed = [self.solver.fixed_mask[i] for i in variable_indices]
+        parameters = tuple(
+            tuple(constraint.kernel_parameters()) if isinstance(constraint, Constraint) else ()
+            for constraint in component_solver.constraints)
+        return hash((
+            tuple(component_solver.constraint_labels), parameters,
+            steps.tobytes(), tuple(fixed)))
+
+    def _remember_solution(
+            self, component_solver: ConstraintSolver, variable_indices: List[int],
+            objects: List[CadObject], stats: ComponentStats):
+        """
+        Record a component's fingerprint if its solve converged, as its
+        last run tells, and its hard residual norm is within
+        fingerprint_tolerance.  The objects were just updated from the
+        solution, and their values are pushed back first, so the
+        fingerprint matches what the next check pushes: objects round off,
+        and normalize angles, as they store the solution.
+        """
+        key = frozenset(component_solver.constraint_labels)
+        if stats.status == "converged":
+            for obj in objects:
+                obj.update_constrainables_before_solving(self.solver)
+            component_solver.check(variable_indices)
+            if component_solver.residual_norm <= self.fingerprint_tolerance:
+                self._solved_fingerprints[key] = self._component_fingerprint(
+                    component_solver, variable_indices)
+                return
+        self._solved_fingerprints.pop(key, None)
+
+    def _is_component_solved(self, component: Set[str]) -> bool:
+        """
+        Check whether a component still matches its last converged solve,
+        after pushing the current object values into the variables.  A
+        skipped component is recorded in the telemetry as "cached".
+        """
+        start = time.perf_counter()
+        cached = self._get_component_solver(component)
+        if cached is None:
             return False
+        component_solver, variable_indices, objects = cached
+        fingerprint = self._solved_fingerprints.get(
+            frozenset(component_solver.constraint_labels))
+        if fingerprint is None:
+            return False
+        for obj in objects:
+            obj.update_constrainables_before_solving(self.solver)
+        if self._component_fingerprint(component_solver, variable_indices) != fingerprint:
+            return False
+        self._dirty_objects.difference_update(component)
+        stats = self._make_component_stats("cached", component_solver, objects)
+        stats.total_time = time.perf_counter() - start
+        self.telemetry.record(stats)
+        return True
+
+    @staticmethod
+    def _make_component_stats(
+            kind: str, component_solver: ConstraintSolver, objects: List[CadObject]
+    ) -> ComponentStats:
+        """Start the telemetry record for solving a component."""
+        constraint_types: Dict[str, int] = {}
+        for constraint in component_solver.constraints:
+            name = type(constraint).__name__
+            constraint_types[name] = constraint_types.get(name, 0) + 1
+        return ComponentStats(kind, len(objects), constraint_types)
+
+    def _record_failure(self, stats: ComponentStats, error: Exception):
+        """Log a component solve that raised, and record it in the telemetry."""
+        stats.success = False
+        stats.error = str(error)
+        logger.warning(
+            "Failed to solve constraint component with %d objects and %d constraints: %s",
+            stats.num_objects, stats.num_constraints, error)
+        self.telemetry.record(stats)
     
+    def _solve_components_in_parallel(
+            self, components: List[Set[str]], max_iter: int, tol: float
+    ) -> Tuple[List[Set[str]], int]:
+        """
+        Solve the large components in worker processes.
+        
+        Each large component's constraints and variables are packed and
+        submitted to the process pool.  Results are written back into the
+        shared variables, and the component's objects updated from them.
+        Components that are small, or whose constraints can't be packed,
+        are left for the caller to solve locally.
+        
+        Args:
+            components: The components to solve
+            max_iter: Maximum number of solver iterations
+            tol: Tolerance for convergence
+            
+        Returns:
+            (components left to solve locally, number of components that failed)
+        """
+        local = []
+        submitted: List[Tuple[Set[str], ConstraintSolver, List[int], List[CadObject],
+                              ComponentStats, Future]] = []
+        start = time.perf_counter()
+        for component in components:
+            cached = self._get_component_solver(component)
+            if cached is None:
+                continue
+            component_solver, variable_indices, objects = cached
+            if len(component_solver.constraints) < self.parallel_min_constraints:
+                local.append(component)
+                continue
+            for obj in objects:
+                obj.update_constrainables_before_solving(self.solver)
+            plan = self._get_component_plan(component, component_solver) \
+                if self.decompose_components else []
+            try:
+                packed = component_solver.pack_subproblem(
+                    variable_indices, plan if len(plan) > 1 else ())
+            except Exception:
+                local.append(component)
+                continue
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+            future = self._executor.submit(solve_packed_subproblem, packed, max_iter, tol)
+            stats = self._make_component_stats("parallel", component_solver, objects)
+            submitted.append(
+                (component, component_solver, variable_indices, objects, stats, future))
+        
+        failed = 0
+        for component, component_solver, variable_indices, objects, stats, future in submitted:
+            try:
+                referenced, values, stats.solves = future.result()
+            except Exception as e:
+                stats.total_time = time.perf_counter() - start
+                self._record_failure(stats, e)
+                failed += 1
+                continue
+            for index, value in zip(referenced, values):
+                self.solver.variables[index] = value
+            for obj in objects:
+                obj.update_from_solved_constraints(self.solver)
+            self._dirty_objects.difference_update(component)
+            self._remember_solution(component_solver, variable_indices, objects, stats)
+            stats.total_time = time.perf_counter() - start
+            self.telemetry.record(stats)
+        return local, failed
+
+    def shutdown_executor(self):
+        """Shut down the worker processes used for parallel solving, if any."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
     def _create_constrainables_for_object(self, object_id: str) -> bool:
         """
         Create constrainables for an object if they don't exist.
@@ -350,43 +1292,36 @@ class ConstraintsManager:
         if not obj or not hasattr(obj, 'make_constrainables'):
             return False
         
-        # Create constrainables for the object
-        obj.make_constrainables(self.solver)
+        # Adopt constrainables the caller already made in our solver, since
+        # constraints may already refer to them.
+        existing = obj.get_constrainables()
+        if not any(getattr(c, 'solver', None) is self.solver for _, c in existing):
+            obj.make_constrainables(self.solver)
         self.objects_with_constrainables.add(object_id)
         
         return True
     
-    def _rebuild_solver(self):
-        """Rebuild the solver with remaining constraints."""
-        # Create new solver
-        self.solver = ConstraintSolver()
-        
-        # Recreate constrainables for all constrained objects
-        for object_id in self.constrained_objects:
-            obj = self.document.get_object(object_id)
-            if obj and hasattr(obj, 'make_constrainables'):
-                obj.make_constrainables(self.solver)
-        
-        # Add all remaining constraints
-        for constraint_id, constraint in self.constraints.items():
-            self.solver.add_constraint(constraint.residual, constraint_id)
-    
-    def _update_constrained_objects_set(self):
-        """Update the set of objects that have constraints."""
-        self.constrained_objects.clear()
-        
-        for (obj1, obj2) in self.object_constraints.keys():
-            self.constrained_objects.add(obj1)
-            if obj2:
-                self.constrained_objects.add(obj2)
-    
     def clear_all_constraints(self):
-        """Clear all constraints from the manager."""
+        """Clear all constraints from the manager, and stop its worker processes."""
         self.constraints.clear()
+        self.constraint_objects.clear()
+        self._constraint_pairs.clear()
+        self._object_constraint_ids.clear()
         self.object_constraints.clear()
         self.constrained_objects.clear()
         self.objects_with_constrainables.clear()
+        self._component_parent.clear()
+        self._component_members.clear()
+        self._component_constraints.clear()
+        self._object_neighbors.clear()
+        self._split_pending.clear()
+        self._dirty_objects.clear()
+        self._component_solvers.clear()
+        self._component_plans.clear()
+        self._solved_fingerprints.clear()
+        self._drag = None
         self.solver = ConstraintSolver()
+        self.shutdown_executor()
     
     def get_constraint_count(self) -> int:
         """Get the total number of constraints."""
@@ -437,18 +1372,8 @@ class ConstraintsManager:
         component_info = []
         
         for i, component in enumerate(components):
-            # Count constraints in this component
-            component_constraints = 0
-            for constraint_id, constraint in self.constraints.items():
-                constraint_objects = set()
-                for (obj1, obj2), constraint_ids in self.object_constraints.items():
-                    if constraint_id in constraint_ids:
-                        constraint_objects.add(obj1)
-                        if obj2:
-                            constraint_objects.add(obj2)
-                
-                if constraint_objects.issubset(component):
-                    component_constraints += 1
+            component_constraints = len(
+                self.get_component_constraint_ids(next(iter(component))))
             
             component_info.append({
                 'component_id': i,
@@ -12,7 +12,7 @@
 from typing import List, Dict, Optional, Tuple, Set, Any
 from .cad_object import CadObject
 from .cad_objects.group_cad_object import GroupCadObject
-from .constraints_manager import ConstraintsManager
+from .constraints_manager import ConstraintsManager, SolveJob
 from ..cad_geometry import Point2D
 from ..utils.constraints import Constraint
 from ..utils.cad_expression import CadExpression
@@ -38,8 +38,8 @@ class Document:
 
     @parameters.setter
     def parameters(self, value: Dict[str, str]):
-        """Set document parameters."""
-        self.cad_expression = CadExpression(value)
+        """Set document parameters, invalidating the values that change."""
+        self.cad_expression.expressions = value
     
     def add_object(self, cad_object: CadObject) -> str:
         """Add an object to the document"""
@@ -398,6 +398,14 @@ class Document:
     def solve_constraints(self) -> bool:
         """Solve all constraints in the document"""
         return self.constraints_manager.solve_constraints()
+
+    def create_solve_job(self, dirty_only: bool = False) -> SolveJob:
+        """Create a constraint solve job for running in a background thread"""
+        return self.constraints_manager.create_solve_job(dirty_only=dirty_only)
+
+    def apply_solve_job(self, job: SolveJob) -> bool:
+        """Apply the results of a finished background constraint solve job"""
+        return self.constraints_manager.apply_solve_job(job)
     
     def remove_constraint(self, constraint_id: str) -> bool:
         """Remove a constraint by ID"""
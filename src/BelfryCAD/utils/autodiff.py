@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+    belfrycad.utils.autodiff
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Forward-mode automatic differentiation with dual numbers.
+
+    A Dual carries a value, and its partial derivatives with respect to
+    the seeded variables, kept sparsely as a dict from Jacobian column to
+    derivative.  Evaluating a residual function once on a DualVector gives
+    every column of its Jacobian, where finite differences need one
+    evaluation per column.
+
+    Residual functions may use arithmetic, comparisons, abs(), and NumPy
+    ufuncs such as np.sqrt(), np.sin() and np.arctan2().  The math module
+    needs floats, and Duals refuse to become floats, so functions using it
+    raise TypeError instead of silently losing derivatives.
+"""
+
+import math
+import operator
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+
+def _parts(x) -> Tuple[float, Optional[Dict[int, float]]]:
+    if isinstance(x, Dual):
+        return x.value, x.grad
+    return float(x), None
+
+
+def _combine(grad_a, da, grad_b, db) -> Dict[int, float]:
+    """Returns da * grad_a + db * grad_b, for sparse gradients."""
+    grad = {}
+    if grad_a:
+        for col, value in grad_a.items():
+            grad[col] = da * value
+    if grad_b:
+        for col, value in grad_b.items():
+            grad[col] = grad.get(col, 0.0) + db * value
+    return grad
+
+
+class Dual:
+    """
+    A value with sparse first derivatives.
+
+    Attributes:
+        value: The value
+        grad: Partial derivatives, by Jacobian column.  Columns not
+            present have a derivative of zero.
+    """
+    __slots__ = ("value", "grad")
+
+    def __init__(self, value: float, grad: Optional[Dict[int, float]] = None):
+        self.value = float(value)
+        self.grad = grad if grad is not None else {}
+
+    def __repr__(self) -> str:
+        return f"Dual({self.value!r}, {self.grad!r})"
+
+    # Arithmetic
+
+    def __add__(self, other):
+        return _add(self, other)
+
+    def __radd__(self, other):
+        return _add(other, self)
+
+    def __sub__(self, other):
+        return _subtract(self, other)
+
+    def __rsub__(self, other):
+        return _subtract(other, self)
+
+    def __mul__(self, other):
+        return _multiply(self, other)
+
+    def __rmul__(self, other):
+        return _multiply(other, self)
+
+    def __truediv__(self, other):
+        return _divide(self, other)
+
+    def __rtruediv__(self, other):
+        return _divide(other, self)
+
+    def __pow__(self, other):
+        return _power(self, other)
+
+    def __rpow__(self, other):
+        return _power(other, self)
+
+    def __mod__(self, other):
+        return _mod(self, other)
+
+    def __rmod__(self, other):
+        return _mod(other, self)
+
+    def __neg__(self):
+        return Dual(-self.value, _combine(self.grad, -1.0, None, 0.0))
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return _UNARY["absolute"](self)
+
+    # Comparisons act on values, so branches in residuals still work.
+
+    def __eq__(self, other):
+        return self.value == _parts(other)[0]
+
+    def __ne__(self, other):
+        return self.value != _parts(other)[0]
+
+    def __lt__(self, other):
+        return self.value < _parts(other)[0]
+
+    def __le__(self, other):
+        return self.value <= _parts(other)[0]
+
+    def __gt__(self, other):
+        return self.value > _parts(other)[0]
+
+    def __ge__(self, other):
+        return self.value >= _parts(other)[0]
+
+    def __bool__(self):
+        return self.value != 0.0
+
+    __hash__ = None
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method != "__call__" or kwargs:
+            return NotImplemented
+        if any(isinstance(x, np.ndarray) and x.ndim for x in inputs):
+            # Let NumPy loop over object arrays, calling back into Duals.
+            return ufunc(*[np.asarray(x, dtype=object) for x in inputs])
+        rule = _UNARY.get(ufunc.__name__) if ufunc.nin == 1 else _BINARY.get(ufunc.__name__)
+        if rule is None:
+            return NotImplemented
+        return rule(*inputs)
+
+
+def _add(a, b):
+    va, ga = _parts(a)
+    vb, gb = _parts(b)
+    return Dual(va + vb, _combine(ga, 1.0, gb, 1.0))
+
+
+def _subtract(a, b):
+    va, ga = _parts(a)
+    vb, gb = _parts(b)
+    return Dual(va - vb, _combine(ga, 1.0, gb, -1.0))
+
+
+def _multiply(a, b):
+    va, ga = _parts(a)
+    vb, gb = _parts(b)
+    return Dual(va * vb, _combine(ga, vb, gb, va))
+
+
+def _divide(a, b):
+    va, ga = _parts(a)
+    vb, gb = _parts(b)
+    value = va / vb
+    return Dual(value, _combine(ga, 1.0 / vb, gb, -value / vb))
+
+
+def _power(a, b):
+    va, ga = _parts(a)
+    vb, gb = _parts(b)
+    value = va ** vb
+    da = vb * va ** (vb - 1) if ga else 0.0
+    db = value * math.log(va) if gb and va > 0 else 0.0
+    return Dual(value, _combine(ga, da, gb, db))
+
+
+def _mod(a, b):
+    va, ga = _parts(a)
+    vb, gb = _parts(b)
+    return Dual(va % vb, _combine(ga, 1.0, gb, -math.floor(va / vb)))
+
+
+def _arctan2(y, x):
+    vy, gy = _parts(y)
+    vx, gx = _parts(x)
+    r2 = vx * vx + vy * vy
+    if not r2:
+        return Dual(math.atan2(vy, vx), {})
+    return Dual(math.atan2(vy, vx), _combine(gy, vx / r2, gx, -vy / r2))
+
+
+def _hypot(a, b):
+    va, ga = _parts(a)
+    vb, gb = _parts(b)
+    value = math.hypot(va, vb)
+    if not value:
+        return Dual(0.0, {})
+    return Dual(value, _combine(ga, va / value, gb, vb / value))
+
+
+def _maximum(a, b):
+    return a if _parts(a)[0] >= _parts(b)[0] else b
+
+
+def _minimum(a, b):
+    return a if _parts(a)[0] <= _parts(b)[0] else b
+
+
+def _unary(function: Callable[[float], float],
+           derivative: Callable[[float, float], float]):
+    """Makes a Dual rule from a float function, and its derivative given (x, f(x))."""
+    def rule(a):
+        va, ga = _parts(a)
+        value = function(va)
+        return Dual(value, _combine(ga, derivative(va, value), None, 0.0))
+    return rule
+
+
+_DEGREES = 180.0 / math.pi
+_RADIANS = math.pi / 180.0
+
+_UNARY = {
+    "negative": _unary(operator.neg, lambda x, f: -1.0),
+    "positive": _unary(operator.pos, lambda x, f: 1.0),
+    "absolute": _unary(abs, lambda x, f: math.copysign(1.0, x) if x else 0.0),
+    "square": _unary(lambda x: x * x, lambda x, f: 2.0 * x),
+    "sqrt": _unary(math.sqrt, lambda x, f: 0.5 / f if f else 0.0),
+    "exp": _unary(math.exp, lambda x, f: f),
+    "log": _unary(math.log, lambda x, f: 1.0 / x),
+    "sin": _unary(math.sin, lambda x, f: math.cos(x)),
+    "cos": _unary(math.cos, lambda x, f: -math.sin(x)),
+    "tan": _unary(math.tan, lambda x, f: 1.0 + f * f),
+    "arcsin": _unary(math.asin, lambda x, f: 1.0 / math.sqrt(1.0 - x * x)),
+    "arccos": _unary(math.acos, lambda x, f: -1.0 / math.sqrt(1.0 - x * x)),
+    "arctan": _unary(math.atan, lambda x, f: 1.0 / (1.0 + x * x)),
+    "sinh": _unary(math.sinh, lambda x, f: math.cosh(x)),
+    "cosh": _unary(math.cosh, lambda x, f: math.sinh(x)),
+    "tanh": _unary(math.tanh, lambda x, f: 1.0 - f * f),
+    "degrees": _unary(math.degrees, lambda x, f: _DEGREES),
+    "rad2deg": _unary(math.degrees, lambda x, f: _DEGREES),
+    "radians": _unary(math.radians, lambda x, f: _RADIANS),
+    "deg2rad": _unary(math.radians, lambda x, f: _RADIANS),
+}
+
+_BINARY = {
+    "add": _add,
+    "subtract": _subtract,
+    "multiply": _multiply,
+    "divide": _divide,
+    "true_divide": _divide,
+    "power": _power,
+    "remainder": _mod,
+    "arctan2": _arctan2,
+    "hypot": _hypot,
+    "maximum": _maximum,
+    "minimum": _minimum,
+}
+
+# NumPy evaluates ufuncs on object arrays by calling the method of the
+# same name on each element.
+for _name, _rule in _UNARY.items():
+    if _name not in ("negative", "positive", "absolute"):
+        setattr(Dual, _name, _rule)
+Dual.arctan2 = _arctan2
+Dual.hypot = _hypot
+
+
+class DualVector:
+    """
+    A read-only view of a variable vector, in which the seeded variables
+    read as Duals and the rest as floats.
+    """
+    def __init__(self, x, columns: Mapping[int, int]):
+        """
+        Args:
+            x: The variable values
+            columns: The Jacobian column of each seeded variable index
+        """
+        self._x = x
+        self._columns = columns
+
+    def __len__(self) -> int:
+        return len(self._x)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return np.array(
+                [self[i] for i in range(*index.indices(len(self)))], dtype=object)
+        if isinstance(index, (list, np.ndarray)):
+            return np.array([self[i] for i in index], dtype=object)
+        index = operator.index(index)
+        if index < 0:
+            index += len(self._x)
+        value = float(self._x[index])
+        col = self._columns.get(index)
+        if col is None:
+            return value
+        return Dual(value, {col: 1.0})
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def jacobian_columns(
+        func: Callable, x, columns: Mapping[int, int], width: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluates a residual function once with dual numbers.
+
+    Args:
+        func: Residual function of the variable vector
+        x: The variable values
+        columns: The Jacobian column of each variable to differentiate by
+        width: The number of Jacobian columns
+
+    Returns:
+        (residuals, Jacobian block of shape (rows, width))
+
+    Raises:
+        TypeError: If func needs floats, e.g. by using the math module
+    """
+    out = np.ravel(np.asarray(func(DualVector(x, columns)), dtype=object))
+    values = np.empty(len(out))
+    block = np.zeros((len(out), width))
+    for row, item in enumerate(out):
+        if isinstance(item, Dual):
+            values[row] = item.value
+            for col, derivative in item.grad.items():
+                block[row, col] = derivative
+        else:
+            values[row] = item
+    return values, block
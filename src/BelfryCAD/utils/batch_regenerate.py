@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+    belfrycad.utils.batch_regenerate
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Headless batch regeneration of document variants.
+
+Takes a .belcad or .belcadx template and a design table of parameter
+overrides, one row per variant, as read from a CSV file.  For each row the
+template is loaded, the row's parameter values applied and every parameter
+re-evaluated, the constraints re-solved, and the variant saved.  Rows run
+across a process pool, with no Qt event loop.
+
+Rows of plain numbers are evaluated up front, all at once, with
+CadExpression.evaluate_table(), and rows with expression cells one at a
+time, so rows whose parameters fail to evaluate are reported without
+spending a process on them.
+
+Run from the command line as:
+
+    python -m BelfryCAD.utils.batch_regenerate template.belcad table.csv outdir
+"""
+
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from ..models.document import Document
+from .cad_expression import CadExpression
+from .xml_serializer import (
+    load_belfrycad_document, load_belfrycad_xml_document,
+    save_belfrycad_document, save_belfrycad_xml_document,
+)
+
+
+OUTPUT_FORMATS = ('.belcad', '.belcadx')
+
+# A variant's constraints converged if every component's solve did, and
+# left its hard residual norm within this.
+RESIDUAL_TOLERANCE = 1e-6
+
+
+@dataclass
+class RegenerationResult:
+    """The outcome of regenerating one row of a design table."""
+    row: int
+    output_path: str
+    success: bool
+    converged: bool = False
+    error: Optional[str] = None
+
+
+def load_document_file(filepath: str) -> Optional[Document]:
+    """Load a .belcadx file as XML, and anything else as a .belcad file."""
+    if filepath.lower().endswith('.belcadx'):
+        return load_belfrycad_xml_document(filepath)
+    return load_belfrycad_document(filepath)
+
+
+def save_document_file(document: Document, filepath: str) -> bool:
+    """Save a document, as XML for .belcadx files, with its own preferences."""
+    if filepath.lower().endswith('.belcadx'):
+        return save_belfrycad_xml_document(document, filepath, document.preferences)
+    return save_belfrycad_document(document, filepath, document.preferences)
+
+
+def read_design_table(filepath: str) -> List[Dict[str, str]]:
+    """Read a CSV design table, with a header row of parameter names."""
+    with open(filepath, newline='', encoding='utf-8') as f:
+        return [
+            {name.strip(): value.strip() for name, value in row.items()
+             if name is not None and value is not None}
+            for row in csv.DictReader(f)
+        ]
+
+
+def regenerate_variant(
+        template_path: str,
+        overrides: Mapping[str, str],
+        output_path: str,
+        row: int = 0,
+) -> RegenerationResult:
+    """
+    Regenerate one variant of a template: apply the parameter overrides,
+    re-evaluate every parameter, re-solve the constraints, and save it.
+
+    Args:
+        template_path: The .belcad or .belcadx template to load
+        overrides: Parameter name to the value it takes in this variant
+        output_path: Where to save the variant, as .belcad or .belcadx
+        row: The design table row, reported in the result
+
+    Returns:
+        The RegenerationResult for the row
+    """
+    try:
+        document = load_document_file(template_path)
+        if document is None:
+            raise RuntimeError(f"Failed to load template {template_path}")
+        cad_expression = document.cad_expression
+        for name, value in overrides.items():
+            if value is None or value == '':
+                continue
+            if name not in cad_expression.expressions:
+                raise ValueError(f"Variable '{name}' not found")
+            cad_expression.set_variable(name, value)
+        for name in cad_expression.expressions:
+            cad_expression.get_variable(name)
+        components = []
+        telemetry = document.constraints_manager.telemetry
+        telemetry.add_listener(components.append)
+        try:
+            document.solve_constraints()
+        finally:
+            telemetry.remove_listener(components.append)
+        converged = all(
+            stats.status in ("converged", "no_free_variables")
+            and stats.residual_norm <= RESIDUAL_TOLERANCE
+            for stats in components)
+        if not save_document_file(document, output_path):
+            raise RuntimeError(f"Failed to save {output_path}")
+    except Exception as e:
+        return RegenerationResult(row, output_path, False, error=str(e))
+    return RegenerationResult(row, output_path, True, converged=converged)
+
+
+def _output_paths(
+        template_path: str,
+        rows: Sequence[Mapping[str, str]],
+        output_dir: str,
+        output_format: str,
+        name_column: str,
+) -> List[str]:
+    """Name each variant from its row's name column, or the template and row number."""
+    stem = os.path.splitext(os.path.basename(template_path))[0]
+    width = len(str(len(rows)))
+    paths = []
+    for index, row in enumerate(rows, start=1):
+        name = row.get(name_column) or f"{stem}_{index:0{width}d}"
+        paths.append(os.path.join(output_dir, name + output_format))
+    return paths
+
+
+def _name_errors(
+        rows: Sequence[Mapping[str, str]],
+        paths: Sequence[str],
+        name_column: str,
+) -> Dict[int, str]:
+    """
+    Get the error for each row whose name isn't a plain file name, or
+    whose variant would be saved over an earlier row's.
+    """
+    separators = {'/', os.sep, os.altsep} - {None}
+    errors = {}
+    seen = {}
+    for index, (row, path) in enumerate(zip(rows, paths)):
+        name = row.get(name_column)
+        if name and (name in ('.', '..')
+                     or any(separator in name for separator in separators)):
+            errors[index] = f"Name '{name}' isn't a plain file name"
+            continue
+        key = os.path.normcase(path)
+        if key in seen:
+            errors[index] = (f"Output {os.path.basename(path)} is already "
+                             f"used by row {seen[key] + 1}")
+            continue
+        seen[key] = index
+    return errors
+
+
+def _is_number(value) -> bool:
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _row_error(template: Document, row: Mapping[str, str]) -> Optional[str]:
+    """Evaluate one row's parameters, and get its error, if any."""
+    cad_expression = CadExpression(dict(template.cad_expression.expressions))
+    for name, value in row.items():
+        if value is None or value == '':
+            continue
+        if name not in cad_expression.expressions:
+            return f"Variable '{name}' not found"
+        cad_expression.set_variable(name, value)
+    for name in cad_expression.expressions:
+        try:
+            value = cad_expression.get_variable(name)
+        except (ArithmeticError, TypeError, ValueError) as e:
+            return f"Parameter '{name}' can't be evaluated: {e}"
+        if not np.isfinite(value):
+            return f"Parameter '{name}' can't be evaluated"
+    return None
+
+
+def _failed_rows(
+        template: Document,
+        rows: Sequence[Mapping[str, str]],
+) -> Dict[int, str]:
+    """
+    Get the error for each row whose parameters can't be evaluated.
+    Rows of plain numbers are evaluated all at once, and rows with
+    expression cells, which evaluate_table() can't take, one at a time.
+    """
+    numeric = []
+    errors = {}
+    for index, row in enumerate(rows):
+        if all(value is None or value == '' or _is_number(value)
+               for value in row.values()):
+            numeric.append(index)
+        else:
+            error = _row_error(template, row)
+            if error is not None:
+                errors[index] = error
+    if not numeric:
+        return errors
+    try:
+        parameters, _ = template.cad_expression.evaluate_table(
+            [rows[index] for index in numeric])
+    except ValueError as e:
+        errors.update((index, str(e)) for index in numeric)
+        return errors
+    for name, values in parameters.items():
+        for position in np.flatnonzero(~np.isfinite(values)):
+            errors.setdefault(numeric[position], f"Parameter '{name}' can't be evaluated")
+    return dict(sorted(errors.items()))
+
+
+def regenerate_batch(
+        template_path: str,
+        rows: Sequence[Mapping[str, str]],
+        output_dir: str,
+        output_format: str = '.belcad',
+        processes: Optional[int] = None,
+        name_column: str = 'name',
+) -> List[RegenerationResult]:
+    """
+    Regenerate a variant of a template for each row of a design table,
+    across a process pool.
+
+    Args:
+        template_path: The .belcad or .belcadx template to load
+        rows: Parameter overrides for each variant, as read_design_table()
+            reads them.  Empty values keep the template's expression.
+        output_dir: The directory to save the variants in, created if needed
+        output_format: '.belcad' or '.belcadx'
+        processes: The number of worker processes, all CPUs if None.
+            With 1, the rows are regenerated in this process.
+        name_column: The column naming each variant's file.  Rows without
+            one are named after the template and their row number.  Rows
+            whose name has a path separator, or repeats an earlier row's
+            output file, fail without being regenerated.
+
+    Returns:
+        A RegenerationResult for each row, in order
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}")
+    template = load_document_file(template_path)
+    if template is None:
+        raise RuntimeError(f"Failed to load template {template_path}")
+    paths = _output_paths(template_path, rows, output_dir, output_format, name_column)
+    name_errors = _name_errors(rows, paths, name_column)
+    rows = [
+        {name: value for name, value in row.items() if name != name_column}
+        for row in rows
+    ]
+    os.makedirs(output_dir, exist_ok=True)
+    errors = {**_failed_rows(template, rows), **name_errors}
+    results: List[Optional[RegenerationResult]] = [
+        RegenerationResult(index, paths[index], False, error=errors[index])
+        if index in errors else None
+        for index in range(len(rows))
+    ]
+    pending = [index for index, result in enumerate(results) if result is None]
+    if processes == 1 or len(pending) <= 1:
+        for index in pending:
+            results[index] = regenerate_variant(
+                template_path, rows[index], paths[index], index)
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {
+                index: pool.submit(
+                    regenerate_variant, template_path, rows[index], paths[index], index)
+                for index in pending
+            }
+            for index, future in futures.items():
+                results[index] = future.result()
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point.  Returns 0 if every row regenerated."""
+    parser = argparse.ArgumentParser(
+        description="Regenerate a BelfryCAD template for each row of a CSV design table.")
+    parser.add_argument('template', help="the .belcad or .belcadx template")
+    parser.add_argument('table', help="CSV file with a header row of parameter names")
+    parser.add_argument('output_dir', help="directory to write the variants to")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='.belcad',
+                        help="output file format (default: .belcad)")
+    parser.add_argument('-j', '--processes', type=int, default=None,
+                        help="number of worker processes (default: all CPUs)")
+    parser.add_argument('--name-column', default='name',
+                        help="CSV column naming each variant's file (default: name)")
+    args = parser.parse_args(argv)
+
+    results = regenerate_batch(
+        args.template, read_design_table(args.table), args.output_dir,
+        output_format=args.format, processes=args.processes,
+        name_column=args.name_column)
+    failures = 0
+    for result in results:
+        if not result.success:
+            failures += 1
+            print(f"Row {result.row + 1}: {result.error}", file=sys.stderr)
+        elif not result.converged:
+            print(f"Row {result.row + 1}: constraints did not converge, "
+                  f"saved {result.output_path}", file=sys.stderr)
+    print(f"Regenerated {len(results) - failures} of {len(results)} variants "
+          f"into {args.output_dir}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
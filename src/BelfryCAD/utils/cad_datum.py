@@ -21,6 +21,11 @@ class CadDatum(numbers.Real):
         if value is not None:
             self.set(value, fixed)
 
+    def invalidate(self):
+        """Forget the value, so it's recalculated from the expression when next used."""
+        if self.expr is not None:
+            self.value = None
+
     def recalculate(self):
         if self.expr is None:
             raise ValueError(f"Cannot evaluate: {self.expr}")
@@ -33,10 +38,12 @@ class CadDatum(numbers.Real):
         if isinstance(arg, (int, float)):
             self.value = float(arg)
             self.fixed = fixed
+            self.cad_expr.untrack_datum(self)
         elif isinstance(arg, str):
             self.value = None
             self.expr = arg
             self.fixed = True
+            self.cad_expr.track_datum(self)
             self.recalculate()
 
     def __repr__(self):
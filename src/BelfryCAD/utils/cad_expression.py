@@ -22,165 +22,147 @@ Supports:
 - With a suffix of ³, the result is cubed
 - With a suffix of ', the result is converted from feet to inches (12x)
 - With a suffix of ", the result is left unchanged (Inches).
+
+Expressions are compiled once into nested closures, which are cached by
+expression string, so re-evaluating an expression skips tokenizing and
+parsing it.
+
+Parameter values are memoized.  Each CadExpression keeps a dependency
+graph of its parameters, so changing one only invalidates the parameters
+downstream of it, and the datums that reference them.
+
+Expressions can also be compiled to evaluate over NumPy arrays, so a whole
+design table of parameter overrides is evaluated in one pass, by
+CadExpression.evaluate_table().
 """
 
 import re
 import math
-from typing import Dict, Union, List, Tuple, Callable, Optional
+import weakref
+from collections import deque
+from functools import lru_cache, reduce
+from typing import (
+    Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional,
+    Sequence, Set, Tuple, Union, TYPE_CHECKING,
+)
 
+import numpy as np
 
-class CadExpression:
-    """
-    A mathematical expression evaluator for CAD calculations.
+if TYPE_CHECKING:
+    from .cad_datum import CadDatum
 
-    Supports:
-    - Basic arithmetic: +, -, *, /, % (modulo)
-    - Exponentiation: ^ or **
-    - Unary operators: +, -
-    - Parentheses for grouping
-    - Variables with values stored in a dictionary, referenced as $name
-    - Proper PEMDAS operation ordering
-    - Float number literals
-    - Constants: e, pi, phi, π (alias for pi), ɸ (alias for phi)
-    - Math functions: sin, cos, tan, asin, acos, atan, atan2, pow, sqrt, exp,
-      log10, log2, ln, abs, sign, floor, ceil, round, min, max, hypot, deg, rad
-    - With a suffix of º or °, the result is converted from degrees to radians
-    - With a suffix of ², the result is squared
-    - With a suffix of ³, the result is cubed
-    - With a suffix of ', the result is converted from feet to inches (12x)
-    - With a suffix of ", the result is left unchanged (Inches).
-    - Parameters store their expressions as strings, not just values.
-    - When a parameter is referenced, its expression is evaluated recursively.
-    - Cycle detection prevents infinite recursion.
+
+# Token patterns, in order of preference, combined into one regex.
+# Tokens named None are skipped.
+_TOKEN_PATTERNS = [
+    ('WHITESPACE', r'\s+'),
+    ('NUMBER', r'(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?'),
+    ('VARIABLE', r'\$[a-zA-Z_][a-zA-Z0-9_]*'),
+    ('IDENT', r'[a-zA-Z_πɸ][a-zA-Z0-9_πɸ]*'),  # function names, constants, π, ɸ
+    ('PLUS', r'\+'),
+    ('MINUS', r'-'),
+    ('POWER', r'\^|\*\*'),
+    ('MULTIPLY', r'\*'),
+    ('DIVIDE', r'/'),
+    ('MODULO', r'%'),
+    ('COMMA', r','),
+    ('LPAREN', r'\('),
+    ('RPAREN', r'\)'),
+    # The degree sign (º, 0xb0) and the masculine ordinal indicator (°, 0xba)
+    # look almost exactly the same, so we accept either.
+    ('DEGREE_SUFFIX', r'º|°'),  # Postfix degree operator
+    ('SQUARE_SUFFIX', r'²'),  # Postfix square operator
+    ('CUBE_SUFFIX', r'³'),  # Postfix cube operator
+    ('FOOT_SUFFIX', r"'"),  # Postfix foot operator
+    ('INCH_SUFFIX', r'"'),  # Postfix inch operator
+]
+_TOKEN_REGEX = re.compile('|'.join(
+    f'(?P<{name}>{pattern})' for name, pattern in _TOKEN_PATTERNS))
+
+# A compiled expression node: takes a function that looks up parameter
+# values by name, and returns the node's value.
+Evaluator = Callable[[Callable[[str], float]], float]
+
+
+def tokenize(expression: str) -> List[Tuple[str, str]]:
+    """Split an expression into (token type, text) pairs."""
+    tokens = []
+    pos = 0
+    end = len(expression)
+    match_token = _TOKEN_REGEX.match
+    while pos < end:
+        match = match_token(expression, pos)
+        if not match:
+            raise ValueError(f"Invalid character at position {pos}: '{expression[pos]}'")
+        if match.lastgroup != 'WHITESPACE':
+            tokens.append((match.lastgroup, match.group()))
+        pos = match.end()
+    return tokens
+
+
+class CompiledExpression:
     """
+    An expression compiled into nested closures, with the names of the
+    parameters it references.  Calling it with a function that looks up
+    parameter values by name evaluates it.
+    """
+    __slots__ = ('source', 'variables', '_evaluate')
 
-    _CONSTANTS = {
-        'e': math.e,
-        'pi': math.pi,
-        'π': math.pi,
-        'phi': (1 + math.sqrt(5)) / 2,
-        'ɸ': (1 + math.sqrt(5)) / 2,
-    }
+    def __init__(self, source: str, evaluate: Evaluator, variables: FrozenSet[str]):
+        self.source = source
+        self.variables = variables
+        self._evaluate = evaluate
 
-    _FUNCTIONS: Dict[str, Callable] = {
-        'sin': math.sin,
-        'cos': math.cos,
-        'tan': math.tan,
-        'asin': math.asin,
-        'acos': math.acos,
-        'atan': math.atan,
-        'atan2': math.atan2,
-        'pow': math.pow,
-        'sqrt': math.sqrt,
-        'exp': math.exp,
-        'log10': math.log10,
-        'log2': math.log2,
-        'ln': math.log,
-        'abs': abs,
-        'sign': lambda x: (x > 0) - (x < 0),
-        'floor': math.floor,
-        'ceil': math.ceil,
-        'round': round,
-        'min': min,
-        'max': max,
-        'hypot': math.hypot,
-        'deg': math.degrees,
-        'rad': math.radians,
-    }
+    def __call__(self, lookup: Callable[[str], float]) -> float:
+        return self._evaluate(lookup)
 
-    def __init__(self, expressions: Optional[Dict[str, str]] = None):
-        self.expressions = expressions or {}  # param name -> expression string
-        self._tokens = []
-        self._current_token_index = 0
-        self._token_cache = {}  # expression string -> token list
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.source!r})"
 
-    def set_variable(self, name: str, expr):
-        """Set a parameter's expression (as a string)."""
-        self.expressions[name] = str(expr)
 
-    def get_variable(self, name: str, _seen=None) -> float:
-        """Evaluate a parameter by recursively evaluating its expression."""
-        if name not in self.expressions:
-            raise ValueError(f"Variable '{name}' not found")
-        if _seen is None:
-            _seen = set()
-        if name in _seen:
-            raise ValueError(f"Cyclic dependency detected in parameter '{name}'")
-        _seen.add(name)
-        expr_str = self.expressions[name]
-        # Save current parsing state
-        old_tokens = self._tokens
-        old_index = self._current_token_index
-        old_seen = getattr(self, '_seen', None)
-        # Evaluate the variable's expression
-        result = self.evaluate(expr_str, _seen=_seen)
-        # Restore parsing state
-        self._tokens = old_tokens
-        self._current_token_index = old_index
-        if old_seen is not None:
-            self._seen = old_seen
-        else:
-            if hasattr(self, '_seen'):
-                delattr(self, '_seen')
-        _seen.remove(name)  # Remove variable from _seen after evaluation
-        return result
+@lru_cache(maxsize=4096)
+def compile_expression(expression: str) -> CompiledExpression:
+    """
+    Compile an expression, or fetch it from the cache.  Syntax errors,
+    unknown functions and unknown identifiers raise ValueError here.
+    """
+    expression = expression.strip()
+    if not expression:
+        raise ValueError("Empty expression")
+    return _Compiler(expression).compile()
 
-    def clear_variables(self):
-        self.expressions.clear()
 
-    def evaluate(self, expression: str, _seen=None) -> float:
-        expression = expression.strip()
-        if not expression:
-            raise ValueError("Empty expression")
-        self._tokens = self._tokenize(expression)
+@lru_cache(maxsize=1024)
+def compile_vectorized(expression: str) -> CompiledExpression:
+    """
+    Compile an expression to evaluate over NumPy arrays of parameter values,
+    one element per row, or fetch it from the cache.  Division or modulo by
+    zero, and functions outside their domain, give NaN in the rows where
+    they happen instead of raising.
+    """
+    expression = expression.strip()
+    if not expression:
+        raise ValueError("Empty expression")
+    return _Compiler(expression, vectorized=True).compile()
+
+
+class _Compiler:
+    """Recursive-descent parser that builds closures instead of values."""
+
+    def __init__(self, expression: str, vectorized: bool = False):
+        self._source = expression
+        self._tokens = tokenize(expression)
         self._current_token_index = 0
-        self._seen = _seen  # For cycle detection in variable evaluation
-        result = self._parse_expression()
+        self._variables = set()
+        self._vectorized = vectorized
+        self._functions = (
+            CadExpression._ARRAY_FUNCTIONS if vectorized else CadExpression._FUNCTIONS)
+
+    def compile(self) -> CompiledExpression:
+        node = self._parse_expression()
         if self._current_token_index < len(self._tokens):
             raise ValueError(f"Unexpected token: {self._tokens[self._current_token_index]}")
-        return result
-
-    def _tokenize(self, expression: str) -> List[Tuple[str, str]]:
-        if expression in self._token_cache:
-            return self._token_cache[expression]
-        patterns = [
-            (r'\s+', None),
-            (r'(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?', 'NUMBER'),
-            (r'\$[a-zA-Z_][a-zA-Z0-9_]*', 'VARIABLE'),
-            (r'[a-zA-Z_πɸ][a-zA-Z0-9_πɸ]*', 'IDENT'),  # function names, constants, π, ɸ
-            (r'\+', 'PLUS'),
-            (r'-', 'MINUS'),
-            (r'\*', 'MULTIPLY'),
-            (r'/', 'DIVIDE'),
-            (r'%', 'MODULO'),
-            (r'(\^|\*\*)', 'POWER'),
-            (r',', 'COMMA'),
-            (r'\(', 'LPAREN'),
-            (r'\)', 'RPAREN'),
-            # The degree sign (º, 0xb0) and the masculine ordinal indicator (°, 0xba)
-            # look almost exactly the same, so we accept either.
-            (r'(º|°)', 'DEGREE_SUFFIX'),  # Postfix degree operator
-            (r'²', 'SQUARE_SUFFIX'),  # Postfix square operator
-            (r'³', 'CUBE_SUFFIX'),  # Postfix cube operator
-            (r"'", 'FOOT_SUFFIX'),  # Postfix foot operator
-            (r'"', 'INCH_SUFFIX'),  # Postfix inch operator
-        ]
-        tokens = []
-        pos = 0
-        while pos < len(expression):
-            match = None
-            for pattern, token_type in patterns:
-                regex = re.compile(pattern)
-                match = regex.match(expression, pos)
-                if match:
-                    if token_type is not None:
-                        tokens.append((token_type, match.group()))
-                    pos = match.end()
-                    break
-            if not match:
-                raise ValueError(f"Invalid character at position {pos}: '{expression[pos]}'")
-        self._token_cache[expression] = tokens
-        return tokens
+        return CompiledExpression(self._source, node, frozenset(self._variables))
 
     def _current_token(self) -> Tuple[str, str]:
         if self._current_token_index >= len(self._tokens):
@@ -197,64 +179,63 @@ class CadExpression:
         self._advance()
         return token_value
 
-    def _parse_expression(self) -> float:
+    def _parse_expression(self) -> Evaluator:
         left = self._parse_term()
         while True:
             token_type, token_value = self._current_token()
             if token_type == 'PLUS':
                 self._advance()
-                left += self._parse_term()
+                left = _add(left, self._parse_term())
             elif token_type == 'MINUS':
                 self._advance()
-                left -= self._parse_term()
+                left = _subtract(left, self._parse_term())
             else:
                 break
         return left
 
-    def _parse_unary_expression(self) -> float:
+    def _parse_unary_expression(self) -> Evaluator:
         token_type, token_value = self._current_token()
         if token_type == 'PLUS':
             self._advance()
             return self._parse_unary_expression()
         elif token_type == 'MINUS':
             self._advance()
-            return -self._parse_unary_expression()
+            operand = self._parse_unary_expression()
+            return lambda lookup: -operand(lookup)
         else:
             return self._parse_power()
 
-    def _parse_term(self) -> float:
+    def _parse_term(self) -> Evaluator:
         left = self._parse_unary_expression()
         while True:
             token_type, token_value = self._current_token()
             if token_type == 'MULTIPLY':
                 self._advance()
-                left *= self._parse_unary_expression()
+                left = _multiply(left, self._parse_unary_expression())
             elif token_type == 'DIVIDE':
                 self._advance()
-                divisor = self._parse_unary_expression()
-                if divisor == 0:
-                    raise ValueError("Division by zero")
-                left /= divisor
+                divide = _divide_rows if self._vectorized else _divide
+                left = divide(left, self._parse_unary_expression())
             elif token_type == 'MODULO':
                 self._advance()
-                divisor = self._parse_unary_expression()
-                if divisor == 0:
-                    raise ValueError("Modulo by zero")
-                left %= divisor
+                modulo = _modulo_rows if self._vectorized else _modulo
+                left = modulo(left, self._parse_unary_expression())
             else:
                 break
         return left
 
-    def _parse_power(self) -> float:
+    def _parse_power(self) -> Evaluator:
         left = self._parse_factor()
         token_type, token_value = self._current_token()
         if token_type == 'POWER':
             self._advance()
             right = self._parse_unary_expression()
-            return left ** right
+            if self._vectorized:
+                return lambda lookup: np.power(left(lookup), right(lookup))
+            return lambda lookup: left(lookup) ** right(lookup)
         return left
 
-    def _parse_factor(self) -> float:
+    def _parse_factor(self) -> Evaluator:
         token_type, token_value = self._current_token()
         if token_type == 'LPAREN':
             self._advance()
@@ -263,14 +244,13 @@ class CadExpression:
             return self._parse_postfix_operators(result)
         elif token_type == 'NUMBER':
             self._advance()
-            result = float(token_value)
-            return self._parse_postfix_operators(result)
+            value = float(token_value)
+            return self._parse_postfix_operators(lambda lookup: value)
         elif token_type == 'VARIABLE':
             self._advance()
             varname = token_value[1:]  # Remove leading $
-            # Recursively evaluate the variable's expression
-            var_result = self.get_variable(varname, _seen=getattr(self, '_seen', None))
-            return self._parse_postfix_operators(var_result)
+            self._variables.add(varname)
+            return self._parse_postfix_operators(lambda lookup: lookup(varname))
         elif token_type == 'IDENT':
             # Could be a constant or a function call
             ident = token_value
@@ -280,22 +260,23 @@ class CadExpression:
                 result = self._parse_function_call(ident)
                 return self._parse_postfix_operators(result)
             # Constant
-            if ident in self._CONSTANTS:
-                result = self._CONSTANTS[ident]
-                return self._parse_postfix_operators(result)
+            if ident in CadExpression._CONSTANTS:
+                value = CadExpression._CONSTANTS[ident]
+                return self._parse_postfix_operators(lambda lookup: value)
             raise ValueError(f"Unknown identifier: {ident}")
         else:
             raise ValueError(f"Unexpected token: {token_type} '{token_value}'")
 
-    def _parse_function_call(self, func_name: str) -> float:
+    def _parse_function_call(self, func_name: str) -> Evaluator:
         self._expect('LPAREN')
         args = []
         # Support zero-argument functions
         if self._current_token()[0] == 'RPAREN':
             self._advance()
-            if func_name not in self._FUNCTIONS:
+            if func_name not in self._functions:
                 raise ValueError(f"Unknown function: {func_name}")
-            return self._FUNCTIONS[func_name]()
+            func = self._functions[func_name]
+            return lambda lookup: func()
         while True:
             args.append(self._parse_expression())
             token_type, _ = self._current_token()
@@ -306,33 +287,538 @@ class CadExpression:
                 break
             else:
                 raise ValueError(f"Expected ',' or ')', got {token_type}")
-        if func_name not in self._FUNCTIONS:
+        if func_name not in self._functions:
             raise ValueError(f"Unknown function: {func_name}")
-        try:
-            return self._FUNCTIONS[func_name](*args)
-        except Exception as e:
-            raise ValueError(f"Error in function '{func_name}': {e}")
+        return _call(func_name, self._functions[func_name], args)
 
-    def _parse_postfix_operators(self, value: float) -> float:
+    def _parse_postfix_operators(self, node: Evaluator) -> Evaluator:
         """Parse postfix operators like º (degree to radian conversion)."""
         token_type, token_value = self._current_token()
         if token_type == 'DEGREE_SUFFIX':
             self._advance()
-            return math.radians(value)
+            radians = np.radians if self._vectorized else math.radians
+            return lambda lookup: radians(node(lookup))
         elif token_type == 'SQUARE_SUFFIX':
             self._advance()
-            return value * value
+            return _power_suffix(node, 2)
         elif token_type == 'CUBE_SUFFIX':
             self._advance()
-            return value * value * value
+            return _power_suffix(node, 3)
         elif token_type == 'FOOT_SUFFIX':
             self._advance()
-            return value * 12.0
+            return lambda lookup: node(lookup) * 12.0
         elif token_type == 'INCH_SUFFIX':
             self._advance()
+        return node
+
+
+def _references(expression: Optional[str]) -> FrozenSet[str]:
+    """Get the parameters an expression references, none if it doesn't compile."""
+    if expression is None:
+        return frozenset()
+    try:
+        return compile_expression(expression).variables
+    except ValueError:
+        return frozenset()
+
+
+class _ParameterDict(dict):
+    """
+    The parameter expressions of a CadExpression, which tells it about
+    every edit, so it can invalidate the values that depend on them.
+    """
+
+    def __init__(self, owner: 'CadExpression', expressions: Dict[str, str]):
+        super().__init__(expressions)
+        self._owner = owner
+
+    def __reduce__(self):
+        return (_ParameterDict, (self._owner, dict(self)))
+
+    def __setitem__(self, name: str, expr: str):
+        old = self.get(name)
+        super().__setitem__(name, expr)
+        if old != expr:
+            self._owner._parameter_edited(name, old)
+
+    def __delitem__(self, name: str):
+        old = self[name]
+        super().__delitem__(name)
+        self._owner._parameter_edited(name, old)
+
+    def pop(self, name: str, *default):
+        if name not in self:
+            return super().pop(name, *default)
+        old = super().pop(name)
+        self._owner._parameter_edited(name, old)
+        return old
+
+    def popitem(self):
+        name, old = super().popitem()
+        self._owner._parameter_edited(name, old)
+        return name, old
+
+    def setdefault(self, name: str, default: Any = None):
+        if name not in self:
+            self[name] = default
+        return self[name]
+
+    def update(self, *args, **kwargs):
+        for name, expr in dict(*args, **kwargs).items():
+            self[name] = expr
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        names = list(self)
+        super().clear()
+        self._owner._parameters_replaced(names)
+
+
+def _add(left: Evaluator, right: Evaluator) -> Evaluator:
+    return lambda lookup: left(lookup) + right(lookup)
+
+
+def _subtract(left: Evaluator, right: Evaluator) -> Evaluator:
+    return lambda lookup: left(lookup) - right(lookup)
+
+
+def _multiply(left: Evaluator, right: Evaluator) -> Evaluator:
+    return lambda lookup: left(lookup) * right(lookup)
+
+
+def _divide(left: Evaluator, right: Evaluator) -> Evaluator:
+    def divide(lookup):
+        dividend = left(lookup)
+        divisor = right(lookup)
+        if divisor == 0:
+            raise ValueError("Division by zero")
+        return dividend / divisor
+    return divide
+
+
+def _modulo(left: Evaluator, right: Evaluator) -> Evaluator:
+    def modulo(lookup):
+        dividend = left(lookup)
+        divisor = right(lookup)
+        if divisor == 0:
+            raise ValueError("Modulo by zero")
+        return dividend % divisor
+    return modulo
+
+
+def _divide_rows(left: Evaluator, right: Evaluator) -> Evaluator:
+    def divide(lookup):
+        dividend = left(lookup)
+        divisor = right(lookup)
+        zero = np.equal(divisor, 0)
+        return np.where(zero, np.nan, np.divide(dividend, np.where(zero, 1.0, divisor)))
+    return divide
+
+
+def _modulo_rows(left: Evaluator, right: Evaluator) -> Evaluator:
+    def modulo(lookup):
+        dividend = left(lookup)
+        divisor = right(lookup)
+        zero = np.equal(divisor, 0)
+        return np.where(zero, np.nan, np.mod(dividend, np.where(zero, 1.0, divisor)))
+    return modulo
+
+
+def _power_suffix(node: Evaluator, power: int) -> Evaluator:
+    def multiply_out(lookup):
+        value = node(lookup)
+        return value * value if power == 2 else value * value * value
+    return multiply_out
+
+
+def _call(func_name: str, func: Callable, args: List[Evaluator]) -> Evaluator:
+    def call(lookup):
+        values = [arg(lookup) for arg in args]
+        try:
+            return func(*values)
+        except Exception as e:
+            raise ValueError(f"Error in function '{func_name}': {e}")
+    return call
+
+
+class CadExpression:
+    """
+    A mathematical expression evaluator for CAD calculations.
+
+    Supports:
+    - Basic arithmetic: +, -, *, /, % (modulo)
+    - Exponentiation: ^ or **
+    - Unary operators: +, -
+    - Parentheses for grouping
+    - Variables with values stored in a dictionary, referenced as $name
+    - Proper PEMDAS operation ordering
+    - Float number literals
+    - Constants: e, pi, phi, π (alias for pi), ɸ (alias for phi)
+    - Math functions: sin, cos, tan, asin, acos, atan, atan2, pow, sqrt, exp,
+      log10, log2, ln, abs, sign, floor, ceil, round, min, max, hypot, deg, rad
+    - With a suffix of º or °, the result is converted from degrees to radians
+    - With a suffix of ², the result is squared
+    - With a suffix of ³, the result is cubed
+    - With a suffix of ', the result is converted from feet to inches (12x)
+    - With a suffix of ", the result is left unchanged (Inches).
+    - Parameters store their expressions as strings, not just values.
+    - When a parameter is referenced, its expression is evaluated recursively.
+    - Cycle detection prevents infinite recursion.
+    - Expressions are compiled once, by compile_expression(), and the
+      compiled forms are cached.
+    - Parameter values are memoized.  Changing a parameter invalidates it
+      and the parameters downstream of it, in topological order, along
+      with the CadDatums referencing them, and tells the listeners.
+    - evaluate_table() evaluates the parameters and datums over many rows
+      of parameter overrides at once, a design table, with NumPy arrays.
+    """
+
+    _CONSTANTS = {
+        'e': math.e,
+        'pi': math.pi,
+        'π': math.pi,
+        'phi': (1 + math.sqrt(5)) / 2,
+        'ɸ': (1 + math.sqrt(5)) / 2,
+    }
+
+    _FUNCTIONS: Dict[str, Callable] = {
+        'sin': math.sin,
+        'cos': math.cos,
+        'tan': math.tan,
+        'asin': math.asin,
+        'acos': math.acos,
+        'atan': math.atan,
+        'atan2': math.atan2,
+        'pow': math.pow,
+        'sqrt': math.sqrt,
+        'exp': math.exp,
+        'log10': math.log10,
+        'log2': math.log2,
+        'ln': math.log,
+        'abs': abs,
+        'sign': lambda x: (x > 0) - (x < 0),
+        'floor': math.floor,
+        'ceil': math.ceil,
+        'round': round,
+        'min': min,
+        'max': max,
+        'hypot': math.hypot,
+        'deg': math.degrees,
+        'rad': math.radians,
+    }
+
+    # The same functions, elementwise over arrays, for compile_vectorized().
+    _ARRAY_FUNCTIONS: Dict[str, Callable] = {
+        'sin': np.sin,
+        'cos': np.cos,
+        'tan': np.tan,
+        'asin': np.arcsin,
+        'acos': np.arccos,
+        'atan': np.arctan,
+        'atan2': np.arctan2,
+        'pow': np.power,
+        'sqrt': np.sqrt,
+        'exp': np.exp,
+        'log10': np.log10,
+        'log2': np.log2,
+        'ln': np.log,
+        'abs': np.abs,
+        'sign': np.sign,
+        'floor': np.floor,
+        'ceil': np.ceil,
+        'round': lambda x, ndigits=0: np.round(x, int(ndigits)),
+        'min': lambda *args: reduce(np.minimum, args),
+        'max': lambda *args: reduce(np.maximum, args),
+        'hypot': lambda *args: reduce(np.hypot, args),
+        'deg': np.degrees,
+        'rad': np.radians,
+    }
+
+    def __init__(self, expressions: Optional[Dict[str, str]] = None):
+        # Memoized parameter values, and the parameters whose expressions
+        # reference each parameter.
+        self._values: Dict[str, float] = {}
+        self._dependents: Dict[str, Set[str]] = {}
+        # Weak references to the datums evaluated against these parameters,
+        # by id, the parameters each references, and the datums referencing
+        # each parameter.  Datums define __eq__ without __hash__, so they
+        # are keyed by id, and forgotten when they are collected.
+        self._datums: Dict[int, 'weakref.ReferenceType[CadDatum]'] = {}
+        self._datum_variables: Dict[int, FrozenSet[str]] = {}
+        self._datum_references: Dict[str, Set[int]] = {}
+        self._listeners: List[Callable[[List[str], List['CadDatum']], None]] = []
+        self.expressions = expressions or {}  # param name -> expression string
+
+    def __getstate__(self):
+        """
+        The weak references to tracked datums can't be pickled, so the
+        datums themselves are, with the parameters they reference, and
+        tracked again when unpickled.  A datum may be unpickled before its
+        own state is, so its expression isn't read then.
+        """
+        datums = []
+        for datum_id, ref in self._datums.items():
+            datum = ref()
+            if datum is not None:
+                datums.append((datum, self._datum_variables[datum_id]))
+        return {
+            'expressions': dict(self._expressions),
+            'datums': datums,
+            'listeners': list(self._listeners),
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state['expressions'])
+        self._listeners = list(state['listeners'])
+        for datum, variables in state['datums']:
+            self._track(datum, variables)
+
+    @property
+    def expressions(self) -> Dict[str, str]:
+        """Parameter expressions by name.  Edits invalidate dependent values."""
+        return self._expressions
+
+    @expressions.setter
+    def expressions(self, expressions: Dict[str, str]):
+        old = dict(getattr(self, '_expressions', {}))
+        self._expressions = _ParameterDict(self, expressions)
+        # Reordering the same parameters changes no values.
+        if old != self._expressions:
+            self._parameters_replaced(old)
+
+    def set_variable(self, name: str, expr):
+        """Set a parameter's expression (as a string)."""
+        self.expressions[name] = str(expr)
+
+    def remove_variable(self, name: str):
+        """Remove a parameter, if it exists."""
+        self.expressions.pop(name, None)
+
+    def get_variable(self, name: str, _seen=None) -> float:
+        """Evaluate a parameter by recursively evaluating its expression."""
+        value = self._values.get(name)
+        if value is not None:
             return value
+        if name not in self.expressions:
+            raise ValueError(f"Variable '{name}' not found")
+        if _seen is None:
+            _seen = set()
+        if name in _seen:
+            raise ValueError(f"Cyclic dependency detected in parameter '{name}'")
+        _seen.add(name)
+        try:
+            value = self.compile(self.expressions[name])(
+                lambda varname: self.get_variable(varname, _seen))
+        finally:
+            _seen.discard(name)
+        self._values[name] = value
         return value
 
+    def clear_variables(self):
+        self.expressions.clear()
+
+    def get_downstream(self, names: Iterable[str]) -> List[str]:
+        """
+        Get the given parameters and every parameter that depends on them,
+        directly or not, in topological order: each parameter comes after
+        the parameters it references.  Parameters in a cycle come last.
+        """
+        affected = []
+        seen = set()
+        queue = deque(name for name in names if not (name in seen or seen.add(name)))
+        while queue:
+            name = queue.popleft()
+            affected.append(name)
+            for dependent in self._dependents.get(name, ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    queue.append(dependent)
+        # Kahn's algorithm, over the edges among the affected parameters.
+        indegree = {name: 0 for name in affected}
+        for name in affected:
+            for dependent in self._dependents.get(name, ()):
+                indegree[dependent] += 1
+        ready = deque(name for name in affected if not indegree[name])
+        ordered = []
+        while ready:
+            name = ready.popleft()
+            ordered.append(name)
+            for dependent in self._dependents.get(name, ()):
+                indegree[dependent] -= 1
+                if not indegree[dependent]:
+                    ready.append(dependent)
+        placed = set(ordered)
+        ordered.extend(name for name in affected if name not in placed)
+        return ordered
+
+    def add_listener(self, listener: Callable[[List[str], List['CadDatum']], None]):
+        """
+        Call listener after each parameter change with the parameters
+        invalidated, in topological order, and the datums referencing them.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[List[str], List['CadDatum']], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def track_datum(self, datum: 'CadDatum'):
+        """Invalidate a datum whenever a parameter its expression references changes."""
+        self.untrack_datum(datum)
+        self._track(datum, _references(datum.expr))
+
+    def _track(self, datum: 'CadDatum', variables: FrozenSet[str]):
+        datum_id = id(datum)
+        owner = weakref.ref(self)
+
+        def collected(ref):
+            expression = owner()
+            if expression is not None and expression._datums.get(datum_id) is ref:
+                expression._forget_datum(datum_id)
+
+        self._datums[datum_id] = weakref.ref(datum, collected)
+        self._datum_variables[datum_id] = variables
+        for name in variables:
+            self._datum_references.setdefault(name, set()).add(datum_id)
+
+    def untrack_datum(self, datum: 'CadDatum'):
+        """Stop invalidating a datum when parameters change."""
+        self._forget_datum(id(datum))
+
+    def _forget_datum(self, datum_id: int):
+        # Dropping the weak reference also cancels its callback.
+        self._datums.pop(datum_id, None)
+        for name in self._datum_variables.pop(datum_id, ()):
+            references = self._datum_references.get(name)
+            if references is not None:
+                references.discard(datum_id)
+                if not references:
+                    del self._datum_references[name]
+
+    def _parameter_edited(self, name: str, old_expr: Optional[str]):
+        """Update the graph for an edit to one parameter, and invalidate downstream."""
+        for varname in _references(old_expr):
+            dependents = self._dependents.get(varname)
+            if dependents is not None:
+                dependents.discard(name)
+                if not dependents:
+                    del self._dependents[varname]
+        for varname in _references(self._expressions.get(name)):
+            self._dependents.setdefault(varname, set()).add(name)
+        self._invalidate([name])
+
+    def _parameters_replaced(self, old_names: Iterable[str]):
+        """Rebuild the graph after the parameters were replaced wholesale."""
+        self._dependents = {}
+        for name, expr in self._expressions.items():
+            for varname in _references(expr):
+                self._dependents.setdefault(varname, set()).add(name)
+        names = list(old_names)
+        known = set(names)
+        names.extend(name for name in self._expressions if name not in known)
+        self._invalidate(names)
+
+    def _invalidate(self, names: Iterable[str]):
+        """Drop the values of parameters downstream of names, and tell the listeners."""
+        affected = self.get_downstream(names)
+        for name in affected:
+            self._values.pop(name, None)
+        datum_ids = set()
+        for name in affected:
+            datum_ids.update(self._datum_references.get(name, ()))
+        datums = []
+        for datum_id in datum_ids:
+            ref = self._datums.get(datum_id)
+            datum = ref() if ref is not None else None
+            if datum is not None:
+                datum.invalidate()
+                datums.append(datum)
+        for listener in list(self._listeners):
+            listener(affected, datums)
+
+    def compile(self, expression: str) -> CompiledExpression:
+        """Get the compiled form of an expression."""
+        return compile_expression(expression)
+
+    def evaluate(self, expression: str, _seen=None) -> float:
+        compiled = self.compile(expression)
+        return compiled(lambda varname: self.get_variable(varname, _seen))
+
+    def evaluate_table(
+            self,
+            rows: Sequence[Mapping[str, Any]],
+            datums: Iterable[Union['CadDatum', str]] = (),
+    ) -> Tuple[Dict[str, np.ndarray], List[np.ndarray]]:
+        """
+        Evaluate a design table: every parameter, and each of the given
+        datums or expression strings, for each of N rows of parameter
+        overrides, all rows at once as NumPy arrays.  A row leaves a
+        parameter's expression in place by omitting it, or giving it as
+        None or an empty string, as a CSV reader would.
+
+        Returns the values of every parameter by name, and the values of
+        each datum in order, as arrays of N floats.  Parameters downstream
+        of no override keep their memoized values.  Errors that don't
+        depend on the row raise ValueError, as evaluate() would, but
+        arithmetic that fails in only some rows gives NaN there.
+        """
+        count = len(rows)
+        overrides: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for index, row in enumerate(rows):
+            for name, value in row.items():
+                if value is None or value == '':
+                    continue
+                if name not in self.expressions:
+                    raise ValueError(f"Variable '{name}' not found")
+                if name not in overrides:
+                    overrides[name] = (np.zeros(count), np.zeros(count, dtype=bool))
+                values, given = overrides[name]
+                values[index] = float(value)
+                given[index] = True
+        varying = set(self.get_downstream(overrides))
+        columns: Dict[str, Any] = {}
+        seen: Set[str] = set()
+
+        def lookup(name: str):
+            value = columns.get(name)
+            if value is not None:
+                return value
+            if name not in varying:
+                value = self.get_variable(name)
+            elif name in overrides and overrides[name][1].all():
+                value = overrides[name][0]
+            else:
+                if name in seen:
+                    raise ValueError(f"Cyclic dependency detected in parameter '{name}'")
+                seen.add(name)
+                try:
+                    value = compile_vectorized(self.expressions[name])(lookup)
+                finally:
+                    seen.discard(name)
+                if name in overrides:
+                    values, given = overrides[name]
+                    value = np.where(given, values, value)
+            columns[name] = value
+            return value
+
+        with np.errstate(all='ignore'):
+            parameters = {
+                name: np.full(count, lookup(name), dtype=float)
+                for name in self.expressions
+            }
+            results = []
+            for datum in datums:
+                expr = datum if isinstance(datum, str) else datum.expr
+                if expr is None:
+                    results.append(np.full(count, float(datum)))
+                else:
+                    value = compile_vectorized(expr)(lookup)
+                    results.append(np.full(count, value, dtype=float))
+        return parameters, results
+
 
 def test_cad_expression():
     """Test the CadExpression class with various expressions."""
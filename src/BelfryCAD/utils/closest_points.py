@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+    belfrycad.utils.closest_points
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Closest-point queries on ellipses and cubic Bezier paths.
+
+    Constraints that attach points to curves find the closest curve point
+    on every residual evaluation, and their finite-difference Jacobians
+    repeat that for each perturbed variable.  Each query is seeded from a
+    table of samples along the curve, which picks the right basin when
+    there is more than one local minimum, and polished with a few
+    safeguarded Newton steps on the curve parameter.  Steps that would
+    move a query away from the curve are rejected and halved, so results
+    are never worse than their seed.  Where the distance isn't convex in
+    the parameter, the steps use the Gauss-Newton curvature instead.
+
+    The array functions answer many queries at once with NumPy.  The
+    scalar ones seed the same way, but take their Newton steps on plain
+    floats, since NumPy's per-call overhead dominates a single query.
+"""
+
+import math
+from typing import Tuple
+
+import numpy as np
+
+# Samples around a whole ellipse, and along each Bezier segment, that
+# seed the Newton steps.
+ELLIPSE_SAMPLES = 32
+BEZIER_SAMPLES = 16
+
+# Most Newton steps after seeding, and the parameter step after which
+# they stop.  Convergence is quadratic from a seed this close, so a
+# handful reach machine precision, as does the step after one this small.
+NEWTON_STEPS = 12
+STEP_TOL = 1e-8
+
+_ELLIPSE_ANGLES = np.linspace(0.0, 2.0 * np.pi, ELLIPSE_SAMPLES, endpoint=False)
+_ELLIPSE_COS = np.cos(_ELLIPSE_ANGLES)
+_ELLIPSE_SIN = np.sin(_ELLIPSE_ANGLES)
+_BEZIER_PARTS = np.linspace(0.0, 1.0, BEZIER_SAMPLES + 1)
+# Largest Newton step on an ellipse: half the spacing of the samples.
+_ELLIPSE_STEP = math.pi / ELLIPSE_SAMPLES
+
+
+def _flatten(x, y) -> Tuple[np.ndarray, np.ndarray, tuple]:
+    """Broadcasts query coordinates together, returning them flat and their shape."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    shape = np.broadcast(x, y).shape
+    return np.broadcast_to(x, shape).ravel(), np.broadcast_to(y, shape).ravel(), shape
+
+
+def _newton_step(slope: float, curve: float, speed: float) -> float:
+    """
+    The Newton step on a parameter, from half the first and second
+    derivatives of the squared distance, falling back on the squared
+    speed along the curve where the second derivative isn't positive.
+    """
+    if curve > 0.0:
+        return slope / curve
+    return slope / speed if speed > 0.0 else 0.0
+
+
+# =========================
+# Ellipses
+# =========================
+def ellipse_closest_angles(major_r: float, minor_r: float, x, y) -> np.ndarray:
+    """
+    Returns the parametric angles t, in radians, of the points
+    (major_r cos t, minor_r sin t) closest to each of the points x, y,
+    given in the frame of an ellipse centered at the origin with its
+    major radius along the x axis.
+
+    Args:
+        major_r: Radius along the x axis
+        minor_r: Radius along the y axis
+        x, y: Arrays of query coordinates
+    """
+    x, y, shape = _flatten(x, y)
+    rows = np.arange(len(x))
+    distances = (major_r * _ELLIPSE_COS - x[:, None]) ** 2 \
+        + (minor_r * _ELLIPSE_SIN - y[:, None]) ** 2
+    best = np.argmin(distances, axis=1)
+    t = _ELLIPSE_ANGLES[best]
+    d = distances[rows, best]
+
+    spread = major_r * major_r - minor_r * minor_r
+    scale = np.ones_like(t)
+    for _ in range(NEWTON_STEPS):
+        cos_t, sin_t = np.cos(t), np.sin(t)
+        # Half the first and second derivatives of the squared distance
+        slope = -spread * sin_t * cos_t + major_r * x * sin_t - minor_r * y * cos_t
+        curve = -spread * (cos_t * cos_t - sin_t * sin_t) \
+            + major_r * x * cos_t + minor_r * y * sin_t
+        speed = (major_r * sin_t) ** 2 + (minor_r * cos_t) ** 2
+        curve = np.where(curve > 0.0, curve, speed)
+        step = scale * np.clip(
+            slope / np.where(curve > 0.0, curve, 1.0), -_ELLIPSE_STEP, _ELLIPSE_STEP)
+        trial = t - step
+        d_trial = (major_r * np.cos(trial) - x) ** 2 + (minor_r * np.sin(trial) - y) ** 2
+        better = d_trial < d
+        t = np.where(better, trial, t)
+        d = np.where(better, d_trial, d)
+        scale = np.where(better, 1.0, 0.5 * scale)
+        if np.all(np.abs(step) < STEP_TOL):
+            break
+    return t.reshape(shape)
+
+
+def ellipse_closest_angle(major_r: float, minor_r: float, x: float, y: float) -> float:
+    """ellipse_closest_angles() for a single query point."""
+    distances = (major_r * _ELLIPSE_COS - x) ** 2 + (minor_r * _ELLIPSE_SIN - y) ** 2
+    best = int(np.argmin(distances))
+    t = float(_ELLIPSE_ANGLES[best])
+    d = float(distances[best])
+
+    spread = major_r * major_r - minor_r * minor_r
+    scale = 1.0
+    for _ in range(NEWTON_STEPS):
+        cos_t, sin_t = math.cos(t), math.sin(t)
+        step = scale * max(-_ELLIPSE_STEP, min(_newton_step(
+            -spread * sin_t * cos_t + major_r * x * sin_t - minor_r * y * cos_t,
+            -spread * (cos_t * cos_t - sin_t * sin_t)
+            + major_r * x * cos_t + minor_r * y * sin_t,
+            (major_r * sin_t) ** 2 + (minor_r * cos_t) ** 2), _ELLIPSE_STEP))
+        trial = t - step
+        d_trial = (major_r * math.cos(trial) - x) ** 2 + (minor_r * math.sin(trial) - y) ** 2
+        if d_trial < d:
+            t, d, scale = trial, d_trial, 1.0
+        else:
+            scale *= 0.5
+        if abs(step) < STEP_TOL:
+            break
+    return t
+
+
+# =========================
+# Bezier paths
+# =========================
+def _bezier_coefficients(control) -> Tuple[np.ndarray, ...]:
+    """
+    Power basis coefficients of each segment of a cubic Bezier path, as
+    (n, 2) arrays c0 to c3 with B(u) = c0 + c1 u + c2 u^2 + c3 u^3.
+    """
+    control = np.asarray(control, dtype=float)
+    segs = (len(control) - 1) // 3
+    p0 = control[0:3 * segs:3]
+    p1 = control[1:3 * segs:3]
+    p2 = control[2:3 * segs:3]
+    p3 = control[3:3 * segs + 1:3]
+    return p0, 3.0 * (p1 - p0), 3.0 * (p0 - 2.0 * p1 + p2), p3 - p0 + 3.0 * (p1 - p2)
+
+
+def _bezier_table(coefficients) -> np.ndarray:
+    """Points at the sample parameters of every segment, as a flat (k, 2) array."""
+    c0, c1, c2, c3 = (c[:, None] for c in coefficients)
+    u = _BEZIER_PARTS[None, :, None]
+    return (c0 + u * (c1 + u * (c2 + u * c3))).reshape(-1, 2)
+
+
+def bezier_closest_parts(control, x, y) -> np.ndarray:
+    """
+    Returns the parameters, from 0 to 1 along the whole path, of the
+    points of a cubic Bezier path closest to each of the points x, y.
+    Parameters are spread evenly over the segments, as in
+    ConstrainableBezierPath.path_point().
+
+    Args:
+        control: The path's control points, as an (3 n + 1, 2) array
+            for n segments
+        x, y: Arrays of query coordinates
+    """
+    x, y, shape = _flatten(x, y)
+    coefficients = _bezier_coefficients(control)
+    segs = len(coefficients[0])
+    rows = np.arange(len(x))
+    table = _bezier_table(coefficients)
+    distances = (table[:, 0] - x[:, None]) ** 2 + (table[:, 1] - y[:, None]) ** 2
+    best = np.argmin(distances, axis=1)
+    seg, sample = np.divmod(best, BEZIER_SAMPLES + 1)
+    u = _BEZIER_PARTS[sample]
+    d = distances[rows, best]
+
+    queries = np.column_stack([x, y])
+    a0, a1, a2, a3 = (c[seg] for c in coefficients)
+    scale = np.ones_like(u)
+    for _ in range(NEWTON_STEPS):
+        w = u[:, None]
+        offset = a0 + w * (a1 + w * (a2 + w * a3)) - queries
+        tangent = a1 + w * (2.0 * a2 + 3.0 * w * a3)
+        bend = 2.0 * a2 + 6.0 * w * a3
+        # Half the first and second derivatives of the squared distance
+        slope = (offset * tangent).sum(axis=1)
+        speed = (tangent * tangent).sum(axis=1)
+        curve = speed + (offset * bend).sum(axis=1)
+        curve = np.where(curve > 0.0, curve, speed)
+        step = scale * slope / np.where(curve > 0.0, curve, 1.0)
+        trial = np.clip(u - step, 0.0, 1.0)
+        w = trial[:, None]
+        d_trial = ((a0 + w * (a1 + w * (a2 + w * a3)) - queries) ** 2).sum(axis=1)
+        better = d_trial < d
+        moved = np.abs(trial - u)
+        u = np.where(better, trial, u)
+        d = np.where(better, d_trial, d)
+        scale = np.where(better, 1.0, 0.5 * scale)
+        # Queries held at an end of the path don't move.
+        if np.all(moved < STEP_TOL):
+            break
+    return ((seg + u) / segs).reshape(shape)
+
+
+def bezier_closest_part(control, x: float, y: float) -> float:
+    """bezier_closest_parts() for a single query point."""
+    coefficients = _bezier_coefficients(control)
+    segs = len(coefficients[0])
+    table = _bezier_table(coefficients)
+    distances = (table[:, 0] - x) ** 2 + (table[:, 1] - y) ** 2
+    best = int(np.argmin(distances))
+    seg, sample = divmod(best, BEZIER_SAMPLES + 1)
+    u = float(_BEZIER_PARTS[sample])
+    d = float(distances[best])
+
+    (a0x, a0y), (a1x, a1y), (a2x, a2y), (a3x, a3y) = (
+        c[seg].tolist() for c in coefficients)
+    scale = 1.0
+    for _ in range(NEWTON_STEPS):
+        ox = a0x + u * (a1x + u * (a2x + u * a3x)) - x
+        oy = a0y + u * (a1y + u * (a2y + u * a3y)) - y
+        tx = a1x + u * (2.0 * a2x + 3.0 * u * a3x)
+        ty = a1y + u * (2.0 * a2y + 3.0 * u * a3y)
+        bx = 2.0 * a2x + 6.0 * u * a3x
+        by = 2.0 * a2y + 6.0 * u * a3y
+        speed = tx * tx + ty * ty
+        step = scale * _newton_step(ox * tx + oy * ty, speed + ox * bx + oy * by, speed)
+        trial = max(0.0, min(u - step, 1.0))
+        d_trial = (a0x + trial * (a1x + trial * (a2x + trial * a3x)) - x) ** 2 \
+            + (a0y + trial * (a1y + trial * (a2y + trial * a3y)) - y) ** 2
+        moved = abs(trial - u)
+        if d_trial < d:
+            u, d, scale = trial, d_trial, 1.0
+        else:
+            scale *= 0.5
+        if moved < STEP_TOL:
+            break
+    return (seg + u) / segs
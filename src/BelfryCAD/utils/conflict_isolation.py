@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+    belfrycad.utils.conflict_isolation
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Minimal conflicting constraint sets.
+
+    After a failed solve, the constraints left with large residuals are
+    usually far more than the ones actually in conflict, since the solver
+    spreads the error around.  QuickXplain (Junker, 2004) finds a minimal
+    infeasible subset instead, by solving subsets of the constraints: it
+    splits the candidates in halves, and keeps only the halves needed to
+    stay infeasible.  A conflict of k constraints out of n takes about
+    2k log2(n / k) subset solves.
+
+    Each subset solve is warm-started from the solution of the feasible
+    subset it overlaps most, and results are memoized: subsets of a
+    feasible set are feasible, and supersets of an infeasible set are
+    infeasible, without solving.  Subsets are only judged feasible if a
+    solve reaches the tolerance, so a solver stuck in a local minimum can
+    make a conflict larger than minimal, but never a wrong one.
+"""
+
+import time
+from typing import FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class ConflictIsolator:
+    """
+    Finds a minimal infeasible subset of a solver's constraints.
+
+    Attributes:
+        solves: Number of subset solves run so far
+        elapsed: Seconds spent in find() so far
+    """
+    def __init__(self, solver, variable_indices: Optional[Sequence[int]] = None,
+                 tol: float = 1e-6, max_iter: int = 200):
+        """
+        Args:
+            solver: The ConstraintSolver whose constraints conflict.  Its
+                variables are left as they were.
+            variable_indices: The variables the constraints may move, or
+                None for every free variable
+            tol: Largest hard residual norm of a feasible subset
+            max_iter: Gauss-Newton iterations per subset solve
+        """
+        self.solver = solver
+        if variable_indices is None:
+            variable_indices = solver.get_free_indices()
+        self.variable_indices = sorted(variable_indices)
+        self.tol = tol
+        self.max_iter = max_iter
+        self.solves = 0
+        self.elapsed = 0.0
+        self._feasible: List[Tuple[FrozenSet[int], List[float]]] = []
+        self._infeasible: List[FrozenSet[int]] = []
+        self._start: List[float] = []
+
+    def find(self, order: Optional[Sequence[int]] = None) -> List[str]:
+        """
+        Returns the labels of a minimal infeasible subset of the
+        constraints, in the solver's order, or [] if they're feasible.
+        Removing any one of the returned constraints makes the rest of
+        the subset solvable.
+
+        Args:
+            order: Constraint positions, most suspicious first.  Among
+                several conflicts, QuickXplain returns the one made of the
+                earliest constraints in this order.  Defaults to the
+                solver's order.
+        """
+        start = time.perf_counter()
+        solver = self.solver
+        saved = list(solver.variables)
+        self._start = [saved[i] for i in self.variable_indices]
+        try:
+            candidates = list(order) if order is not None else list(
+                range(len(solver.constraints)))
+            if not candidates or self._is_feasible(frozenset(candidates)):
+                return []
+            conflict = self._quickxplain(frozenset(), False, candidates)
+        finally:
+            solver.variables[:] = saved
+            self.elapsed += time.perf_counter() - start
+        return [solver.constraint_labels[i] for i in sorted(conflict)]
+
+    def _quickxplain(self, background: FrozenSet[int], added: bool,
+                     candidates: List[int]) -> List[int]:
+        """
+        Returns a minimal subset of candidates that is infeasible together
+        with background.  added is True if background just grew, and so
+        may be infeasible by itself.
+        """
+        if added and not self._is_feasible(background):
+            return []
+        if len(candidates) == 1:
+            return candidates
+        half = len(candidates) // 2
+        first, second = candidates[:half], candidates[half:]
+        needed2 = self._quickxplain(background | frozenset(first), True, second)
+        needed1 = self._quickxplain(
+            background | frozenset(needed2), bool(needed2), first)
+        return needed1 + needed2
+
+    def _is_feasible(self, positions: FrozenSet[int]) -> bool:
+        for infeasible in self._infeasible:
+            if infeasible <= positions:
+                return False
+        for feasible, _ in self._feasible:
+            if positions <= feasible:
+                return True
+
+        solver = self.solver
+        ordered = sorted(positions)
+        subproblem = solver.make_subproblem(
+            [solver.constraints[i] for i in ordered],
+            [solver.constraint_labels[i] for i in ordered])
+        # Each subset is solved once, so compiling it wouldn't pay off.
+        subproblem.compile_systems = False
+        # A warm start can sit on a singular configuration, such as a line
+        # exactly horizontal when it must turn vertical, so infeasible
+        # results are checked again from the original values.
+        starts = [self._warm_start(positions)]
+        if starts[0] is not self._start:
+            starts.append(self._start)
+        for values in starts:
+            for index, value in zip(self.variable_indices, values):
+                solver.variables[index] = value
+            subproblem.gauss_newton_solve(
+                max_iter=self.max_iter, tol=self.tol * 1e-2,
+                variable_indices=self.variable_indices)
+            self.solves += 1
+            if subproblem.residual_norm <= self.tol:
+                solution = [solver.variables[i] for i in self.variable_indices]
+                self._feasible.append((positions, solution))
+                return True
+        self._infeasible.append(positions)
+        return False
+
+    def _warm_start(self, positions: FrozenSet[int]) -> List[float]:
+        """The solution of the known feasible set sharing the most constraints."""
+        best, best_overlap = self._start, -1
+        for feasible, solution in self._feasible:
+            overlap = len(feasible & positions)
+            if overlap > best_overlap:
+                best, best_overlap = solution, overlap
+        return best
+
+
+def find_minimal_conflict(solver, variable_indices: Optional[Sequence[int]] = None,
+                          tol: float = 1e-6, max_iter: int = 200) -> List[str]:
+    """
+    Returns the labels of a minimal infeasible subset of a solver's
+    constraints, or [] if they can all be satisfied.  Constraints with
+    the largest residuals at the current variables are tried first, so
+    they're preferred in the result.
+    """
+    system = solver._get_system(solver.get_free_indices(variable_indices))
+    x = system.gather(solver.variables)
+    residuals = np.abs(system.residuals(x))
+    size = [
+        float(residuals[row:row + count].sum())
+        for row, count in system.term_rows[:len(solver.constraints)]
+    ]
+    order = sorted(range(len(size)), key=lambda position: -size[position])
+    return ConflictIsolator(solver, variable_indices, tol, max_iter).find(order)
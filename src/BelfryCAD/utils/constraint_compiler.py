@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+    belfrycad.utils.constraint_compiler
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Compiles a SparseConstraintSystem into one generated Python function.
+
+    Evaluating a system normally walks its kernel groups and per-constraint
+    entries, unpacking tables and checking weights, duplicates and fixed
+    columns on every call, and evaluates every batch kernel twice per
+    solver iteration: once for the residuals and once for the Jacobian.
+    For a fixed topology all of those decisions are known in advance, so
+    the compiler emits straight-line code for them instead, and the code
+    of identical topologies is compiled only once.  The generated
+    function gathers every kernel's variables with a single fancy index,
+    calls each kernel once for both its residuals and its Jacobian, and
+    writes them out with the weights, masks and CSR positions baked in as
+    constants.
+
+    Constraints without a batch kernel, and plain callables, still go
+    through their residual() and jacobian_block() methods, one by one.
+    Those methods remain the reference implementation for every class.
+"""
+
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+@lru_cache(maxsize=64)
+def _compile_source(source: str):
+    """Compiles generated source, reusing the code of identical topologies."""
+    return compile(source, "<compiled constraints>", "exec")
+
+
+class CompiledSystem:
+    """
+    A generated evaluator for one SparseConstraintSystem.
+
+    Calling it with the full variable vector returns (residuals, data),
+    where data holds the Jacobian values in the system's CSR order, or is
+    None if jacobian is False.
+
+    Attributes:
+        source: The generated Python source
+    """
+    def __init__(self, source: str, namespace: Dict[str, object]):
+        self.source = source
+        exec(_compile_source(source), namespace)
+        self._evaluate: Callable = namespace["evaluate"]
+
+    def __call__(self, x, jacobian: bool = True) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        return self._evaluate(x, jacobian)
+
+
+class _Emitter:
+    """Accumulates generated lines, and the constants they refer to."""
+    def __init__(self):
+        self.lines: List[str] = ["def evaluate(x, jacobian=True):"]
+        self.namespace: Dict[str, object] = {"np": np}
+
+    def constant(self, name: str, value) -> str:
+        self.namespace[name] = value
+        return name
+
+    def emit(self, line: str, indent: int = 1):
+        self.lines.append("    " * indent + line)
+
+
+def compile_system(system) -> CompiledSystem:
+    """
+    Generates the evaluator for a SparseConstraintSystem.
+
+    Args:
+        system: The system to compile.  Its kernel parameter arrays are
+            referenced, not copied, so refresh_parameters() still applies.
+
+    Returns:
+        The compiled evaluator
+    """
+    out = _Emitter()
+    nnz = len(system.indices)
+    out.emit(f"out = np.empty({system.num_rows})")
+    out.emit(f"data = np.empty({nnz}) if jacobian else None")
+
+    if system.entries:
+        _emit_entries(out, system)
+
+    if system.groups:
+        tables = [table.ravel() for _, table, *_ in system.groups]
+        out.emit(f"xs = x[{out.constant('GATHER', np.concatenate(tables))}]")
+        start = 0
+        for position, group in enumerate(system.groups):
+            start = _emit_group(out, position, group, start)
+
+    out.emit("return out, data")
+    return CompiledSystem("\n".join(out.lines) + "\n", out.namespace)
+
+
+def _emit_entries(out: _Emitter, system):
+    """
+    Emits a loop over the constraints evaluated through their own
+    methods, with their methods, row slices and masks looked up in
+    advance.  Their code is not specialized any further, so they share
+    one loop rather than unrolling, which keeps compiling fast.
+    """
+    entries = []
+    for term, weight, row, count, cols, keep in system.entries:
+        if system._is_analytic(term):
+            residual = term.residual
+            block = _method_block(term.jacobian_block)
+        else:
+            residual = term
+            block = _callable_block(
+                type(system.solver)._autodiff_jacobian_columns,
+                term, cols, system.free_columns)
+        span = slice(int(system.indptr[row]), int(system.indptr[row + count]))
+        keep = slice(None) if np.all(keep) else np.asarray(keep)
+        entries.append((residual, block, slice(row, row + count), span, keep, weight))
+    name = out.constant("ENTRIES", tuple(entries))
+    out.emit(f"for residual, block, rows, span, keep, weight in {name}:")
+    out.emit("out[rows] = np.asarray(residual(x), dtype=float) * weight", 2)
+    out.emit("if jacobian and span.start != span.stop:", 2)
+    out.emit(
+        "data[span] = (np.asarray(block(x), dtype=float)[:, keep] * weight).ravel()", 3)
+
+
+def _method_block(jacobian_block: Callable) -> Callable:
+    return lambda x: jacobian_block(x)[0]
+
+
+def _callable_block(differentiate: Callable, func: Callable, cols, columns) -> Callable:
+    return lambda x: differentiate(func, x, cols, columns)
+
+
+def _emit_group(out: _Emitter, position: int, group: tuple, start: int) -> int:
+    """
+    Emits one batch kernel call for a group of constraints, reading its
+    variables from xs at start.  Returns where the next group's variables begin.
+    """
+    kernel, table, params, weights, rows, keep, dest, duplicates = group
+    members, width = table.shape
+    end = start + members * width
+    name = out.constant(f"KERNEL{position}", kernel.batch_evaluate)
+    params = out.constant(f"PARAMS{position}", params)
+    out.emit(f"# {kernel.__name__} x {members}")
+    out.emit(f"R, J = {name}(xs[{start}:{end}].reshape({members}, {width}), {params})")
+
+    rows_index = _index(out, f"ROWS{position}", rows)
+    unit = bool(np.all(weights == 1.0))
+    if unit:
+        out.emit(f"out[{rows_index}] = np.ravel(R)")
+    else:
+        w = out.constant(f"WEIGHTS{position}", weights[:, None])
+        out.emit(f"out[{rows_index}] = np.ravel(R * {w})")
+
+    if not dest.size:
+        return end
+    out.emit("if jacobian:")
+    if bool(np.all(keep)):
+        values = "np.ravel(J)"
+    else:
+        values = f"J[{out.constant(f'KEEP{position}', keep)}]"
+    if not unit:
+        scale = np.broadcast_to(weights[:, None, None], keep.shape)[keep]
+        values += f" * {out.constant(f'JWEIGHTS{position}', scale)}"
+    dest_index = _index(out, f"DEST{position}", dest)
+    if duplicates:
+        # Shared variables within a constraint sum into one entry.
+        out.emit(f"data[{dest_index}] = 0.0", 2)
+        out.emit(f"np.add.at(data, {dest_index}, {values})", 2)
+    else:
+        out.emit(f"data[{dest_index}] = {values}", 2)
+    return end
+
+
+def _index(out: _Emitter, name: str, positions) -> str:
+    """
+    Returns the code for indexing a flat array at positions: a slice if
+    they are consecutive, else a constant index array.
+    """
+    positions = np.ravel(positions)
+    if positions.size and np.array_equal(
+            positions, np.arange(positions[0], positions[0] + positions.size)):
+        return f"{int(positions[0])}:{int(positions[0]) + positions.size}"
+    return out.constant(name, positions)
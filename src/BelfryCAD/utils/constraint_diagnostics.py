@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+    belfrycad.utils.constraint_diagnostics
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Degree-of-freedom analysis from the numerical rank of a solved
+    constraint Jacobian.
+
+    Counting residuals against free variables gets redundant constraints
+    wrong: two coincident constraints on the same points add four rows,
+    but only remove two degrees of freedom.  The rank of the Jacobian at
+    the solution counts only the independent rows.  Its null space gives
+    the motions still free, and so the degrees of freedom left to each
+    object.
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+from scipy import linalg, sparse
+
+
+# Singular values below this, relative to the largest, count as zero.
+RANK_RTOL = 1e-8
+
+# Jacobians with more free columns than this are too costly to factor
+# densely, and fall back to counting rows.
+RANK_ANALYSIS_LIMIT = 2000
+
+
+class ConstraintDiagnostics:
+    """
+    The result of a rank analysis.
+
+    Attributes:
+        num_rows: Number of hard residual rows
+        num_free: Number of free variables
+        rank: Numerical rank of the Jacobian
+        dof: Degrees of freedom left, num_free - rank
+        redundant_rows: Rows dependent on the other rows
+        exact: False if the Jacobian was too large to factor, and rank
+            is only the row count bound
+    """
+    def __init__(self, num_rows: int, num_free: int, rank: int,
+                 redundant_rows: List[int],
+                 null_space: Optional[np.ndarray] = None):
+        self.num_rows = num_rows
+        self.num_free = num_free
+        self.rank = rank
+        self.dof = num_free - rank
+        self.redundant_rows = redundant_rows
+        self.exact = null_space is not None
+        self._null_space = null_space
+
+    def columns_dof(self, columns: Sequence[int]) -> Optional[int]:
+        """
+        Returns the degrees of freedom left to a set of columns, such as
+        the free variables of one object: the number of independent ways
+        they can still move.  None if the analysis wasn't exact.
+        """
+        if self._null_space is None:
+            return None
+        columns = list(columns)
+        if not columns or not self._null_space.shape[1]:
+            return 0
+        return _rank(self._null_space[columns, :])
+
+    def __repr__(self) -> str:
+        return (f"ConstraintDiagnostics(rank={self.rank}, dof={self.dof}, "
+                f"redundant={len(self.redundant_rows)})")
+
+
+def _rank(matrix: np.ndarray) -> int:
+    if not matrix.size:
+        return 0
+    values = linalg.svd(matrix, compute_uv=False)
+    if not values[0]:
+        return 0
+    return int(np.sum(values > RANK_RTOL * max(matrix.shape) * values[0]))
+
+
+def analyze_jacobian(jacobian) -> ConstraintDiagnostics:
+    """
+    Finds the numerical rank, null space and redundant rows of a
+    constraint Jacobian, dense or sparse.
+
+    The rank and null space come from an SVD.  Redundant rows come from a
+    rank-revealing (column-pivoted) QR of the transpose: the pivots pick
+    a maximal independent set of rows, and the rest are redundant.
+    """
+    num_rows, num_free = jacobian.shape
+    if num_free > RANK_ANALYSIS_LIMIT:
+        rank = min(num_rows, num_free)
+        return ConstraintDiagnostics(num_rows, num_free, rank, [])
+    if sparse.issparse(jacobian):
+        jacobian = jacobian.toarray()
+    jacobian = np.asarray(jacobian, dtype=float)
+    if not num_rows or not num_free:
+        return ConstraintDiagnostics(
+            num_rows, num_free, 0, list(range(num_rows)), np.identity(num_free))
+
+    _, values, vt = linalg.svd(jacobian)
+    rank = 0
+    if values[0]:
+        rank = int(np.sum(values > RANK_RTOL * max(num_rows, num_free) * values[0]))
+    null_space = vt[rank:].T
+
+    _, _, pivots = linalg.qr(jacobian.T, mode='economic', pivoting=True)
+    redundant_rows = sorted(int(row) for row in pivots[rank:])
+    return ConstraintDiagnostics(num_rows, num_free, rank, redundant_rows, null_space)
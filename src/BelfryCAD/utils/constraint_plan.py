@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+    belfrycad.utils.constraint_plan
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Decomposition of a connected constraint component into clusters,
+    and a plan giving the order to solve them in.
+
+    Clusters are the biconnected components (blocks) of the graph whose
+    nodes are objects and whose edges are constraints between two
+    objects.  Blocks only share articulation objects, so once a block is
+    solved its shared objects can be held fixed while the blocks hanging
+    off them are solved.  Blocks with the fewest remaining degrees of
+    freedom are solved first, so rigid pieces place the floppier ones.
+"""
+
+import heapq
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+
+
+class ConstraintCluster:
+    """
+    One step of a solving plan.
+
+    Attributes:
+        objects: The objects in the cluster
+        shared: The objects already placed by earlier clusters, which are
+            held fixed while this cluster is solved
+        constraint_ids: The constraints solved in this step
+        dof: Free variables of the unplaced objects, minus the residual
+            rows of the constraints
+    """
+    def __init__(self, objects: Set[str], shared: Set[str],
+                 constraint_ids: List[str], dof: int):
+        self.objects = objects
+        self.shared = shared
+        self.constraint_ids = constraint_ids
+        self.dof = dof
+
+    def __repr__(self) -> str:
+        return (f"ConstraintCluster(objects={len(self.objects)}, "
+                f"shared={len(self.shared)}, "
+                f"constraints={len(self.constraint_ids)}, dof={self.dof})")
+
+
+def biconnected_components(
+        adjacency: Mapping[Hashable, Iterable[Hashable]]
+) -> List[List[Tuple[Hashable, Hashable]]]:
+    """
+    Finds the biconnected components of an undirected simple graph, with
+    an iterative version of Tarjan's algorithm.
+
+    Args:
+        adjacency: Neighbors of each node.  Must be symmetric, and have
+            no self-loops.
+
+    Returns:
+        The edges of each biconnected component.  Nodes without edges
+        are not part of any component.
+    """
+    index: Dict[Hashable, int] = {}
+    low: Dict[Hashable, int] = {}
+    blocks = []
+    for root in adjacency:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack = [(root, None, iter(adjacency[root]))]
+        edges = []
+        while stack:
+            node, parent, neighbors = stack[-1]
+            descended = False
+            for neighbor in neighbors:
+                if neighbor == parent:
+                    continue
+                if neighbor not in index:
+                    index[neighbor] = low[neighbor] = len(index)
+                    edges.append((node, neighbor))
+                    stack.append((neighbor, node, iter(adjacency[neighbor])))
+                    descended = True
+                    break
+                if index[neighbor] < index[node]:
+                    low[node] = min(low[node], index[neighbor])
+                    edges.append((node, neighbor))
+            if descended:
+                continue
+            stack.pop()
+            if not stack:
+                continue
+            parent = stack[-1][0]
+            low[parent] = min(low[parent], low[node])
+            if low[node] >= index[parent]:
+                # parent separates node's subtree, closing off a block.
+                block = []
+                while True:
+                    edge = edges.pop()
+                    block.append(edge)
+                    if edge == (parent, node):
+                        break
+                blocks.append(block)
+    return blocks
+
+
+def plan_component(
+        constraint_pairs: Mapping[str, Tuple[str, Optional[str]]],
+        object_dof: Mapping[str, int],
+        constraint_rows: Mapping[str, int]
+) -> List[ConstraintCluster]:
+    """
+    Splits a connected constraint component into clusters, in the order
+    they should be solved.
+
+    Args:
+        constraint_pairs: The (object_id1, object_id2) of each constraint
+            in the component.  object_id2 is None, or equal to object_id1,
+            for single-object constraints.
+        object_dof: Free variable count of each object in the component
+        constraint_rows: Residual row count of each constraint
+
+    Returns:
+        The clusters, in solving order.  Every constraint appears in
+        exactly one cluster.
+    """
+    adjacency: Dict[str, Set[str]] = {object_id: set() for object_id in object_dof}
+    pair_constraints: Dict[frozenset, List[str]] = {}
+    object_constraints: Dict[str, List[str]] = {}
+    for constraint_id, (object_id1, object_id2) in constraint_pairs.items():
+        if object_id2 is None or object_id2 == object_id1:
+            object_constraints.setdefault(object_id1, []).append(constraint_id)
+            continue
+        adjacency[object_id1].add(object_id2)
+        adjacency[object_id2].add(object_id1)
+        pair_constraints.setdefault(frozenset((object_id1, object_id2)), []).append(constraint_id)
+
+    block_objects: List[Set[str]] = []
+    block_constraints: List[List[str]] = []
+    for edges in biconnected_components(adjacency):
+        objects = set()
+        constraint_ids = []
+        for edge in edges:
+            objects.update(edge)
+            constraint_ids.extend(pair_constraints[frozenset(edge)])
+        block_objects.append(objects)
+        block_constraints.append(constraint_ids)
+    for object_id, neighbors in adjacency.items():
+        if not neighbors:
+            block_objects.append({object_id})
+            block_constraints.append([])
+
+    object_blocks: Dict[str, List[int]] = {}
+    for block, objects in enumerate(block_objects):
+        for object_id in objects:
+            object_blocks.setdefault(object_id, []).append(block)
+
+    placed: Set[str] = set()
+
+    def block_dof(block: int) -> int:
+        dof = 0
+        for object_id in block_objects[block] - placed:
+            dof += object_dof[object_id]
+            dof -= sum(constraint_rows[cid] for cid in object_constraints.get(object_id, ()))
+        dof -= sum(constraint_rows[cid] for cid in block_constraints[block])
+        return dof
+
+    # Start from the most rigid block, then grow from what is placed,
+    # always taking the most rigid block that touches it.
+    start = min(range(len(block_objects)), key=lambda b: (block_dof(b), b))
+    frontier = [(block_dof(start), start)]
+    done: Set[int] = set()
+    plan = []
+    while frontier:
+        dof, block = heapq.heappop(frontier)
+        if block in done:
+            continue
+        current = block_dof(block)
+        if current != dof:
+            heapq.heappush(frontier, (current, block))
+            continue
+        done.add(block)
+        objects = block_objects[block]
+        new_objects = objects - placed
+        constraint_ids = list(block_constraints[block])
+        for object_id in sorted(new_objects):
+            constraint_ids.extend(object_constraints.get(object_id, ()))
+        plan.append(ConstraintCluster(set(objects), objects & placed, constraint_ids, dof))
+        placed.update(new_objects)
+        for object_id in new_objects:
+            for neighbor in object_blocks[object_id]:
+                if neighbor not in done:
+                    heapq.heappush(frontier, (block_dof(neighbor), neighbor))
+    return plan
@@ -6,23 +6,124 @@
     Constraints module.
 """
 
+import io
 import math
+import operator
+import pickle
+import time
 import numpy as np
+from scipy import sparse
 from scipy.optimize import least_squares
-from typing import List, Tuple, Dict, Optional, Sequence
+from scipy.sparse.linalg import spsolve
+from typing import Any, Callable, List, Tuple, Dict, Optional, Sequence
+
+from .autodiff import jacobian_columns
+from .closest_points import (
+    bezier_closest_part, bezier_closest_parts, ellipse_closest_angle,
+    ellipse_closest_angles,
+)
+from .constraint_compiler import CompiledSystem, compile_system
+from .constraint_diagnostics import ConstraintDiagnostics, analyze_jacobian
+from .solver_telemetry import SolveStats
+
+
+# Residual functions (by code object) that automatic differentiation
+# can't handle, and that get finite-difference Jacobians instead.
+_NUMERIC_JACOBIAN_CODE = set()
+
+# Problems with more free variables than this are solved with sparse
+# linear algebra; smaller ones use dense solves, which are faster there.
+SPARSE_SOLVE_THRESHOLD = 100
+
+# Column scale of angle variables, which are in degrees.  Scaled to
+# radians, a unit step turns geometry a length scale from its pivot by
+# about a length scale, as a unit step of a scaled point moves it.
+ANGLE_SCALE = math.degrees(1.0)
+
+# Largest hard residual norm of a component that counts as solved.
+SOLVED_TOLERANCE = 1e-6
+
+
+class SolveCancelled(Exception):
+    """Raised inside a least_squares solve to stop it when it's cancelled."""
 
 
 # =========================
 # Constraint base class
 # =========================
 class Constraint:
-    """Base class for constraints with analytic Jacobians."""
+    """
+    Base class for constraints with analytic Jacobians.  Subclasses that
+    don't define jacobian() are differentiated automatically.
+    """
     def residual(self, x):
         raise NotImplementedError
 
     def jacobian(self, x):
         raise NotImplementedError
 
+    def get_variable_indices(self) -> List[int]:
+        """
+        Returns the sorted solver variable indices this constraint depends on.
+        These are gathered from the constrainables the constraint refers to.
+        """
+        indices = getattr(self, '_variable_indices', None)
+        if indices is None:
+            found = set()
+            for value in list(vars(self).values()):
+                if isinstance(value, Constrainable):
+                    found.update(value.get_variable_indices())
+            indices = sorted(found)
+            self._variable_indices = indices
+        return indices
+
+    def jacobian_block(self, x) -> Tuple[np.ndarray, List[int]]:
+        """
+        Returns the non-trivial columns of the Jacobian as a dense
+        (rows, len(cols)) block, along with the variable indices of
+        those columns.  Only those columns are found, rather than slicing
+        them from jacobian(), which fills a row for every variable: from
+        the class's batch kernel if it has one, or else by automatic
+        differentiation.  Subclasses may override this with an analytic
+        block.
+        """
+        cols = self.get_variable_indices()
+        if 'batch_evaluate' in vars(type(self)):
+            variables = self.kernel_variables()
+            _, J = self.batch_evaluate(
+                np.asarray(x, dtype=float)[variables][None, :],
+                np.array([self.kernel_parameters()], dtype=float))
+            block = np.zeros((J.shape[1], len(cols)))
+            # Shared variables within a constraint sum into one column.
+            np.add.at(block.T, np.searchsorted(cols, variables), J[0].T)
+            return block, cols
+        columns = {col: j for j, col in enumerate(cols)}
+        block = ConstraintSolver._autodiff_jacobian_columns(
+            self.residual, x, cols, columns)
+        return block, cols
+
+    def kernel_variables(self) -> List[int]:
+        """
+        Returns the solver variable indices that batch_evaluate() expects,
+        in kernel column order.  Only needed by classes with a kernel.
+        """
+        raise NotImplementedError
+
+    def kernel_parameters(self) -> Sequence[float]:
+        """Returns the constant targets (lengths, angles) the kernel uses."""
+        return ()
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        """
+        Vectorized residual and Jacobian kernel for k constraints of this
+        class at once.  X is the (k, v) array of kernel_variables() values,
+        and P the (k, p) array of kernel_parameters().  Returns R with
+        shape (k, m) and J with shape (k, m, v).  Subclasses that define
+        this are evaluated in batches by SparseConstraintSystem.
+        """
+        raise NotImplementedError
+
 
 # =========================
 # Constrainable base class
@@ -46,6 +147,302 @@ class Constrainable(object):
     def get_label(self) -> str:
         return self.label
 
+    def get_variable_indices(self) -> List[int]:
+        """Returns the solver variable indices this constrainable owns."""
+        indices = []
+        for constrainable in self.get_constrainables():
+            if constrainable is not self:
+                indices.extend(constrainable.get_variable_indices())
+        return indices
+
+
+# =========================
+# Sparse constraint system
+# =========================
+class SparseConstraintSystem:
+    """
+    Stacks the residuals of a solver's constraints into one vector, and
+    assembles their Jacobians into a sparse CSR matrix over the free
+    variables.
+
+    Analytic constraints contribute a (rows, cols, values) block covering
+    only the variables they depend on.  Plain callables have no known
+    structure, and get a numerical Jacobian over every free variable.
+    Soft constraints are stacked after the hard constraints, scaled by
+    their weights.  The CSR structure is built once, so each Jacobian
+    evaluation only has to fill in the values.
+
+    When vectorize is True, constraints whose class provides a
+    batch_evaluate() kernel are grouped by class into index tables, and
+    each group is evaluated with a single NumPy call instead of one
+    Python call per constraint.
+
+    When compiled is True, the whole system is also compiled into one
+    generated function (see constraint_compiler), which evaluate() uses
+    to find the residuals and Jacobian together in a single pass.
+    """
+    def __init__(
+            self,
+            solver: 'ConstraintSolver',
+            free_indices: Sequence[int],
+            vectorize: bool = True,
+            compiled: bool = False
+    ):
+        self.solver = solver
+        self.free_indices = np.asarray(free_indices, dtype=int)
+        self.num_free = len(self.free_indices)
+        # Maps a full variable index to its column, or -1 if fixed.
+        self.column_map = np.full(len(solver.variables), -1, dtype=int)
+        self.column_map[self.free_indices] = np.arange(self.num_free)
+        # The same, as a dict, for differentiating callables.
+        self.free_columns = dict(zip(self.free_indices.tolist(), range(self.num_free)))
+
+        x = np.array(solver.variables, dtype=float)
+        self.entries = []
+        # (first row, row count) of each constraint, then each soft constraint.
+        self.term_rows = []
+        grouped = {}
+        row = 0
+        row_lengths = []
+        col_indices = []
+        terms = [(c, 1.0) for c in solver.constraints]
+        terms.extend(solver.soft_constraints)
+        self.num_terms = len(terms)
+        self.num_hard_rows = 0
+        for position, (term, weight) in enumerate(terms):
+            if position == len(solver.constraints):
+                self.num_hard_rows = row
+            count = len(self._evaluate(term, x))
+            self.term_rows.append((row, count))
+            kernel = self._kernel(term) if vectorize else None
+            if kernel is not None:
+                cols = np.asarray(term.kernel_variables(), dtype=int)
+                local_cols = self.column_map[cols]
+                local_cols = np.unique(local_cols[local_cols >= 0])
+                grouped.setdefault(kernel, []).append((term, weight, row, count, cols))
+            else:
+                if self._is_analytic(term):
+                    cols = np.asarray(term.get_variable_indices(), dtype=int)
+                else:
+                    cols = self.free_indices
+                keep = self.column_map[cols] >= 0
+                local_cols = self.column_map[cols[keep]]
+                self.entries.append((term, weight, row, count, cols, keep))
+            row_lengths.extend([len(local_cols)] * count)
+            col_indices.extend([local_cols] * count)
+            row += count
+        self.num_rows = row
+        if not solver.soft_constraints:
+            self.num_hard_rows = row
+        # The positions of the hard constraints with rows, and their first
+        # rows, for reducing per-row results to per-constraint ones with
+        # reduceat().
+        self.hard_terms = np.array([
+            position for position, (_, count)
+            in enumerate(self.term_rows[:len(solver.constraints)]) if count
+        ], dtype=int)
+        self.hard_term_starts = np.array(
+            [self.term_rows[position][0] for position in self.hard_terms], dtype=int)
+        self.indptr = np.zeros(row + 1, dtype=int)
+        np.cumsum(row_lengths, out=self.indptr[1:])
+        if col_indices:
+            self.indices = np.concatenate(col_indices).astype(int)
+        else:
+            self.indices = np.zeros(0, dtype=int)
+        self.groups = [
+            self._compile_group(kernel, members)
+            for kernel, members in grouped.items()
+        ]
+        self.group_terms = [
+            [member[0] for member in members] for members in grouped.values()
+        ]
+
+        # The variables the residuals can read.  Callables may read any
+        # of them, so their presence means a full refresh in gather().
+        self._buffer = x
+        self._referenced = None
+        if all(self._is_analytic(term) for term, _ in terms):
+            referenced = [self.free_indices]
+            referenced.extend(entry[4] for entry in self.entries)
+            referenced.extend(group[1].ravel() for group in self.groups)
+            self._referenced = np.unique(np.concatenate(referenced).astype(int))
+            self._fetch = None
+            if len(self._referenced):
+                self._fetch = operator.itemgetter(*self._referenced.tolist())
+
+        # Free columns by variable kind, and the variables whose spread
+        # sets the length scale, for column_scales().
+        kinds = solver.variable_kinds
+        free_kinds = [kinds[index] for index in self.free_indices.tolist()]
+        self.angle_columns = np.array([
+            column for column, kind in enumerate(free_kinds) if kind == "angle"
+        ], dtype=int)
+        self.length_columns = np.array([
+            column for column, kind in enumerate(free_kinds)
+            if kind in ("point", "length")
+        ], dtype=int)
+        visible = self._referenced if self._referenced is not None \
+            else range(len(kinds))
+        self.point_variables = np.array(
+            [index for index in visible if kinds[index] == "point"], dtype=int)
+        self.length_variables = np.array(
+            [index for index in visible if kinds[index] == "length"], dtype=int)
+
+        self.compiled: Optional[CompiledSystem] = None
+        if compiled:
+            self.compiled = compile_system(self)
+
+    def refresh_parameters(self):
+        """
+        Reloads the kernel parameters (target lengths, angles) from the
+        constraints, in case they were edited since the system was built.
+        """
+        for group, terms in zip(self.groups, self.group_terms):
+            params = group[2]
+            if params.size:
+                params[:] = [list(term.kernel_parameters()) for term in terms]
+
+    def gather(self, variables) -> np.ndarray:
+        """
+        Returns the full variable vector as an array.  Only the variables
+        the residuals reference are refreshed from variables, so repeated
+        solves of a small subproblem don't copy the whole variable store.
+        The returned array is reused between calls.
+        """
+        if self._referenced is None or len(variables) != len(self._buffer):
+            self._buffer = np.array(variables, dtype=float)
+        elif self._fetch is not None:
+            self._buffer[self._referenced] = self._fetch(variables)
+        return self._buffer
+
+    def column_scales(self, x, length_scale: Optional[float] = None) -> np.ndarray:
+        """
+        Returns the scale of each free column, for solving in variables
+        divided by their scales.  Points and lengths are scaled by
+        length_scale, or if that's None, by the extent of the geometry at
+        x: the spread of the point coordinates the residuals read, or the
+        largest length if that's bigger, and at least 1.  Angles are
+        scaled by ANGLE_SCALE, and variables of no kind aren't scaled.
+        """
+        scales = np.ones(self.num_free)
+        if length_scale is None:
+            length_scale = 1.0
+            if len(self.point_variables):
+                points = x[self.point_variables]
+                length_scale = max(length_scale, float(points.max() - points.min()))
+            if len(self.length_variables):
+                length_scale = max(
+                    length_scale, float(np.abs(x[self.length_variables]).max()))
+        scales[self.length_columns] = length_scale
+        scales[self.angle_columns] = ANGLE_SCALE
+        return scales
+
+    @staticmethod
+    def _kernel(term):
+        """Returns the class of term if it has its own batch kernel, else None."""
+        kernel = type(term)
+        if isinstance(term, Constraint) and 'batch_evaluate' in vars(kernel):
+            return kernel
+        return None
+
+    def _compile_group(self, kernel, members) -> tuple:
+        """
+        Builds the index tables for a group of constraints sharing a kernel.
+        Returns (kernel, table, params, weights, rows, keep, dest, duplicates),
+        where dest holds the CSR data positions of the kept Jacobian entries.
+        """
+        count = members[0][3]
+        table = np.array([cols for _, _, _, _, cols in members], dtype=int)
+        params = np.array(
+            [list(term.kernel_parameters()) for term, _, _, _, _ in members],
+            dtype=float
+        )
+        weights = np.array([weight for _, weight, _, _, _ in members], dtype=float)
+        rows = np.array([row for _, _, row, _, _ in members])[:, None] + np.arange(count)
+
+        local = self.column_map[table]
+        kept = local >= 0
+        # Each row holds the sorted unique kept columns, so an entry's slot
+        # is the number of distinct kept columns smaller than its own.
+        ordered = np.sort(np.where(kept, local, self.num_free), axis=1)
+        first = np.ones_like(ordered, dtype=bool)
+        first[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+        first &= ordered < self.num_free
+        rank = np.sum(
+            first[:, None, :] & (ordered[:, None, :] < local[:, :, None]),
+            axis=2
+        )
+        keep = np.broadcast_to(kept[:, None, :], (len(members), count, table.shape[1]))
+        dest = (self.indptr[rows][:, :, None] + rank[:, None, :])[keep]
+        duplicates = bool(np.any(first.sum(axis=1) < kept.sum(axis=1)))
+        return (kernel, table, params, weights, rows, keep, dest, duplicates)
+
+    @staticmethod
+    def _is_analytic(term) -> bool:
+        return hasattr(term, "jacobian") and hasattr(term, "residual")
+
+    @staticmethod
+    def _evaluate(term, x) -> np.ndarray:
+        if hasattr(term, "residual"):
+            return np.asarray(term.residual(x), dtype=float)
+        return np.asarray(term(x), dtype=float)
+
+    def evaluate(self, x) -> Tuple[np.ndarray, sparse.csr_matrix]:
+        """
+        Returns the residuals and the sparse Jacobian at x.  Compiled
+        systems find both in one pass, evaluating each kernel only once.
+        """
+        if self.compiled is not None:
+            residuals, data = self.compiled(x)
+            return residuals, self._to_csr(data)
+        return self.residuals(x), self.jacobian(x)
+
+    def residuals(self, x) -> np.ndarray:
+        """Returns the stacked residual vector at the full variable vector x."""
+        if self.compiled is not None:
+            return self.compiled(x, False)[0]
+        out = np.empty(self.num_rows)
+        for term, weight, row, count, cols, keep in self.entries:
+            out[row:row + count] = self._evaluate(term, x) * weight
+        for kernel, table, params, weights, rows, keep, dest, dup in self.groups:
+            R, _ = kernel.batch_evaluate(x[table], params)
+            out[rows] = R * weights[:, None]
+        return out
+
+    def jacobian(self, x) -> sparse.csr_matrix:
+        """Returns the sparse Jacobian over the free variables at x."""
+        if self.compiled is not None:
+            return self._to_csr(self.compiled(x)[1])
+        data = np.empty(len(self.indices))
+        for term, weight, row, count, cols, keep in self.entries:
+            if self._is_analytic(term):
+                block, _ = term.jacobian_block(x)
+            else:
+                block = ConstraintSolver._autodiff_jacobian_columns(
+                    term, x, cols, self.free_columns)
+            start, end = self.indptr[row], self.indptr[row + count]
+            data[start:end] = (np.asarray(block, dtype=float)[:, keep] * weight).ravel()
+        for kernel, table, params, weights, rows, keep, dest, dup in self.groups:
+            _, J = kernel.batch_evaluate(x[table], params)
+            values = (J * weights[:, None, None])[keep]
+            if dup:
+                # Shared variables within a constraint sum into one entry.
+                data[dest] = 0.0
+                np.add.at(data, dest, values)
+            else:
+                data[dest] = values
+        return self._to_csr(data)
+
+    def sparsity(self) -> sparse.csr_matrix:
+        """Returns the structural non-zero pattern of the Jacobian."""
+        return self._to_csr(np.ones(len(self.indices)))
+
+    def _to_csr(self, data) -> sparse.csr_matrix:
+        return sparse.csr_matrix(
+            (data, self.indices, self.indptr),
+            shape=(self.num_rows, self.num_free)
+        )
+
 
 # =========================
 # ConstraintSolver
@@ -57,6 +454,8 @@ class ConstraintSolver:
         self.constraints = []
         self.soft_constraints = []
         self.variable_labels = []
+        # Kind of each variable: "point", "length", "angle", or None.
+        self.variable_kinds = []
         self.constraint_labels = []
         # Geometry entities
         self.angles = []
@@ -68,14 +467,42 @@ class ConstraintSolver:
         self.arcs = []
         self.bezier_curves = []
         self.conflicting_constraints = []
+        self.residual_norm = 0.0
+        # Sparse system from the last solve, reused while still valid.
+        self._system = None
+        # The last solution, as (system, variables, residuals, Jacobian),
+        # kept for a rank analysis on demand.
+        self._solution = None
+        self._diagnostics = None
+        # Timing and convergence of the last solve, and how long the last
+        # _get_system() call spent building.
+        self.last_stats: Optional[SolveStats] = None
+        self._build_time = 0.0
+        # Whether to compile systems into generated code.  Worth it for
+        # solvers that solve the same constraints many times over, such
+        # as cached component solvers during drags.
+        self.compile_systems = False
+        # Whether solves scale variables by their kinds, so millimetres and
+        # degrees are on an equal footing, and the length to scale points
+        # and lengths by, or None for the extent of the geometry solved.
+        self.scale_variables = True
+        self.length_scale: Optional[float] = None
+        # Polled between iterations; once it returns True, solves stop
+        # early with status "cancelled".
+        self.cancel_check: Optional[Callable[[], bool]] = None
 
     # -------------------------
     # Variable management
     # -------------------------
-    def add_variable(self, value, label, fixed=False):
+    def add_variable(self, value, label, fixed=False, kind=None):
+        """
+        Adds a variable, returning its index.  kind is "point", "length"
+        or "angle" for geometry variables, and sets how solves scale it.
+        """
         self.variables.append(value)
         self.fixed_mask.append(fixed)
         self.variable_labels.append(label)
+        self.variable_kinds.append(kind)
         return len(self.variables) - 1
     
     def update_variable(self, index, value):
@@ -83,6 +510,34 @@ class ConstraintSolver:
         if 0 <= index < len(self.variables):
             self.variables[index] = value
 
+    def get_free_indices(self, variable_indices: Optional[Sequence[int]] = None) -> List[int]:
+        """
+        Returns the indices of all variables that are not fixed.  If
+        variable_indices is given, only those variables are considered.
+        """
+        if variable_indices is None:
+            return [i for i, fixed in enumerate(self.fixed_mask) if not fixed]
+        return sorted(i for i in set(variable_indices) if not self.fixed_mask[i])
+
+    def make_subproblem(self, constraints: Sequence, labels: Sequence[str]) -> 'ConstraintSolver':
+        """
+        Returns a solver that shares this solver's variables, but only holds
+        the given constraints.  Solving it writes results straight into this
+        solver's variables.
+        """
+        sub = ConstraintSolver()
+        sub.variables = self.variables
+        sub.fixed_mask = self.fixed_mask
+        sub.variable_labels = self.variable_labels
+        sub.variable_kinds = self.variable_kinds
+        sub.compile_systems = self.compile_systems
+        sub.scale_variables = self.scale_variables
+        sub.length_scale = self.length_scale
+        sub.cancel_check = self.cancel_check
+        for constraint, label in zip(constraints, labels):
+            sub.add_constraint(constraint, label)
+        return sub
+
     # -------------------------
     # Constraints
     # -------------------------
@@ -90,6 +545,17 @@ class ConstraintSolver:
         """Adds either a callable constraint or an analytic Constraint object."""
         self.constraints.append(func)
         self.constraint_labels.append(label or f"constraint_{len(self.constraints)}")
+        self._system = None
+
+    def remove_constraint(self, label) -> bool:
+        """Removes the constraint with the given label, if present."""
+        if label not in self.constraint_labels:
+            return False
+        position = self.constraint_labels.index(label)
+        del self.constraints[position]
+        del self.constraint_labels[position]
+        self._system = None
+        return True
 
     def add_soft_constraint(self, func, weight=1.0):
         """
@@ -98,6 +564,118 @@ class ConstraintSolver:
         The weight parameter controls the strength of the constraint.
         """
         self.soft_constraints.append((func, weight))
+        self._system = None
+
+    def remove_soft_constraint(self, func) -> bool:
+        """Removes a soft constraint previously added, if present."""
+        for position, (soft, _) in enumerate(self.soft_constraints):
+            if soft is func:
+                del self.soft_constraints[position]
+                self._system = None
+                return True
+        return False
+
+    def solve_clusters(self, clusters, variable_indices, max_iter=50, tol=1e-8):
+        """
+        Solves a plan of cluster subproblems in order, each made with
+        make_subproblem() and paired with the variable indices it frees.
+        Clusters are small, so each uses damped Gauss-Newton.  If a
+        cluster doesn't converge, or the clusters disagree over a shared
+        variable so that the residual norm is left above SOLVED_TOLERANCE,
+        this solver's constraints are then solved together, warm-started
+        from the cluster results.  The last run's status is then the
+        status of the whole.  Once cancel_check returns True, no more runs
+        are started.
+
+        Returns the SolveStats of each solver run, in order.
+        """
+        runs = []
+        for cluster_solver, cluster_indices in clusters:
+            if runs and runs[-1].status == "cancelled":
+                break
+            cluster_solver.gauss_newton_solve(
+                max_iter=max_iter, tol=tol, variable_indices=cluster_indices)
+            runs.append(cluster_solver.last_stats)
+        self.check(variable_indices)
+        if runs and runs[-1].status == "cancelled":
+            return runs
+        if (self.residual_norm > SOLVED_TOLERANCE
+                or any(run.status != "converged" for run in runs)):
+            self.solve(variable_indices=variable_indices, tol=SOLVED_TOLERANCE)
+            runs.append(self.last_stats)
+        return runs
+
+    def check(self, variable_indices=None):
+        """
+        Records the state of the constraints at the current variables, as
+        a solve would, without moving them.  residual_norm,
+        conflicting_constraints and the diagnostics then describe the
+        current variables.
+        """
+        system = self._get_system(self.get_free_indices(variable_indices))
+        full_x = system.gather(self.variables)
+        self._record_solution(system, full_x, system.residuals(full_x))
+
+    def pack_subproblem(self, variable_indices, clusters=()) -> bytes:
+        """
+        Serializes this solver's constraints, the variables they reference,
+        and an optional cluster plan, for solve_packed_subproblem() to solve
+        in another process.  Only Constraint objects can be packed; plain
+        callables raise TypeError.
+        """
+        positions = {id(c): i for i, c in enumerate(self.constraints)}
+        referenced = set(variable_indices)
+        for constraint in self.constraints:
+            if not isinstance(constraint, Constraint):
+                raise TypeError("Only Constraint objects can be packed")
+            referenced.update(constraint.get_variable_indices())
+        referenced = sorted(referenced)
+        packed = (
+            self.constraints,
+            self.constraint_labels,
+            referenced,
+            [self.variables[i] for i in referenced],
+            [self.fixed_mask[i] for i in referenced],
+            [self.variable_kinds[i] for i in referenced],
+            self.length_scale,
+            sorted(variable_indices),
+            [
+                ([positions[id(c)] for c in cluster_solver.constraints], sorted(indices))
+                for cluster_solver, indices in clusters
+            ],
+        )
+        buffer = io.BytesIO()
+        _SubproblemPickler(buffer).dump(packed)
+        return buffer.getvalue()
+
+    def hard_residual_norm(self, variable_indices=None) -> float:
+        """Returns the norm of the hard constraint residuals at the current variables."""
+        system = self._get_system(self.get_free_indices(variable_indices))
+        residuals = system.residuals(system.gather(self.variables))
+        return float(np.linalg.norm(residuals[:system.num_hard_rows]))
+
+    def _get_system(self, free_indices: Sequence[int]) -> SparseConstraintSystem:
+        """
+        Returns the sparse system for the given free variables.  The system
+        from the previous solve is reused if nothing it depends on changed,
+        which keeps its sparsity pattern and kernel tables between solves.
+        """
+        system = self._system
+        self._build_time = 0.0
+        if (
+            system is None
+            or len(system.column_map) != len(self.variables)
+            or system.num_terms != len(self.constraints) + len(self.soft_constraints)
+            or not np.array_equal(system.free_indices, free_indices)
+        ):
+            start = time.perf_counter()
+            system = SparseConstraintSystem(
+                self, free_indices, compiled=self.compile_systems)
+            self._system = system
+            self._build_time = time.perf_counter() - start
+        else:
+            system.refresh_parameters()
+        return system
 
     # -------------------------
     # Numerical Jacobian (fallback)
@@ -114,137 +692,495 @@ class ConstraintSolver:
             J[:, j] = (np.array(func(x1)) - f0) / eps
         return J
 
+    @staticmethod
+    def _autodiff_jacobian_columns(func, x, cols, columns):
+        """
+        Jacobian of func for the given columns, found by forward-mode
+        automatic differentiation in one evaluation.  columns maps each
+        variable index in cols to its column.  Functions that need floats
+        (e.g. use the math module) are remembered, and differentiated
+        numerically from then on.
+        """
+        key = getattr(getattr(func, '__func__', func), '__code__', type(func))
+        if key not in _NUMERIC_JACOBIAN_CODE:
+            try:
+                return jacobian_columns(func, x, columns, len(cols))[1]
+            except TypeError:
+                _NUMERIC_JACOBIAN_CODE.add(key)
+            except (ArithmeticError, ValueError):
+                # A singular point, such as a zero length; NumPy floats
+                # give inf or nan there instead.
+                pass
+        return ConstraintSolver._numerical_jacobian_columns(func, x, cols)
+
+    @staticmethod
+    def _numerical_jacobian_columns(func, x, cols, eps=1e-6):
+        """Forward-difference Jacobian of func, for the given columns only."""
+        x = np.array(x, dtype=float)
+        f0 = np.asarray(func(x), dtype=float)
+        J = np.zeros((len(f0), len(cols)))
+        for j, col in enumerate(cols):
+            saved = x[col]
+            x[col] = saved + eps
+            J[:, j] = (np.asarray(func(x), dtype=float) - f0) / eps
+            x[col] = saved
+        return J
+
     # -------------------------
     # Custom Gauss-Newton solver
     # -------------------------
-    def gauss_newton_solve(self, max_iter=50, tol=1e-8, damping=1e-6):
-        """Custom Gauss-Newton/LM solver with hybrid analytic/numeric Jacobians."""
-        free_indices = [i for i, fixed in enumerate(self.fixed_mask) if not fixed]
-        full_x = np.array(self.variables, dtype=float)
-
-        def unpack(free_x):
-            x = full_x.copy()
-            for i, idx in enumerate(free_indices):
-                x[idx] = free_x[i]
-            return x
-
-        def residuals_and_jacobian(free_x):
-            x = unpack(free_x)
-            res_list = []
-            jac_list = []
-            # Collect residuals/J for all constraints
-            for c in self.constraints:
-                if hasattr(c, "jacobian") and hasattr(c, "residual"):
-                    # Analytic constraint object
-                    res = c.residual(x)
-                    J_full = c.jacobian(x)
+    def gauss_newton_solve(self, max_iter=50, tol=1e-8, damping=1e-6,
+                           variable_indices=None, time_budget=None, rtol=1e-9,
+                           initial_damping=1e-3):
+        """
+        Levenberg-Marquardt solver with analytic or automatic Jacobians.
+        The Jacobian is assembled sparsely, and each damped normal-equation
+        step is solved with a sparse direct factorization, or a dense one
+        for small problems.  If variable_indices is given, all other
+        variables are held fixed.
+
+        The damping starts at initial_damping times the largest diagonal
+        entry of J^T J, so it suits the problem's scale, and never drops
+        below damping.  Variables are scaled by their kinds (see
+        SparseConstraintSystem.column_scales()) unless scale_variables is
+        False, and the damping applies to the scaled variables, so steps
+        balance lengths against angles whatever the size of the part.
+        Each step is accepted or rejected by the ratio of
+        the actual to the predicted reduction in the squared residual,
+        which also adapts the damping (Nielsen's rule): good agreement
+        moves toward Gauss-Newton steps, and rejections toward short
+        gradient steps, more sharply with each rejection in a row.
+
+        Iteration stops once the residual norm is below tol, or once an
+        accepted step moves the variables by less than tol, or reduces the
+        norm by a relative amount of less than rtol, which ends hopeless
+        solves of inconsistent constraints early as stalled.  If
+        time_budget (in seconds) is given, iteration also stops once it is
+        used up, keeping the best iterate so far, and likewise once
+        cancel_check returns True.  The norm of the hard
+        constraint residuals at the result is left in residual_norm, and
+        timings in last_stats.
+        """
+        start = time.perf_counter()
+        deadline = None
+        if time_budget is not None:
+            deadline = start + time_budget
+        free_indices = self.get_free_indices(variable_indices)
+        system = self._get_system(free_indices)
+        stats = SolveStats("gauss_newton", system.num_free, system.num_rows)
+        stats.build_time = self._build_time
+        full_x = system.gather(self.variables)
+        free = system.free_indices
+        # Compiled systems find the Jacobian along with the residuals at
+        # each trial point, where it's nearly free.
+        fused = system.compiled is not None
+        scales = None
+        if self.scale_variables and system.num_free:
+            scales = system.column_scales(full_x, self.length_scale)
+
+        R, J_new = system.residuals(full_x), None
+        norm = np.linalg.norm(R)
+        stats.residual_norms.append(float(norm))
+        # The unscaled Jacobian at full_x, if known, for the diagnostics.
+        last_J = None
+        if not system.num_free:
+            stats.status = "no_free_variables"
+        else:
+            stats.status = "max_iter"
+            use_sparse = system.num_free > SPARSE_SOLVE_THRESHOLD
+            if use_sparse:
+                identity = sparse.identity(system.num_free, format="csc")
+                if scales is not None:
+                    column_scales = sparse.diags(scales)
+            else:
+                identity = np.identity(system.num_free)
+            lam = None
+            # Growth factor of the damping over consecutive rejections.
+            nu = 2.0
+            J = None
+            step_time = 0.0
+            for it in range(max_iter):
+                if norm < tol:
+                    stats.status = "converged"
+                    break
+                if self.cancel_check is not None and self.cancel_check():
+                    stats.status = "cancelled"
+                    break
+                step_start = time.perf_counter()
+                # Don't start an iteration that won't fit in the budget.
+                if deadline is not None and step_start + step_time >= deadline:
+                    stats.status = "time_budget"
+                    break
+                stats.iterations += 1
+                if J is None:
+                    J = J_new if J_new is not None else system.jacobian(full_x)
+                    if not use_sparse:
+                        J = J.toarray()
+                    last_J = J
+                    if scales is not None:
+                        J = J @ column_scales if use_sparse else J * scales
+                    JtJ = J.T @ J
+                    g = J.T @ R
+                    if lam is None:
+                        lam = max(damping, initial_damping * float(
+                            JtJ.diagonal().max(initial=0.0)))
+                    stats.jacobian_time += time.perf_counter() - step_start
+                solve_start = time.perf_counter()
+                if use_sparse:
+                    delta = np.atleast_1d(spsolve((JtJ + lam * identity).tocsc(), g))
                 else:
-                    # Callable function: use numerical derivative
-                    res = np.array(c(x))
-                    J_full = ConstraintSolver._numerical_jacobian(c, x)
-                res_list.append(res)
-                jac_list.append(J_full)
-
-            # Stack all
-            R = np.concatenate(res_list)
-            J = np.vstack(jac_list)[:, free_indices]
-
-            # Soft constraints
-            for func, weight in self.soft_constraints:
-                res_soft = np.array(func(x)) * weight
-                R = np.concatenate([R, res_soft])
-                J_soft = ConstraintSolver._numerical_jacobian(func, x)[:, free_indices] * weight
-                J = np.vstack([J, J_soft])
-
-            return R, J
-
-        # Initial free variable vector
-        x_free = np.array([self.variables[i] for i in free_indices])
-
-        for it in range(max_iter):
-            R, J = residuals_and_jacobian(x_free)
-            if np.linalg.norm(R) < tol:
-                break
-            A = J.T @ J + damping * np.eye(len(x_free))
-            g = J.T @ R
-            delta = np.linalg.solve(A, g)
-            x_free -= delta
+                    delta = np.linalg.solve(JtJ + lam * identity, g)
+                stats.linear_solve_time += time.perf_counter() - solve_start
+                # Reduction in |R|^2 / 2 the linear model predicts.
+                predicted = 0.5 * float(delta @ (lam * delta + g))
+                step = delta * scales if scales is not None else delta
+                x_prev = full_x[free].copy()
+                full_x[free] -= step
+                if fused:
+                    eval_start = time.perf_counter()
+                    R_new, J_trial = system.evaluate(full_x)
+                    stats.jacobian_time += time.perf_counter() - eval_start
+                else:
+                    R_new, J_trial = system.residuals(full_x), None
+                norm_new = np.linalg.norm(R_new)
+                actual = 0.5 * (norm * norm - norm_new * norm_new)
+                if actual > 0.0 and predicted > 0.0:
+                    rho = actual / predicted
+                    lam = max(lam * max(1.0 / 3.0, 1.0 - (2.0 * rho - 1.0) ** 3), damping)
+                    nu = 2.0
+                    reduction = (norm - norm_new) / norm
+                    R, norm = R_new, norm_new
+                    stats.residual_norms.append(float(norm))
+                    J, J_new = None, J_trial
+                    last_J = J_trial
+                    if norm < tol:
+                        stats.status = "converged"
+                        break
+                    if reduction < rtol or np.linalg.norm(step) < tol:
+                        stats.status = "stalled"
+                        break
+                else:
+                    full_x[free] = x_prev
+                    lam *= nu
+                    nu *= 2.0
+                    if lam > 1e12:
+                        stats.status = "stalled"
+                        break
+                step_time = time.perf_counter() - step_start
+            else:
+                if norm < tol:
+                    stats.status = "converged"
 
         # Write results back
-        for i, idx in enumerate(free_indices):
-            self.variables[idx] = x_free[i]
-
-        self._detect_constraints_status()
+        for idx in free:
+            self.variables[idx] = full_x[idx]
+        self._record_solution(system, full_x, R, last_J)
+        stats.residual_norm = self.residual_norm
+        stats.total_time = time.perf_counter() - start
+        self.last_stats = stats
         return self.variables
 
     # -------------------------
     # SciPy least_squares solver (alternative)
     # -------------------------
-    def solve(self):
-        free_indices = [i for i, fixed in enumerate(self.fixed_mask) if not fixed]
+    def solve(self, analytic_jacobian=True, variable_indices=None, tol=1e-6):
+        """
+        Solves the constraints with SciPy's trust-region least squares.
+
+        With analytic_jacobian, the sparse Jacobian assembled from each
+        constraint's analytic block is passed as jac.  Otherwise the
+        Jacobian is estimated by finite differences, using the assembled
+        sparsity pattern to group columns.  Unless scale_variables is
+        False, variables are scaled by their kinds through x_scale.  If
+        variable_indices is given, all other variables are held fixed.
+        If cancel_check returns True, the solve stops, leaving the
+        variables as they were.  The solve only counts as converged if
+        the hard residual norm ends within tol.  Timings are left in
+        last_stats.
+        """
+        start = time.perf_counter()
+        free_indices = self.get_free_indices(variable_indices)
+
+        if not free_indices:
+            self.check(variable_indices)
+            stats = SolveStats("least_squares", 0, self._solution[0].num_rows)
+            stats.build_time = self._build_time
+            stats.residual_norm = self.residual_norm
+            stats.residual_norms.append(self.residual_norm)
+            stats.status = "no_free_variables"
+            stats.total_time = time.perf_counter() - start
+            self.last_stats = stats
+            return None
+
+        system = self._get_system(free_indices)
+        stats = SolveStats("least_squares", system.num_free, system.num_rows)
+        stats.build_time = self._build_time
+        free = system.free_indices
+        full_x = system.gather(self.variables)
+        use_sparse = system.num_free > SPARSE_SOLVE_THRESHOLD
+        residual_time = 0.0
+        last_norm = 0.0
+        # Compiled systems find the Jacobian along with the residuals, and
+        # least_squares asks for it at the point it last evaluated.
+        fused = system.compiled is not None
+        last_jacobian = None
+
+        def unpack(free_vars):
+            full_x[free] = free_vars
+            return full_x
 
         def masked_objective(free_vars):
-            full_x = np.array(self.variables)
-            for i, idx in enumerate(free_indices):
-                full_x[idx] = free_vars[i]
-            residuals = []
-            for c in self.constraints:
-                if callable(c):
-                    residuals.extend(c(full_x))  # type: ignore
-                else:
-                    residuals.extend(c.residual(full_x))
-            for func, weight in self.soft_constraints:
-                residuals.extend([r * weight for r in func(full_x)])
+            nonlocal residual_time, last_norm, last_jacobian
+            if self.cancel_check is not None and self.cancel_check():
+                raise SolveCancelled()
+            eval_start = time.perf_counter()
+            if fused:
+                residuals, J = system.evaluate(unpack(free_vars))
+                last_jacobian = (np.array(free_vars), J)
+            else:
+                residuals = system.residuals(unpack(free_vars))
+            residual_time += time.perf_counter() - eval_start
+            last_norm = float(np.linalg.norm(residuals))
             return residuals
 
-        if not free_indices:
-            residuals = masked_objective([])
-            self._detect_constraints_status()
-            self._detect_conflicts(residuals)
+        def masked_jacobian(free_vars):
+            eval_start = time.perf_counter()
+            if last_jacobian is not None and np.array_equal(last_jacobian[0], free_vars):
+                J = last_jacobian[1]
+            else:
+                J = system.jacobian(unpack(free_vars))
+            stats.jacobian_time += time.perf_counter() - eval_start
+            # least_squares evaluates the Jacobian at its latest residuals.
+            stats.residual_norms.append(last_norm)
+            return J if use_sparse else J.toarray()
+
+        free_vars_init = full_x[free].copy()
+        x_scale = 1.0
+        if self.scale_variables:
+            x_scale = system.column_scales(full_x, self.length_scale)
+        try:
+            if analytic_jacobian:
+                result = least_squares(
+                    masked_objective, free_vars_init,
+                    jac=masked_jacobian, method='trf',
+                    tr_solver='lsmr' if use_sparse else 'exact', x_scale=x_scale)
+            elif use_sparse:
+                result = least_squares(
+                    masked_objective, free_vars_init,
+                    jac_sparsity=system.sparsity(), method='trf',
+                    tr_solver='lsmr', x_scale=x_scale)
+            else:
+                result = least_squares(masked_objective, free_vars_init, x_scale=x_scale)
+        except SolveCancelled:
+            full_x[free] = free_vars_init
+            self._record_solution(system, full_x, system.residuals(full_x))
+            stats.iterations = max(len(stats.residual_norms) - 1, 0)
+            stats.residual_norm = self.residual_norm
+            stats.status = "cancelled"
+            stats.total_time = time.perf_counter() - start
+            self.last_stats = stats
             return None
 
-        free_vars_init = [self.variables[i] for i in free_indices]
-        result = least_squares(masked_objective, free_vars_init)
-
-        for i, idx in enumerate(free_indices):
+        for i, idx in enumerate(free):
             self.variables[idx] = result.x[i]
 
-        self._detect_constraints_status()
-        self._detect_conflicts(result.fun)
+        full_x[free] = result.x
+        self._record_solution(system, full_x, result.fun, result.jac)
+        stats.iterations = int(result.njev if result.njev is not None else result.nfev)
+        stats.residual_norm = self.residual_norm
+        if result.status > 0 and self.residual_norm <= tol:
+            stats.status = "converged"
+        else:
+            stats.status = "max_iter" if result.status == 0 else "stalled"
+        stats.total_time = time.perf_counter() - start
+        stats.linear_solve_time = max(
+            stats.total_time - stats.build_time - stats.jacobian_time - residual_time, 0.0)
+        self.last_stats = stats
         return result
 
     # -------------------------
     # Diagnostics
     # -------------------------
-    def _detect_constraints_status(self):
-        num_vars_total = len(self.variables)
-        num_vars_free = sum(not f for f in self.fixed_mask)
-        num_constraints = sum(len(c.residual(self.variables) if hasattr(c, "residual") else c(self.variables))
-                              for c in self.constraints)
-        self.under_constrained = num_constraints < num_vars_free
-        self.over_constrained = num_constraints > num_vars_free
-        self.constraint_info = {
-            "total_variables": num_vars_total,
-            "free_variables": num_vars_free,
-            "num_constraints": num_constraints,
+    def _record_solution(self, system, full_x, residuals, jacobian=None, tolerance=1e-3):
+        """
+        Records a solve's result: the hard residual norm, and the
+        constraints whose residuals exceed tolerance.  The Jacobian at
+        full_x is kept for diagnostics, which are only computed when
+        asked for.  Without one, it is evaluated on demand.
+        """
+        residuals = np.asarray(residuals, dtype=float)
+        self.residual_norm = float(np.linalg.norm(residuals[:system.num_hard_rows]))
+        self.conflicting_constraints = []
+        if len(system.hard_terms):
+            violated = np.abs(residuals[:system.num_hard_rows]) > tolerance
+            violated = np.logical_or.reduceat(violated, system.hard_term_starts)
+            self.conflicting_constraints = [
+                self.constraint_labels[position]
+                for position in system.hard_terms[violated]
+            ]
+        if jacobian is None:
+            full_x = np.array(full_x, dtype=float)
+        self._solution = (system, full_x, residuals, jacobian)
+        self._diagnostics = None
+
+    @property
+    def diagnostics(self) -> Optional[ConstraintDiagnostics]:
+        """
+        Rank analysis of the hard constraint Jacobian at the last solution,
+        or None before the first solve.
+        """
+        if self._diagnostics is None and self._solution is not None:
+            system, full_x, _, jacobian = self._solution
+            if jacobian is None:
+                jacobian = system.jacobian(full_x)
+            self._diagnostics = analyze_jacobian(jacobian[:system.num_hard_rows])
+        return self._diagnostics
+
+    @property
+    def redundant_constraints(self) -> List[str]:
+        """
+        Labels of constraints with rows that depend on other constraints'
+        rows.  They are harmless if consistent, but over-constrain the
+        system if listed in conflicting_constraints too.
+        """
+        diagnostics = self.diagnostics
+        if diagnostics is None:
+            return []
+        system = self._solution[0]
+        redundant = set(diagnostics.redundant_rows)
+        return [
+            label
+            for label, (row, count) in zip(self.constraint_labels, system.term_rows)
+            if redundant.intersection(range(row, row + count))
+        ]
+
+    @property
+    def under_constrained(self) -> bool:
+        """True if the last solution left any degrees of freedom."""
+        diagnostics = self.diagnostics
+        return diagnostics is not None and diagnostics.dof > 0
+
+    @property
+    def over_constrained(self) -> bool:
+        """True if the last solution has redundant constraints it couldn't satisfy."""
+        diagnostics = self.diagnostics
+        return (
+            diagnostics is not None
+            and bool(diagnostics.redundant_rows)
+            and bool(self.conflicting_constraints)
+        )
+
+    @property
+    def constraint_info(self) -> Dict[str, Any]:
+        diagnostics = self.diagnostics
+        if diagnostics is None:
+            return {}
+        return {
+            "total_variables": len(self.variables),
+            "free_variables": diagnostics.num_free,
+            "num_constraints": diagnostics.num_rows,
+            "rank": diagnostics.rank,
+            "dof": diagnostics.dof,
+            "redundant_constraints": self.redundant_constraints,
             "under_constrained": self.under_constrained,
             "over_constrained": self.over_constrained
         }
 
-    def _detect_conflicts(self, residuals, tolerance=1e-3):
-        self.conflicting_constraints = []
-        i = 0
-        for c, label in zip(self.constraints, self.constraint_labels):
-            count = len(c.residual(self.variables) if hasattr(c, "residual") else c(self.variables))
-            subres = residuals[i:i+count]
-            if any(abs(r) > tolerance for r in subres):
-                self.conflicting_constraints.append(label)
-            i += count
+    def get_free_dof(self, variable_indices) -> Optional[int]:
+        """
+        Returns the degrees of freedom the last solution left to some
+        variables, such as those of one object's constrainables.  None
+        before the first solve, or if the system was too large to analyze.
+        """
+        diagnostics = self.diagnostics
+        if diagnostics is None:
+            return None
+        column_map = self._solution[0].column_map
+        columns = [column_map[i] for i in variable_indices if column_map[i] >= 0]
+        return diagnostics.columns_dof(columns)
 
     def get_point_coords(self):
         return [pt.get(self.variables) for pt in self.points]
 
 
+# ========================
+# Out-of-process solving
+# ========================
+
+class _SubproblemPickler(pickle.Pickler):
+    """Pickles constraints without the solver their constrainables belong to."""
+    def persistent_id(self, obj):
+        if isinstance(obj, ConstraintSolver):
+            return "solver"
+        return None
+
+
+class _SubproblemUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        return None
+
+
+def _remap_indices(constrainable, remap: Dict[int, int], seen: set):
+    """Renumbers the variable indices owned by a constrainable and its parts."""
+    if id(constrainable) in seen:
+        return
+    seen.add(id(constrainable))
+    if isinstance(constrainable, ConstrainablePoint2D):
+        constrainable.xi = remap[constrainable.xi]
+        constrainable.yi = remap[constrainable.yi]
+    elif isinstance(constrainable, (ConstrainableLength, ConstrainableAngle)):
+        constrainable.index = remap[constrainable.index]
+    for part in constrainable.get_constrainables():
+        if part is not constrainable:
+            _remap_indices(part, remap, seen)
+
+
+def solve_packed_subproblem(
+        packed: bytes, max_iter=50, tol=1e-8
+) -> Tuple[List[int], List[float], List[SolveStats]]:
+    """
+    Solves a subproblem serialized by ConstraintSolver.pack_subproblem().
+    Runs in a worker process: the unpickled constraints are private
+    copies, so they are renumbered onto a compact variable vector.
+
+    Returns the original indices of the referenced variables, their
+    solved values, and the SolveStats of each solver run.
+    """
+    (constraints, labels, referenced, values, fixed, kinds, length_scale,
+     variable_indices, clusters) = _SubproblemUnpickler(io.BytesIO(packed)).load()
+    remap = {index: i for i, index in enumerate(referenced)}
+    seen = set()
+    for constraint in constraints:
+        constraint.__dict__.pop('_variable_indices', None)
+        for value in list(vars(constraint).values()):
+            if isinstance(value, Constrainable):
+                _remap_indices(value, remap, seen)
+
+    solver = ConstraintSolver()
+    solver.variables = list(values)
+    solver.fixed_mask = list(fixed)
+    solver.variable_labels = [""] * len(values)
+    solver.variable_kinds = list(kinds)
+    solver.length_scale = length_scale
+    for constraint, label in zip(constraints, labels):
+        solver.add_constraint(constraint, label)
+    free = [remap[i] for i in variable_indices]
+    if clusters:
+        plan = [
+            (
+                solver.make_subproblem(
+                    [constraints[i] for i in positions], [labels[i] for i in positions]),
+                [remap[i] for i in indices]
+            )
+            for positions, indices in clusters
+        ]
+        runs = solver.solve_clusters(plan, free, max_iter, tol)
+    else:
+        solver.solve(variable_indices=free)
+        runs = [solver.last_stats]
+    return referenced, solver.variables, runs
+
+
 # ========================
 # Helper Functions
 # ========================
@@ -271,7 +1207,7 @@ class ConstrainableLength(Constrainable):
     ):
         super().__init__(solver, label)
         self.fixed = fixed
-        self.index = solver.add_variable(value, label, fixed=fixed)
+        self.index = solver.add_variable(value, label, fixed=fixed, kind="length")
         solver.lengths = getattr(solver, 'lengths', [])
         solver.lengths.append(self)
     
@@ -280,6 +1216,9 @@ class ConstrainableLength(Constrainable):
 
     def get_constrainables(self) -> Sequence[Constrainable]:
         return [self]
+
+    def get_variable_indices(self) -> List[int]:
+        return [self.index]
     
     def update_value(self, value: float):
         self.solver.update_variable(self.index, value)
@@ -295,7 +1234,7 @@ class ConstrainableAngle(Constrainable):
     ):
         super().__init__(solver, label)
         self.fixed = fixed
-        self.index = solver.add_variable(value, label, fixed=fixed)
+        self.index = solver.add_variable(value, label, fixed=fixed, kind="angle")
         solver.angles = getattr(solver, 'angles', [])
         solver.angles.append(self)
     
@@ -304,6 +1243,9 @@ class ConstrainableAngle(Constrainable):
 
     def get_constrainables(self) -> Sequence[Constrainable]:
         return [self]
+
+    def get_variable_indices(self) -> List[int]:
+        return [self.index]
     
     def update_value(self, value: float):
         self.solver.update_variable(self.index, value)
@@ -318,8 +1260,8 @@ class ConstrainablePoint2D(Constrainable):
         label: str = "point"
     ):
         super().__init__(solver, label)
-        self.xi = solver.add_variable(pt[0], f"{label} x", fixed=fixed)
-        self.yi = solver.add_variable(pt[1], f"{label} y", fixed=fixed)
+        self.xi = solver.add_variable(pt[0], f"{label} x", fixed=fixed, kind="point")
+        self.yi = solver.add_variable(pt[1], f"{label} y", fixed=fixed, kind="point")
         solver.points = getattr(solver, 'points', [])
         solver.points.append(self)
 
@@ -329,6 +1271,9 @@ class ConstrainablePoint2D(Constrainable):
     def get_constrainables(self) -> Sequence[Constrainable]:
         return [self]
 
+    def get_variable_indices(self) -> List[int]:
+        return [self.xi, self.yi]
+
     def distance_to(self, vars, px: float, py: float) -> float:
         x, y = self.get(vars)
         return math.hypot(x - px, y - py)
@@ -542,58 +1487,41 @@ class ConstrainableEllipse(Constrainable):
     ) -> Optional[Tuple[float, float]]:
         """
         Finds the closest point on the ellipse perimeter to the given point.
-        Uses numerical optimization to find the minimum distance.
         """
         cx, cy, major_r, minor_r, rotation = self.get(vars)
-        
-        # Transform point to ellipse's coordinate system
         cos_rot = math.cos(math.radians(rotation))
         sin_rot = math.sin(math.radians(rotation))
-        
-        # Translate to origin
-        dx = px - cx
-        dy = py - cy
-        
-        # Rotate to ellipse's coordinate system
-        x_rot = dx * cos_rot + dy * sin_rot
-        y_rot = -dx * sin_rot + dy * cos_rot
-        
-        # Find closest point on ellipse using parametric approach
-        def ellipse_point(t):
-            return (
-                major_r * math.cos(t),
-                minor_r * math.sin(t)
-            )
-        
-        def distance_to_point(t):
-            ex, ey = ellipse_point(t)
-            return math.hypot(x_rot - ex, y_rot - ey)
-        
-        # Find minimum distance using golden section search
-        a, b = 0, 2 * math.pi
-        gr = (math.sqrt(5) - 1) / 2  # golden ratio
-        c = b - gr * (b - a)
-        d = a + gr * (b - a)
-        
-        for _ in range(50):  # 50 iterations should be sufficient
-            if distance_to_point(c) < distance_to_point(d):
-                b = d
-                d = c
-                c = b - gr * (b - a)
-            else:
-                a = c
-                c = d
-                d = a + gr * (b - a)
-        
-        # Get the closest point in ellipse coordinates
-        t = (a + b) / 2
-        ex, ey = ellipse_point(t)
-        
-        # Transform back to world coordinates
-        x_world = ex * cos_rot - ey * sin_rot + cx
-        y_world = ex * sin_rot + ey * cos_rot + cy
-        
-        return (x_world, y_world)
+
+        # Work in the ellipse's own coordinate system
+        dx = float(px) - cx
+        dy = float(py) - cy
+        t = ellipse_closest_angle(
+            major_r, minor_r,
+            dx * cos_rot + dy * sin_rot,
+            -dx * sin_rot + dy * cos_rot)
+        ex = major_r * math.cos(t)
+        ey = minor_r * math.sin(t)
+        return (ex * cos_rot - ey * sin_rot + cx, ex * sin_rot + ey * cos_rot + cy)
+
+    def closest_points_on_perimeter(self, vars, px, py) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the closest perimeter points to arrays of points at once,
+        returning arrays of their x and y coordinates.
+        """
+        cx, cy, major_r, minor_r, rotation = self.get(vars)
+        cos_rot = math.cos(math.radians(rotation))
+        sin_rot = math.sin(math.radians(rotation))
+
+        # Work in the ellipse's own coordinate system
+        dx = np.asarray(px, dtype=float) - cx
+        dy = np.asarray(py, dtype=float) - cy
+        t = ellipse_closest_angles(
+            major_r, minor_r,
+            dx * cos_rot + dy * sin_rot,
+            -dx * sin_rot + dy * cos_rot)
+        ex = major_r * np.cos(t)
+        ey = minor_r * np.sin(t)
+        return ex * cos_rot - ey * sin_rot + cx, ex * sin_rot + ey * cos_rot + cy
 
     def distance_to_perimeter(self, vars, px: float, py: float) -> float:
         closest_pt = self.closest_point_on_perimeter(vars, px, py)
@@ -601,6 +1529,24 @@ class ConstrainableEllipse(Constrainable):
             return 0.0
         return math.hypot(closest_pt[0] - px, closest_pt[1] - py)
 
+    def perimeter_normal(self, vars, px: float, py: float) -> Tuple[float, float]:
+        """
+        Returns the outward unit normal of the ellipse at the perimeter
+        point px, py.
+        """
+        cx, cy, major_r, minor_r, rotation = self.get(vars)
+        cos_rot = math.cos(math.radians(rotation))
+        sin_rot = math.sin(math.radians(rotation))
+        dx, dy = px - cx, py - cy
+        # The gradient of (x / a)^2 + (y / b)^2 in the ellipse's frame
+        gx = (dx * cos_rot + dy * sin_rot) / (major_r * major_r)
+        gy = (-dx * sin_rot + dy * cos_rot) / (minor_r * minor_r)
+        length = math.hypot(gx, gy)
+        if length == 0.0:
+            return (1.0, 0.0)
+        return ((gx * cos_rot - gy * sin_rot) / length,
+                (gx * sin_rot + gy * cos_rot) / length)
+
     def get_focus_points(self, vars) -> Tuple[Tuple[float, float], Tuple[float, float]]:
         """
         Returns the two focus points of the ellipse.
@@ -646,7 +1592,7 @@ class ConstrainableBezierPath(Constrainable):
         points: List[ConstrainablePoint2D],
     ):
         self.points = points
-        solver.beziers.append(self)
+        solver.bezier_curves.append(self)
 
     def get(self, vars) -> List[Tuple[float, float]]:
         return [pt.get(vars) for pt in self.points]
@@ -701,32 +1647,15 @@ class ConstrainableBezierPath(Constrainable):
         return self.path_segment_tangent(vars, t, seg)
 
     def closest_path_part(self, vars, px: float, py: float) -> float:
-        def dist(t: float) -> float:
-            x, y = self.path_point(vars, t)
-            return math.hypot(x - px, y - py)
-        
-        segs = (len(self.points)-1) // 3
-        t = 0.0
-        d = dist(t)
-        for tt in np.linspace(0.0, 1.0, 16*segs):
-            dd = dist(tt)
-            if dd < d:
-                d = dd
-                t = tt
-        delta = 1.0/(16*segs)
-        while delta > 1e-6:
-            t1 = max(0.0, (t - delta))
-            t2 = min(1.0, (t + delta))
-            d1 = dist(t1)
-            d = dist(t)
-            d2 = dist(t2)
-            if d > d1 or d > d2:
-                if d1 < d2:
-                    t = max(0.0, t - delta)
-                else:
-                    t = min(1.0, t + delta)
-            delta *= 0.5
-        return t
+        return bezier_closest_part(
+            np.array(self.get(vars), dtype=float), float(px), float(py))
+
+    def closest_path_parts(self, vars, px, py) -> np.ndarray:
+        """
+        Finds the path parameters, from 0 to 1, of the closest path points
+        to arrays of points at once.
+        """
+        return bezier_closest_parts(np.array(self.get(vars), dtype=float), px, py)
 
     def closest_path_point(self, vars, px: float, py: float) -> Tuple[float, float]:
         t = self.closest_path_part(vars, px, py)
@@ -752,6 +1681,15 @@ class LengthEqualsConstraint(Constraint):
         J[0, self.length2.index] = -1
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [self.length1.index, self.length2.index]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        R = (X[:, 0] - X[:, 1])[:, None]
+        J = np.broadcast_to([[[1.0, -1.0]]], (len(X), 1, 2))
+        return R, J
+
 
 # ============================
 # Angle Constraint Functions
@@ -774,6 +1712,15 @@ class AngleEqualsConstraint(Constraint):
         J[0, self.angle2.index] = -1
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [self.angle1.index, self.angle2.index]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        R = (X[:, 0] - X[:, 1])[:, None]
+        J = np.broadcast_to([[[1.0, -1.0]]], (len(X), 1, 2))
+        return R, J
+
 
 # ============================
 # Point Constraint Functions
@@ -798,6 +1745,39 @@ class CoincidentConstraint(Constraint):
         J[1, self.p2.yi] = -1
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [self.p1.xi, self.p1.yi, self.p2.xi, self.p2.yi]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        R = X[:, 0:2] - X[:, 2:4]
+        J = np.broadcast_to(
+            [[[1.0, 0.0, -1.0, 0.0], [0.0, 1.0, 0.0, -1.0]]], (len(X), 2, 4))
+        return R, J
+
+
+class DragTargetConstraint(Constraint):
+    """
+    Pulls a point toward a target location.  Used as a soft constraint
+    while a point is dragged, with the target following the cursor.
+    """
+    def __init__(self, point: ConstrainablePoint2D, target: Tuple[float, float]):
+        self.point = point
+        self.target = target
+
+    def residual(self, x):
+        return np.array([
+            x[self.point.xi] - self.target[0],
+            x[self.point.yi] - self.target[1]
+        ])
+
+    def jacobian(self, x):
+        n = len(x)
+        J = np.zeros((2, n))
+        J[0, self.point.xi] = 1
+        J[1, self.point.yi] = 1
+        return J
+
 
 class HorizontalConstraint(Constraint):
     def __init__(self, p1, p2):
@@ -814,6 +1794,15 @@ class HorizontalConstraint(Constraint):
         J[0, self.p2.yi] = -1
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [self.p1.yi, self.p2.yi]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        R = (X[:, 0] - X[:, 1])[:, None]
+        J = np.broadcast_to([[[1.0, -1.0]]], (len(X), 1, 2))
+        return R, J
+
 
 class VerticalConstraint(Constraint):
     def __init__(self, p1, p2):
@@ -832,6 +1821,15 @@ class VerticalConstraint(Constraint):
         J[0, self.p2.xi] = -1
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [self.p1.xi, self.p2.xi]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        R = (X[:, 0] - X[:, 1])[:, None]
+        J = np.broadcast_to([[[1.0, -1.0]]], (len(X), 1, 2))
+        return R, J
+
 
 class PointIsOnLineSegmentConstraint(Constraint):
     def __init__(self, point: ConstrainablePoint2D, line: ConstrainableLine2D):
@@ -1057,6 +2055,30 @@ class PointCoincidentWithArcStartConstraint(Constraint):
         
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [
+            self.point.xi, self.point.yi,
+            self.arc.center.xi, self.arc.center.yi,
+            self.arc.radius.index, self.arc.start_degrees.index,
+        ]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        px, py, cx, cy, r, theta = X.T
+        cos_t = np.cos(np.radians(theta))
+        sin_t = np.sin(np.radians(theta))
+        R = np.stack([cx + r * cos_t - px, cy + r * sin_t - py], axis=1)
+        J = np.zeros((len(X), 2, 6))
+        J[:, 0, 0] = -1
+        J[:, 1, 1] = -1
+        J[:, 0, 2] = 1
+        J[:, 1, 3] = 1
+        J[:, 0, 4] = cos_t
+        J[:, 1, 4] = sin_t
+        J[:, 0, 5] = -r * sin_t * math.radians(1)
+        J[:, 1, 5] = r * cos_t * math.radians(1)
+        return R, J
+
 
 class PointCoincidentWithArcEndConstraint(Constraint):
     def __init__(self, point: ConstrainablePoint2D, arc: ConstrainableArc):
@@ -1098,12 +2120,38 @@ class PointCoincidentWithArcEndConstraint(Constraint):
         J[0, self.arc.radius.index] = math.cos(math.radians(theta2))  # d/dr of end_x
         J[1, self.arc.radius.index] = math.sin(math.radians(theta2))  # d/dr of end_y
         
-        # Derivatives with respect to end angle
-        J[0, self.arc.span_degrees.index] = -r * math.sin(math.radians(theta2)) * math.radians(1)  # d/dθ2 of end_x
-        J[1, self.arc.span_degrees.index] = r * math.cos(math.radians(theta2)) * math.radians(1)   # d/dθ2 of end_y
+        # Derivatives with respect to end angle (θ2 = start + span)
+        for index in (self.arc.start_degrees.index, self.arc.span_degrees.index):
+            J[0, index] = -r * math.sin(math.radians(theta2)) * math.radians(1)  # d/dθ2 of end_x
+            J[1, index] = r * math.cos(math.radians(theta2)) * math.radians(1)   # d/dθ2 of end_y
         
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [
+            self.point.xi, self.point.yi,
+            self.arc.center.xi, self.arc.center.yi,
+            self.arc.radius.index,
+            self.arc.start_degrees.index, self.arc.span_degrees.index,
+        ]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        px, py, cx, cy, r, start, span = X.T
+        cos_t = np.cos(np.radians(start + span))
+        sin_t = np.sin(np.radians(start + span))
+        R = np.stack([cx + r * cos_t - px, cy + r * sin_t - py], axis=1)
+        J = np.zeros((len(X), 2, 7))
+        J[:, 0, 0] = -1
+        J[:, 1, 1] = -1
+        J[:, 0, 2] = 1
+        J[:, 1, 3] = 1
+        J[:, 0, 4] = cos_t
+        J[:, 1, 4] = sin_t
+        J[:, 0, 5:7] = (-r * sin_t * math.radians(1))[:, None]
+        J[:, 1, 5:7] = (r * cos_t * math.radians(1))[:, None]
+        return R, J
+
 
 class PointIsOnCircleConstraint(Constraint):
     def __init__(self, point: ConstrainablePoint2D, circle: ConstrainableCircle):
@@ -1147,6 +2195,30 @@ class PointIsOnCircleConstraint(Constraint):
         
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [
+            self.point.xi, self.point.yi,
+            self.circle.center.xi, self.circle.center.yi,
+            self.circle.radius.index,
+        ]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        dx = X[:, 0] - X[:, 2]
+        dy = X[:, 1] - X[:, 3]
+        distance = np.hypot(dx, dy)
+        R = (distance - X[:, 4])[:, None]
+        J = np.empty((len(X), 1, 5))
+        safe = np.where(distance > 0, distance, 1.0)
+        ux = np.where(distance > 0, dx / safe, 1.0)
+        uy = np.where(distance > 0, dy / safe, 1.0)
+        J[:, 0, 0] = ux
+        J[:, 0, 1] = uy
+        J[:, 0, 2] = -ux
+        J[:, 0, 3] = -uy
+        J[:, 0, 4] = -1
+        return R, J
+
 
 class PointIsOnEllipseConstraint(Constraint):
     def __init__(self, point: ConstrainablePoint2D, ellipse: ConstrainableEllipse):
@@ -1166,8 +2238,20 @@ class PointIsOnEllipseConstraint(Constraint):
         return np.array([dist])
 
     def jacobian(self, x):
-        n = len(x)
-        J = np.zeros((1, n))
+        block, cols = self.jacobian_block(x)
+        J = np.zeros((1, len(x)))
+        J[:, cols] = block
+        return J
+
+    def jacobian_block(self, x) -> Tuple[np.ndarray, List[int]]:
+        """
+        The analytic block, which takes the derivatives from outside the
+        ellipse when the point is on its perimeter, where the distance
+        has a kink.
+        """
+        cols = self.get_variable_indices()
+        column = {col: j for j, col in enumerate(cols)}
+        J = np.zeros((1, len(cols)))
         
         px, py = self.point.get(x)
         closest_pt = self.ellipse.closest_point_on_perimeter(x, px, py)
@@ -1177,12 +2261,12 @@ class PointIsOnEllipseConstraint(Constraint):
             
             if dist > 1e-10:
                 # Derivatives with respect to point coordinates
-                J[0, self.point.xi] = (px - closest_pt[0]) / dist
-                J[0, self.point.yi] = (py - closest_pt[1]) / dist
+                J[0, column[self.point.xi]] = (px - closest_pt[0]) / dist
+                J[0, column[self.point.yi]] = (py - closest_pt[1]) / dist
                 
                 # Derivatives with respect to ellipse center
-                J[0, self.ellipse.center.xi] = -(px - closest_pt[0]) / dist
-                J[0, self.ellipse.center.yi] = -(py - closest_pt[1]) / dist
+                J[0, column[self.ellipse.center.xi]] = -(px - closest_pt[0]) / dist
+                J[0, column[self.ellipse.center.yi]] = -(py - closest_pt[1]) / dist
                 
                 # Derivatives with respect to ellipse radii and rotation
                 # These are complex and would require numerical differentiation
@@ -1194,22 +2278,25 @@ class PointIsOnEllipseConstraint(Constraint):
                     closest_pt_plus = self.ellipse.closest_point_on_perimeter(x_plus, px, py)
                     if closest_pt_plus is not None:
                         dist_plus = np.sqrt((px - closest_pt_plus[0])**2 + (py - closest_pt_plus[1])**2)
-                        J[0, i] = (dist_plus - dist) / eps
+                        J[0, column[i]] = (dist_plus - dist) / eps
                     else:
-                        J[0, i] = 0
+                        J[0, column[i]] = 0
             else:
-                # Point is at ellipse center, derivatives are zero
-                J[0, self.ellipse.radius1.index] = 0
-                J[0, self.ellipse.radius2.index] = 0
-                J[0, self.ellipse.rotation_degrees.index] = 0
+                # Point is on the perimeter, where the distance has a kink.
+                # Use its derivatives from outside, along the normal.
+                nx, ny = self.ellipse.perimeter_normal(x, *closest_pt)
+                J[0, column[self.point.xi]] = nx
+                J[0, column[self.point.yi]] = ny
+                J[0, column[self.ellipse.center.xi]] = -nx
+                J[0, column[self.ellipse.center.yi]] = -ny
         else:
             # Handle case where point is exactly on perimeter
-            J[0, self.point.xi] = 1
-            J[0, self.point.yi] = 1
-            J[0, self.ellipse.center.xi] = -1
-            J[0, self.ellipse.center.yi] = -1
+            J[0, column[self.point.xi]] = 1
+            J[0, column[self.point.yi]] = 1
+            J[0, column[self.ellipse.center.xi]] = -1
+            J[0, column[self.ellipse.center.yi]] = -1
         
-        return J
+        return J, cols
 
 
 class PointIsOnBezierPathConstraint(Constraint):
@@ -1392,17 +2479,17 @@ class LineAngleConstraint(Constraint):
         length_squared = dx*dx + dy*dy
         
         if length_squared > 0:
-            # Angle is atan2(dy, dx)
+            # Angle is degrees(atan2(dy, dx))
             # Derivatives of atan2(dy, dx):
-            # ∂angle/∂x0 = -dy / (dx² + dy²)
-            # ∂angle/∂y0 = dx / (dx² + dy²)
-            # ∂angle/∂x1 = dy / (dx² + dy²)
-            # ∂angle/∂y1 = -dx / (dx² + dy²)
-            
-            J[0, self.line.p1.xi] = -dy / length_squared  # d/dx0
-            J[0, self.line.p1.yi] = dx / length_squared   # d/dy0
-            J[0, self.line.p2.xi] = dy / length_squared   # d/dx1
-            J[0, self.line.p2.yi] = -dx / length_squared  # d/dy1
+            # ∂angle/∂x0 = dy / (dx² + dy²)
+            # ∂angle/∂y0 = -dx / (dx² + dy²)
+            # ∂angle/∂x1 = -dy / (dx² + dy²)
+            # ∂angle/∂y1 = dx / (dx² + dy²)
+            scale = math.degrees(1.0) / length_squared
+            J[0, self.line.p1.xi] = dy * scale   # d/dx0
+            J[0, self.line.p1.yi] = -dx * scale  # d/dy0
+            J[0, self.line.p2.xi] = -dy * scale  # d/dx1
+            J[0, self.line.p2.yi] = dx * scale   # d/dy1
         else:
             # Handle case where line has zero length
             # In this case, angle is undefined, so we set derivatives to zero
@@ -1410,6 +2497,24 @@ class LineAngleConstraint(Constraint):
         
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [self.line.p1.xi, self.line.p1.yi, self.line.p2.xi, self.line.p2.yi]
+
+    def kernel_parameters(self) -> Sequence[float]:
+        return [self.angle]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        dx = X[:, 2] - X[:, 0]
+        dy = X[:, 3] - X[:, 1]
+        R = (np.degrees(np.arctan2(dy, dx)) - P[:, 0])[:, None]
+        length_squared = dx * dx + dy * dy
+        scale = np.divide(
+            math.degrees(1.0), length_squared,
+            out=np.zeros_like(length_squared), where=length_squared > 0)
+        J = np.stack([dy, -dx, -dy, dx], axis=1)[:, None, :] * scale[:, None, None]
+        return R, J
+
 
 class LineLengthConstraint(Constraint):
     def __init__(self, line: ConstrainableLine2D, length: float):
@@ -1460,6 +2565,24 @@ class LineLengthConstraint(Constraint):
         
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [self.line.p1.xi, self.line.p1.yi, self.line.p2.xi, self.line.p2.yi]
+
+    def kernel_parameters(self) -> Sequence[float]:
+        return [self.length]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        dx = X[:, 2] - X[:, 0]
+        dy = X[:, 3] - X[:, 1]
+        current_length = np.hypot(dx, dy)
+        R = (current_length - P[:, 0])[:, None]
+        inv = np.divide(
+            1.0, current_length,
+            out=np.zeros_like(current_length), where=current_length > 0)
+        J = np.stack([-dx, -dy, dx, dy], axis=1)[:, None, :] * inv[:, None, None]
+        return R, J
+
 
 class LinesEqualLengthConstraint(Constraint):
     def __init__(self, l1: ConstrainableLine2D, l2: ConstrainableLine2D):
@@ -1493,6 +2616,23 @@ class LinesEqualLengthConstraint(Constraint):
 
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [
+            self.l1.p1.xi, self.l1.p1.yi, self.l1.p2.xi, self.l1.p2.yi,
+            self.l2.p1.xi, self.l2.p1.yi, self.l2.p2.xi, self.l2.p2.yi,
+        ]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        dx1 = X[:, 2] - X[:, 0]
+        dy1 = X[:, 3] - X[:, 1]
+        dx2 = X[:, 6] - X[:, 4]
+        dy2 = X[:, 7] - X[:, 5]
+        R = (dx1**2 + dy1**2 - dx2**2 - dy2**2)[:, None]
+        J = 2 * np.stack(
+            [-dx1, -dy1, dx1, dy1, dx2, dy2, -dx2, -dy2], axis=1)[:, None, :]
+        return R, J
+
 
 class LinesPerpendicularConstraint(Constraint):
     def __init__(self, l1: ConstrainableLine2D, l2: ConstrainableLine2D):
@@ -1520,13 +2660,31 @@ class LinesPerpendicularConstraint(Constraint):
         J[0, self.l1.p2.xi] = dx2
         J[0, self.l1.p2.yi] = dy2
 
-        J[0, self.l2.p1.xi] = -dx1
-        J[0, self.l2.p1.yi] = -dy1
-        J[0, self.l2.p2.xi] = dx1
-        J[0, self.l2.p2.yi] = dy1
+        # Accumulate, since the lines may share an endpoint.
+        J[0, self.l2.p1.xi] += -dx1
+        J[0, self.l2.p1.yi] += -dy1
+        J[0, self.l2.p2.xi] += dx1
+        J[0, self.l2.p2.yi] += dy1
 
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [
+            self.l1.p1.xi, self.l1.p1.yi, self.l1.p2.xi, self.l1.p2.yi,
+            self.l2.p1.xi, self.l2.p1.yi, self.l2.p2.xi, self.l2.p2.yi,
+        ]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        dx1 = X[:, 2] - X[:, 0]
+        dy1 = X[:, 3] - X[:, 1]
+        dx2 = X[:, 6] - X[:, 4]
+        dy2 = X[:, 7] - X[:, 5]
+        R = (dx1 * dx2 + dy1 * dy2)[:, None]
+        J = np.stack(
+            [-dx2, -dy2, dx2, dy2, -dx1, -dy1, dx1, dy1], axis=1)[:, None, :]
+        return R, J
+
 
 class LinesParallelConstraint(Constraint):
     """
@@ -1562,14 +2720,31 @@ class LinesParallelConstraint(Constraint):
         J[0, self.l1.p2.xi] =  dy2
         J[0, self.l1.p2.yi] = -dx2
 
-        # For line2
-        J[0, self.l2.p1.xi] =  dy1
-        J[0, self.l2.p1.yi] = -dx1
-        J[0, self.l2.p2.xi] = -dy1
-        J[0, self.l2.p2.yi] =  dx1
+        # For line2 (accumulated, since the lines may share an endpoint)
+        J[0, self.l2.p1.xi] +=  dy1
+        J[0, self.l2.p1.yi] += -dx1
+        J[0, self.l2.p2.xi] += -dy1
+        J[0, self.l2.p2.yi] +=  dx1
 
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [
+            self.l1.p1.xi, self.l1.p1.yi, self.l1.p2.xi, self.l1.p2.yi,
+            self.l2.p1.xi, self.l2.p1.yi, self.l2.p2.xi, self.l2.p2.yi,
+        ]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        dx1 = X[:, 2] - X[:, 0]
+        dy1 = X[:, 3] - X[:, 1]
+        dx2 = X[:, 6] - X[:, 4]
+        dy2 = X[:, 7] - X[:, 5]
+        R = (dx1 * dy2 - dy1 * dx2)[:, None]
+        J = np.stack(
+            [-dy2, dx2, dy2, -dx2, dy1, -dx1, -dy1, dx1], axis=1)[:, None, :]
+        return R, J
+
 
 class LineTangentToArcConstraint(Constraint):
     def __init__(self, line: ConstrainableLine2D, arc: ConstrainableArc, at_start: bool = True):
@@ -1865,8 +3040,7 @@ class LineTangentToBezierConstraint(Constraint):
         lp2x, lp2y = x[self.line.p2.xi], x[self.line.p2.yi]
         
         # Find closest points on bezier to line endpoints
-        t1 = self.bezier.closest_path_part(x, lp1x, lp1y)
-        t2 = self.bezier.closest_path_part(x, lp2x, lp2y)
+        t1, t2 = self.bezier.closest_path_parts(x, [lp1x, lp2x], [lp1y, lp2y]).tolist()
         
         # Get closest points on bezier
         cpt1 = self.bezier.path_point(x, t1)
@@ -1912,8 +3086,7 @@ class LineTangentToBezierConstraint(Constraint):
         lp2x, lp2y = x[self.line.p2.xi], x[self.line.p2.yi]
         
         # Find closest points and determine which endpoint to use
-        t1 = self.bezier.closest_path_part(x, lp1x, lp1y)
-        t2 = self.bezier.closest_path_part(x, lp2x, lp2y)
+        t1, t2 = self.bezier.closest_path_parts(x, [lp1x, lp2x], [lp1y, lp2y]).tolist()
         
         cpt1 = self.bezier.path_point(x, t1)
         cpt2 = self.bezier.path_point(x, t2)
@@ -2147,6 +3320,18 @@ class ArcRadiusConstraint(Constraint):
         
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [self.arc.radius.index]
+
+    def kernel_parameters(self) -> Sequence[float]:
+        return [self.radius]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        R = X[:, 0:1] - P[:, 0:1]
+        J = np.ones((len(X), 1, 1))
+        return R, J
+
 
 class ArcStartAngleConstraint(Constraint):
     def __init__(self, arc: ConstrainableArc, angle: float):
@@ -2169,6 +3354,18 @@ class ArcStartAngleConstraint(Constraint):
         
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [self.arc.start_degrees.index]
+
+    def kernel_parameters(self) -> Sequence[float]:
+        return [self.angle]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        R = np.mod(np.mod(X[:, 0:1], 360) + 360, 360) - P[:, 0:1]
+        J = np.ones((len(X), 1, 1))
+        return R, J
+
 
 class ArcEndAngleConstraint(Constraint):
     def __init__(self, arc: ConstrainableArc, angle: float):
@@ -2192,6 +3389,18 @@ class ArcEndAngleConstraint(Constraint):
         
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [self.arc.span_degrees.index]
+
+    def kernel_parameters(self) -> Sequence[float]:
+        return [self.angle]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        R = np.mod(np.mod(X[:, 0:1], 360) + 360, 360) - P[:, 0:1]
+        J = np.ones((len(X), 1, 1))
+        return R, J
+
 
 class ArcSpanAngleConstraint(Constraint):
     def __init__(self, arc: ConstrainableArc, angle: float):
@@ -2234,6 +3443,22 @@ class ArcSpanAngleConstraint(Constraint):
         
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [self.arc.start_degrees.index, self.arc.span_degrees.index]
+
+    def kernel_parameters(self) -> Sequence[float]:
+        return [self.angle]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        start_angle = np.mod(np.mod(X[:, 0], 360) + 360, 360)
+        end_angle = np.mod(np.mod(X[:, 1], 360) + 360, 360)
+        current_span = end_angle - start_angle
+        current_span = np.where(start_angle > end_angle, current_span + 360, current_span)
+        R = (current_span - P[:, 0])[:, None]
+        J = np.broadcast_to([[[-1.0, 1.0]]], (len(X), 1, 2))
+        return R, J
+
 
 class ArcTangentToArcConstraint(Constraint):
     def __init__(self, arc1: ConstrainableArc, arc2: ConstrainableArc):
@@ -2693,6 +3918,25 @@ class CircleTangentToCircleConstraint(Constraint):
         
         return J
 
+    def kernel_variables(self) -> List[int]:
+        return [
+            self.circle1.center.xi, self.circle1.center.yi, self.circle1.radius.index,
+            self.circle2.center.xi, self.circle2.center.yi, self.circle2.radius.index,
+        ]
+
+    @classmethod
+    def batch_evaluate(cls, X, P):
+        dx = X[:, 0] - X[:, 3]
+        dy = X[:, 1] - X[:, 4]
+        dist = np.hypot(dx, dy)
+        R = (dist - X[:, 2] - X[:, 5])[:, None]
+        safe = np.where(dist > 0, dist, 1.0)
+        ux = np.where(dist > 0, dx / safe, 1.0)
+        uy = np.where(dist > 0, dy / safe, 1.0)
+        minus_one = -np.ones(len(X))
+        J = np.stack([ux, uy, minus_one, -ux, -uy, minus_one], axis=1)[:, None, :]
+        return R, J
+
 
 class CircleTangentToEllipseConstraint(Constraint):
     def __init__(self, circle: ConstrainableCircle, ellipse: ConstrainableEllipse):
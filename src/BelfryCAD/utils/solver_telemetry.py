@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+    belfrycad.utils.solver_telemetry
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Timing and convergence records for constraint solves.
+
+    Each ConstraintSolver solve leaves a SolveStats in its last_stats.
+    ConstraintsManager gathers the solves of each component into a
+    ComponentStats, and keeps the most recent ones in a SolverTelemetry
+    rolling log, which listeners such as the GUI can follow.
+"""
+
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+
+class SolveStats:
+    """
+    Timing and convergence of one solver run.
+
+    Attributes:
+        method: "gauss_newton" or "least_squares"
+        num_free: Number of free variables
+        num_rows: Number of residual rows, soft constraints included
+        build_time: Seconds spent building the sparse system, 0.0 if the
+            previous one was reused
+        jacobian_time: Seconds spent evaluating Jacobians
+        linear_solve_time: Seconds spent solving for steps.  For
+            least_squares, this is everything but residual and Jacobian
+            evaluation.
+        total_time: Seconds for the whole run
+        iterations: Number of iterations
+        residual_norms: Residual norm at the start, and after each
+            accepted step (least_squares: at each Jacobian evaluation)
+        residual_norm: Norm of the hard constraint residuals at the end
+        status: "converged", "max_iter", "time_budget", "stalled",
+            "cancelled", or "no_free_variables"
+    """
+    def __init__(self, method: str, num_free: int = 0, num_rows: int = 0):
+        self.method = method
+        self.num_free = num_free
+        self.num_rows = num_rows
+        self.build_time = 0.0
+        self.jacobian_time = 0.0
+        self.linear_solve_time = 0.0
+        self.total_time = 0.0
+        self.iterations = 0
+        self.residual_norms: List[float] = []
+        self.residual_norm = 0.0
+        self.status = "converged"
+
+    def as_dict(self) -> Dict[str, object]:
+        return dict(vars(self), residual_norms=list(self.residual_norms))
+
+    def __repr__(self) -> str:
+        return (f"SolveStats({self.method}, free={self.num_free}, "
+                f"iterations={self.iterations}, status={self.status}, "
+                f"time={self.total_time * 1000.0:.2f}ms)")
+
+
+class ComponentStats:
+    """
+    Timing and convergence of solving one constraint component.
+
+    Attributes:
+        kind: "solve", "parallel" (solved in a worker process),
+            "background" (solved by a SolveJob off the GUI thread), "drag"
+            (one solve_drag() frame), "polish" (the end_drag() solve), or
+            "cached" (skipped, as unchanged since its last converged solve)
+        num_objects: Number of objects in the component
+        constraint_types: Constraint count by class name
+        solves: The solver runs, in order.  Cluster solves come first,
+            followed by a whole-component solve if they were needed.
+        total_time: Seconds for the whole component, including pushing
+            object values in and updating objects after
+        success: False if the solve raised
+        error: The error message, if it raised
+        timestamp: When the solve finished, from time.time()
+    """
+    def __init__(self, kind: str, num_objects: int, constraint_types: Dict[str, int]):
+        self.kind = kind
+        self.num_objects = num_objects
+        self.constraint_types = constraint_types
+        self.solves: List[SolveStats] = []
+        self.total_time = 0.0
+        self.success = True
+        self.error: Optional[str] = None
+        self.timestamp = 0.0
+
+    @property
+    def num_constraints(self) -> int:
+        return sum(self.constraint_types.values())
+
+    @property
+    def iterations(self) -> int:
+        return sum(stats.iterations for stats in self.solves)
+
+    @property
+    def residual_norm(self) -> float:
+        return self.solves[-1].residual_norm if self.solves else 0.0
+
+    @property
+    def status(self) -> str:
+        # Cluster solves end with a whole-component run whenever a cluster
+        # doesn't converge, so the last run speaks for the component.
+        if not self.success:
+            return "failed"
+        return self.solves[-1].status if self.solves else "converged"
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "kind": self.kind,
+            "num_objects": self.num_objects,
+            "num_constraints": self.num_constraints,
+            "constraint_types": dict(self.constraint_types),
+            "total_time": self.total_time,
+            "iterations": self.iterations,
+            "residual_norm": self.residual_norm,
+            "status": self.status,
+            "error": self.error,
+            "timestamp": self.timestamp,
+            "solves": [stats.as_dict() for stats in self.solves],
+        }
+
+    def __repr__(self) -> str:
+        return (f"ComponentStats({self.kind}, objects={self.num_objects}, "
+                f"constraints={self.num_constraints}, status={self.status}, "
+                f"time={self.total_time * 1000.0:.2f}ms)")
+
+
+class SolverTelemetry:
+    """
+    A rolling log of the most recent component solves.
+    """
+    def __init__(self, max_entries: int = 200):
+        self.entries: Deque[ComponentStats] = deque(maxlen=max_entries)
+        self._listeners: List[Callable[[ComponentStats], None]] = []
+
+    def record(self, stats: ComponentStats):
+        """Add a component's stats to the log, and pass them to the listeners."""
+        stats.timestamp = time.time()
+        self.entries.append(stats)
+        for listener in list(self._listeners):
+            listener(stats)
+
+    def add_listener(self, listener: Callable[[ComponentStats], None]):
+        """Call listener with each new ComponentStats as it's recorded."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[ComponentStats], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def failures(self) -> List[ComponentStats]:
+        """The logged component solves that raised or didn't converge."""
+        return [
+            stats for stats in self.entries
+            if stats.status in ("failed", "max_iter", "stalled")
+        ]
+
+    def slowest(self, count: int = 10) -> List[ComponentStats]:
+        """The slowest logged component solves, slowest first."""
+        return sorted(self.entries, key=lambda stats: -stats.total_time)[:count]
+
+    def clear(self):
+        self.entries.clear()
@@ -144,7 +144,8 @@ class MainWindow(QMainWindow):
         self.counter += 1
         self.label.setText(f"Counter: {self.counter}")
 
-app = QApplication([])
-window = MainWindow()
-app.exec()
+if __name__ == "__main__":
+    app = QApplication([])
+    window = MainWindow()
+    app.exec()
 
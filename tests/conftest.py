@@ -2,3 +2,47 @@ import sys
 import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks", "constraint solver benchmarks")
+    group.addoption(
+        "--run-benchmarks", action="store_true", default=False,
+        help="Run the solver benchmarks at every size, not just the smallest.")
+    group.addoption(
+        "--benchmark-max-size", type=int, default=1000,
+        help="Largest sketch size to benchmark (default 1000; up to 10000).")
+    group.addoption(
+        "--benchmark-json", default=None,
+        help="Write the benchmark results to this JSON file.")
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: constraint solver scaling benchmark")
+    config.benchmark_results = []
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config.benchmark_results
+    if not results:
+        return
+    # The smoke runs in a default session don't print a table.
+    if config.getoption("--run-benchmarks"):
+        terminalreporter.section("constraint solver benchmarks")
+        terminalreporter.write_line(
+            f"{'sketch':<10}{'size':>7}  {'method':<20}{'time (s)':>10}"
+            f"{'iters':>8}{'residual':>11}{'peak MB':>9}")
+        for result in results:
+            peak = result['peak_memory']
+            peak = f"{peak / 1e6:>9.2f}" if peak is not None else f"{'-':>9}"
+            terminalreporter.write_line(
+                f"{result['sketch']:<10}{result['size']:>7}  {result['method']:<20}"
+                f"{result['solve_time']:>10.4f}{result['iterations']:>8}"
+                f"{result['residual_norm']:>11.2e}{peak}")
+    path = config.getoption("--benchmark-json")
+    if path:
+        import json
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        terminalreporter.write_line(f"Benchmark results written to {path}")
@@ -0,0 +1,99 @@
+"""
+Unit tests for BelfryCAD/utils/autodiff.py.
+"""
+
+import math
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from BelfryCAD.utils.autodiff import Dual, DualVector, jacobian_columns
+
+
+def numeric_block(func, x, cols, eps=1e-7):
+    x = np.array(x, dtype=float)
+    f0 = np.asarray(func(x), dtype=float)
+    block = np.zeros((len(f0), len(cols)))
+    for j, col in enumerate(cols):
+        shifted = x.copy()
+        shifted[col] += eps
+        block[:, j] = (np.asarray(func(shifted), dtype=float) - f0) / eps
+    return block
+
+
+class TestDual:
+    def test_arithmetic(self):
+        a = Dual(3.0, {0: 1.0})
+        b = Dual(2.0, {1: 1.0})
+        result = (a * b + a / b - 2.0 * a) ** 2
+        value = 3.0 * 2.0 + 3.0 / 2.0 - 6.0
+        assert result.value == pytest.approx(value ** 2)
+        assert result.grad[0] == pytest.approx(2 * value * (2.0 + 0.5 - 2.0))
+        assert result.grad[1] == pytest.approx(2 * value * (3.0 - 3.0 / 4.0))
+
+    def test_comparisons_use_values(self):
+        a = Dual(1.0, {0: 1.0})
+        assert a < 2.0
+        assert a == 1.0
+        assert max(a, 0.5) is a
+        assert abs(Dual(-2.0, {0: 1.0})).grad == {0: -1.0}
+
+    def test_no_float_conversion(self):
+        with pytest.raises(TypeError):
+            math.sqrt(Dual(4.0, {0: 1.0}))
+
+    @pytest.mark.parametrize("ufunc", [
+        np.sqrt, np.sin, np.cos, np.tan, np.arctan, np.exp, np.log,
+        np.degrees, np.radians, np.square, np.absolute,
+    ])
+    def test_unary_ufuncs(self, ufunc):
+        result = ufunc(Dual(0.7, {0: 1.0}))
+        eps = 1e-7
+        assert result.value == pytest.approx(ufunc(0.7))
+        assert result.grad[0] == pytest.approx((ufunc(0.7 + eps) - ufunc(0.7)) / eps, rel=1e-5)
+
+    def test_binary_ufuncs(self):
+        y, x = Dual(1.0, {0: 1.0}), Dual(2.0, {1: 1.0})
+        angle = np.arctan2(y, x)
+        assert angle.value == pytest.approx(math.atan2(1.0, 2.0))
+        assert angle.grad[0] == pytest.approx(2.0 / 5.0)
+        assert angle.grad[1] == pytest.approx(-1.0 / 5.0)
+        length = np.hypot(y, x)
+        assert length.grad == pytest.approx({0: 1.0 / math.sqrt(5), 1: 2.0 / math.sqrt(5)})
+
+    def test_object_arrays(self):
+        values = np.array([Dual(0.5, {0: 1.0}), Dual(1.5, {1: 1.0})])
+        result = np.sin(values * np.array([2.0, 3.0]))
+        assert result[1].grad[1] == pytest.approx(3.0 * math.cos(4.5))
+
+
+class TestJacobianColumns:
+    def test_matches_finite_differences(self):
+        def func(x):
+            dx, dy = x[2] - x[0], x[3] - x[1]
+            return [np.hypot(dx, dy) - 2.0, np.degrees(np.arctan2(dy, dx)) % 360.0]
+        x = [0.1, 0.2, 1.5, 2.5, 9.0]
+        cols = [0, 1, 2, 3]
+        values, block = jacobian_columns(func, x, {c: j for j, c in enumerate(cols)}, 4)
+        assert values == pytest.approx(np.asarray(func(np.array(x)), dtype=float))
+        assert block == pytest.approx(numeric_block(func, x, cols), abs=1e-5)
+
+    def test_unseeded_variables_are_constant(self):
+        values, block = jacobian_columns(lambda x: [x[0] * x[1]], [2.0, 3.0], {1: 0}, 1)
+        assert values == pytest.approx([6.0])
+        assert block.tolist() == [[2.0]]
+
+    def test_vector_slices(self):
+        vector = DualVector(np.arange(4.0), {2: 0})
+        head = vector[1:3]
+        assert head[0] == 1.0
+        assert isinstance(head[1], Dual)
+        assert vector[-2].grad == {0: 1.0}
+
+    def test_float_only_function_raises(self):
+        with pytest.raises(TypeError):
+            jacobian_columns(lambda x: [math.hypot(x[0], x[1])], [3.0, 4.0], {0: 0, 1: 1}, 2)
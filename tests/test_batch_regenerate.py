@@ -0,0 +1,160 @@
+"""
+Tests for BelfryCAD/utils/batch_regenerate.py.
+"""
+
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from BelfryCAD.cad_geometry import Point2D
+from BelfryCAD.models.cad_objects.line_cad_object import LineCadObject
+from BelfryCAD.models.document import Document
+from BelfryCAD.utils.batch_regenerate import (
+    load_document_file, main, read_design_table, regenerate_batch,
+    regenerate_variant, save_document_file,
+)
+from BelfryCAD.utils.constraints import (
+    HorizontalConstraint, LineLengthConstraint, VerticalConstraint,
+)
+
+
+def make_template(tmp_path, filename="bracket.belcad"):
+    document = Document()
+    document.parameters = {
+        'thickness': "2",
+        'width': "10",
+        'hole': "sqrt($width - 4 * $thickness)",
+    }
+    document.preferences = {'units': 'mm', 'precision': 3}
+    document.add_object(LineCadObject(document, Point2D(0, 0), Point2D(10, 0)))
+    path = str(tmp_path / filename)
+    assert save_document_file(document, path)
+    return path
+
+
+def write_table(tmp_path, text):
+    path = tmp_path / "table.csv"
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+class TestDesignTable:
+    def test_read_csv(self, tmp_path):
+        path = write_table(tmp_path, "name, thickness ,width\nsmall, 1, 6\nlarge,2,\n")
+        assert read_design_table(path) == [
+            {'name': 'small', 'thickness': '1', 'width': '6'},
+            {'name': 'large', 'thickness': '2', 'width': ''},
+        ]
+
+
+class TestRegenerateBatch:
+    def test_variants_written_in_process(self, tmp_path):
+        template = make_template(tmp_path)
+        rows = [{'name': 'small', 'thickness': '1'}, {'width': '20', 'thickness': ''}]
+        results = regenerate_batch(template, rows, str(tmp_path / "out"), processes=1)
+        assert [r.success for r in results] == [True, True]
+        assert [os.path.basename(r.output_path) for r in results] == [
+            'small.belcad', 'bracket_2.belcad']
+        small = load_document_file(results[0].output_path)
+        assert small.parameters['thickness'] == "1"
+        assert small.parameters['hole'] == "sqrt($width - 4 * $thickness)"
+        assert small.cad_expression.get_variable('hole') == pytest.approx(6 ** 0.5)
+        assert small.preferences['units'] == 'mm'
+        assert len(small.objects) == 1
+        second = load_document_file(results[1].output_path)
+        assert second.cad_expression.get_variable('hole') == pytest.approx(12 ** 0.5)
+
+    def test_failing_rows_reported(self, tmp_path):
+        template = make_template(tmp_path)
+        rows = [{'thickness': '3'}, {'thickness': '1'}]
+        results = regenerate_batch(template, rows, str(tmp_path / "out"), processes=1)
+        assert not results[0].success
+        assert "'hole'" in results[0].error
+        assert not os.path.exists(results[0].output_path)
+        assert results[1].success
+
+    def test_expression_cells(self, tmp_path):
+        template = make_template(tmp_path)
+        rows = [{'thickness': '$width/4'}, {'thickness': '1'}, {'thickness': '$width'}]
+        results = regenerate_batch(template, rows, str(tmp_path / "out"), processes=1)
+        assert [r.success for r in results] == [True, True, False]
+        assert "'hole'" in results[2].error
+        first = load_document_file(results[0].output_path)
+        assert first.cad_expression.get_variable('hole') == pytest.approx(0.0)
+
+    def test_inconsistent_constraints_not_converged(self, tmp_path):
+        document = Document()
+        line = LineCadObject(document, Point2D(0, 0), Point2D(3, 1))
+        line_id = document.add_object(line)
+        line.make_constrainables(document.constraints_manager.solver)
+        start, end = line.constraint_start_point, line.constraint_end_point
+        document.add_constraint("h", HorizontalConstraint(start, end), line_id)
+        document.add_constraint("v", VerticalConstraint(start, end), line_id)
+        document.add_constraint(
+            "len", LineLengthConstraint(line.constraint_line, 5.0), line_id)
+        output_path = str(tmp_path / "variant.belcad")
+        with mock.patch(
+                'BelfryCAD.utils.batch_regenerate.load_document_file',
+                return_value=document):
+            result = regenerate_variant("template.belcad", {}, output_path)
+        assert result.success
+        assert not result.converged
+
+    def test_duplicate_names(self, tmp_path):
+        template = make_template(tmp_path)
+        rows = [{'name': 'part', 'thickness': '1'}, {'name': 'part', 'thickness': '2'},
+                {'name': 'bracket_1', 'thickness': '2'}]
+        results = regenerate_batch(template, rows, str(tmp_path / "out"), processes=1)
+        assert [r.success for r in results] == [True, False, True]
+        assert "row 1" in results[1].error
+        saved = load_document_file(results[0].output_path)
+        assert saved.cad_expression.get_variable('thickness') == 1.0
+
+    def test_names_with_separators(self, tmp_path):
+        template = make_template(tmp_path)
+        rows = [{'name': '../escaped'}, {'name': 'sub/part'}, {'name': '..'}]
+        results = regenerate_batch(template, rows, str(tmp_path / "out"), processes=1)
+        assert not any(r.success for r in results)
+        assert all("plain file name" in r.error for r in results)
+        assert not os.path.exists(tmp_path / "escaped.belcad")
+
+    def test_unknown_parameter(self, tmp_path):
+        template = make_template(tmp_path)
+        results = regenerate_batch(template, [{'height': '3'}], str(tmp_path / "out"))
+        assert not results[0].success
+        assert "'height' not found" in results[0].error
+
+    def test_process_pool(self, tmp_path):
+        template = make_template(tmp_path)
+        rows = [{'thickness': str(t)} for t in (0.5, 1, 1.5, 2)]
+        results = regenerate_batch(
+            template, rows, str(tmp_path / "out"), output_format='.belcadx', processes=2)
+        assert [r.row for r in results] == [0, 1, 2, 3]
+        assert all(r.success and r.converged for r in results)
+        values = [
+            load_document_file(r.output_path).cad_expression.get_variable('thickness')
+            for r in results
+        ]
+        assert values == [0.5, 1.0, 1.5, 2.0]
+
+    def test_bad_format(self, tmp_path):
+        with pytest.raises(ValueError, match="Unsupported output format"):
+            regenerate_batch(make_template(tmp_path), [], str(tmp_path), output_format='.svg')
+
+
+class TestCommandLine:
+    def test_main(self, tmp_path, capsys):
+        template = make_template(tmp_path, "bracket.belcadx")
+        table = write_table(tmp_path, "part,thickness\nA,1\nB,3\n")
+        out = str(tmp_path / "out")
+        status = main([template, table, out, '--format', '.belcadx',
+                       '--name-column', 'part', '-j', '1'])
+        captured = capsys.readouterr()
+        assert status == 1
+        assert "Regenerated 1 of 2 variants" in captured.out
+        assert "Row 2:" in captured.err
+        assert os.listdir(out) == ['A.belcadx']
@@ -0,0 +1,309 @@
+"""
+Unit tests for BelfryCAD/utils/cad_expression.py.
+"""
+
+import gc
+import math
+import pickle
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from BelfryCAD.utils.cad_datum import CadDatum
+from BelfryCAD.utils.cad_expression import (
+    CadExpression, CompiledExpression, compile_expression, compile_vectorized,
+    tokenize,
+)
+
+
+def make_expression():
+    return CadExpression({
+        'a': "2.5",
+        'b': "$a * 3 - 1",
+        'c': "sqrt($b)² + $a³",
+        'angle': "30°",
+    })
+
+
+class TestTokenize:
+    def test_token_types(self):
+        assert tokenize("2.5e1 * $a_1 + sin(30º)'") == [
+            ('NUMBER', '2.5e1'), ('MULTIPLY', '*'), ('VARIABLE', '$a_1'),
+            ('PLUS', '+'), ('IDENT', 'sin'), ('LPAREN', '('), ('NUMBER', '30'),
+            ('DEGREE_SUFFIX', 'º'), ('RPAREN', ')'), ('FOOT_SUFFIX', "'"),
+        ]
+
+    def test_double_star_is_power(self):
+        assert tokenize("2**3") == [('NUMBER', '2'), ('POWER', '**'), ('NUMBER', '3')]
+        assert CadExpression().evaluate("2 ** 3 ** 2") == 512.0
+
+    def test_invalid_character(self):
+        with pytest.raises(ValueError, match="position 2"):
+            tokenize("1 # 2")
+
+
+class TestEvaluate:
+    @pytest.mark.parametrize("expression, expected", [
+        ("2 + 3 * 4", 14.0),
+        ("(2 + 3) * 4", 20.0),
+        ("2 ^ 3 ^ 2", 512.0),
+        ("-2 * -3", 6.0),
+        ("2 ^ -1", 0.5),
+        ("7 % 4", 3.0),
+        ("(1 + 2)²", 9.0),
+        ("2³", 8.0),
+        ("2' + 3\"", 27.0),
+        ("deg(180°)", 180.0),
+        ("max(1, 5, 3) - min(4, 2)", 3.0),
+        ("pi + π - 2 * phi + ɸ + e", 2 * math.pi - (1 + math.sqrt(5)) / 2 + math.e),
+    ])
+    def test_values(self, expression, expected):
+        assert CadExpression().evaluate(expression) == pytest.approx(expected)
+
+    def test_parameters(self):
+        expr = make_expression()
+        assert expr.get_variable('b') == pytest.approx(6.5)
+        assert expr.evaluate("$c") == pytest.approx(6.5 + 2.5 ** 3)
+        assert expr.evaluate("sin($angle)") == pytest.approx(0.5)
+
+    @pytest.mark.parametrize("expression, message", [
+        ("", "Empty expression"),
+        ("1 / 0", "Division by zero"),
+        ("1 % 0", "Modulo by zero"),
+        ("2 +", "Unexpected token"),
+        ("(2 + 3", "Expected RPAREN"),
+        ("2 3", "Unexpected token"),
+        ("radius", "Unknown identifier"),
+        ("nope(1)", "Unknown function"),
+        ("sqrt(-1)", "Error in function 'sqrt'"),
+        ("$missing", "Variable 'missing' not found"),
+    ])
+    def test_errors(self, expression, message):
+        with pytest.raises(ValueError, match=message):
+            make_expression().evaluate(expression)
+
+    def test_cycles_detected(self):
+        expr = make_expression()
+        expr.set_variable('a', "$c / 2")
+        with pytest.raises(ValueError, match="Cyclic dependency"):
+            expr.evaluate("$b")
+        expr.set_variable('a', "1")
+        assert expr.evaluate("$b") == pytest.approx(2.0)
+
+    def test_parameter_changes_seen(self):
+        expr = make_expression()
+        assert expr.evaluate("$b") == pytest.approx(6.5)
+        expr.set_variable('a', "1")
+        assert expr.evaluate("$b") == pytest.approx(2.0)
+        expr.expressions = {'a': "10", 'b': "$a + 1"}
+        assert expr.evaluate("$b") == pytest.approx(11.0)
+
+
+class TestCompile:
+    def test_compiled_once(self):
+        compiled = compile_expression("$a * 2 + 1")
+        assert isinstance(compiled, CompiledExpression)
+        assert compile_expression("$a * 2 + 1") is compiled
+        assert make_expression().compile("$a * 2 + 1") is compiled
+
+    def test_referenced_variables(self):
+        assert compile_expression("$a + max($b, 2) * $a").variables == {'a', 'b'}
+        assert compile_expression("pi * 2").variables == frozenset()
+
+    def test_compiled_with_lookup(self):
+        compiled = compile_expression("$x² + $y")
+        values = {'x': 3.0, 'y': 1.0}
+        assert compiled(values.__getitem__) == 10.0
+
+    def test_syntax_errors_raised_by_compile(self):
+        with pytest.raises(ValueError, match="Unknown function"):
+            compile_expression("nope($a)")
+
+
+def make_chain():
+    """thickness -> depth -> volume, with an unrelated width."""
+    return CadExpression({
+        'thickness': "2",
+        'width': "10",
+        'depth': "$thickness * 3",
+        'volume': "$depth * $width * $thickness",
+    })
+
+
+class TestDependencies:
+    def test_values_memoized(self):
+        expr = make_chain()
+        assert expr.get_variable('volume') == pytest.approx(120.0)
+        assert expr._values == {
+            'thickness': 2.0, 'width': 10.0, 'depth': 6.0, 'volume': 120.0}
+
+    def test_downstream_in_topological_order(self):
+        expr = make_chain()
+        assert expr.get_downstream(['thickness']) == ['thickness', 'depth', 'volume']
+        assert expr.get_downstream(['width']) == ['width', 'volume']
+        assert expr.get_downstream(['volume']) == ['volume']
+
+    def test_change_invalidates_downstream_only(self):
+        expr = make_chain()
+        expr.get_variable('volume')
+        changes = []
+        expr.add_listener(lambda names, datums: changes.append(names))
+        expr.set_variable('thickness', "3")
+        assert changes == [['thickness', 'depth', 'volume']]
+        assert expr._values == {'width': 10.0}
+        assert expr.get_variable('volume') == pytest.approx(270.0)
+
+    def test_edits_through_dict(self):
+        expr = make_chain()
+        expr.get_variable('volume')
+        expr.expressions['depth'] = "$width"
+        assert expr.get_downstream(['thickness']) == ['thickness', 'volume']
+        assert expr.get_variable('volume') == pytest.approx(200.0)
+        del expr.expressions['width']
+        with pytest.raises(ValueError, match="'width' not found"):
+            expr.get_variable('volume')
+        expr.remove_variable('volume')
+        assert 'volume' not in expr.expressions
+
+    def test_reorder_keeps_values(self):
+        expr = make_chain()
+        expr.get_variable('volume')
+        changes = []
+        expr.add_listener(lambda names, datums: changes.append(names))
+        expr.expressions = dict(reversed(list(expr.expressions.items())))
+        assert list(expr.expressions)[0] == 'volume'
+        assert not changes
+        assert 'volume' in expr._values
+        expr.expressions = {'thickness': "1"}
+        assert changes and set(changes[0]) == {'thickness', 'width', 'depth', 'volume'}
+        assert expr.get_variable('thickness') == 1.0
+
+    def test_cycle_introduced_and_removed(self):
+        expr = make_chain()
+        expr.get_variable('volume')
+        expr.set_variable('thickness', "$volume / 100")
+        with pytest.raises(ValueError, match="Cyclic dependency"):
+            expr.get_variable('depth')
+        expr.set_variable('thickness', "1")
+        assert expr.get_variable('volume') == pytest.approx(30.0)
+
+
+class TestDatums:
+    def test_affected_datums_notified(self):
+        expr = make_chain()
+        deep = CadDatum(expr, "$volume / 2")
+        shallow = CadDatum(expr, "$width + 1")
+        fixed = CadDatum(expr, 4.0)
+        seen = []
+        expr.add_listener(lambda names, datums: seen.append(datums))
+        expr.set_variable('thickness', "1")
+        assert seen == [[deep]]
+        assert deep.value is None
+        assert shallow.value == 11.0
+        assert float(deep) == pytest.approx(15.0)
+        assert float(fixed) == 4.0
+
+    def test_datum_expression_changes_tracked(self):
+        expr = make_chain()
+        datum = CadDatum(expr, "$depth")
+        datum.set("$width")
+        seen = []
+        expr.add_listener(lambda names, datums: seen.append(datums))
+        expr.set_variable('thickness', "1")
+        datum.set(3.0)
+        expr.set_variable('width', "2")
+        assert seen == [[], []]
+        assert float(datum) == 3.0
+
+    def test_collected_datums_forgotten(self):
+        expr = make_chain()
+        datum = CadDatum(expr, "$width + 1")
+        assert expr._datum_references['width']
+        del datum
+        gc.collect()
+        assert not expr._datums
+        assert not expr._datum_variables
+        assert not expr._datum_references
+
+    def test_pickle(self):
+        expr = make_chain()
+        datum = CadDatum(expr, "$width + 1")
+        copied_datum = pickle.loads(pickle.dumps(datum))
+        copied = copied_datum.cad_expr
+        assert copied.expressions == expr.expressions
+        assert copied.get_variable('volume') == expr.get_variable('volume')
+        copied.set_variable('width', "20")
+        assert float(copied_datum) == 21.0
+        assert float(datum) == 11.0
+        assert pickle.loads(pickle.dumps(expr)).expressions == expr.expressions
+
+    def test_listener_removed(self):
+        expr = make_chain()
+        seen = []
+        listener = lambda names, datums: seen.append(names)
+        expr.add_listener(listener)
+        expr.remove_listener(listener)
+        expr.set_variable('width', "1")
+        assert not seen
+
+
+class TestDesignTable:
+    @pytest.mark.parametrize("expression", [
+        "sin(30°) + cos($a) * tan(0.3)",
+        "atan2($a, 2) + hypot(3, $a, 1) - pow($a, 0.5)",
+        "ln($a) + log10($a) + log2($a) + exp(-$a) + sqrt($a)",
+        "floor($a * 1.7) + ceil($a) + round($a * 3) + round($a / 3)",
+        "abs(-$a) * sign($a - 3) + min($a, 2, 3) - max(1, $a)",
+        "deg(rad($a)) + asin(0.5) + acos(0.5) + atan(1)",
+        "($a % 1.5) ^ 2 + $a² - $a³ + 2' + $a\"",
+    ])
+    def test_vectorized_matches_scalar(self, expression):
+        rows = [1.0, 2.5, 4.0, 7.25]
+        vectorized = compile_vectorized(expression)(lambda name: np.array(rows))
+        expected = [compile_expression(expression)(lambda name: a) for a in rows]
+        assert vectorized == pytest.approx(expected)
+        assert set(CadExpression._ARRAY_FUNCTIONS) == set(CadExpression._FUNCTIONS)
+
+    def test_rows_override_parameters(self):
+        expr = make_chain()
+        parameters, datums = expr.evaluate_table(
+            [{'thickness': 1}, {}, {'thickness': "4", 'width': 5}],
+            [CadDatum(expr, "$volume / 2"), "$depth + 1", CadDatum(expr, 7.0)])
+        assert parameters['thickness'].tolist() == [1.0, 2.0, 4.0]
+        assert parameters['width'].tolist() == [10.0, 10.0, 5.0]
+        assert parameters['depth'].tolist() == [3.0, 6.0, 12.0]
+        assert parameters['volume'].tolist() == [30.0, 120.0, 240.0]
+        assert [d.tolist() for d in datums] == [
+            [15.0, 60.0, 120.0], [4.0, 7.0, 13.0], [7.0, 7.0, 7.0]]
+        # The table leaves the parameters themselves alone.
+        assert expr.get_variable('volume') == pytest.approx(120.0)
+
+    def test_derived_parameter_overridden_in_some_rows(self):
+        expr = make_chain()
+        parameters, _ = expr.evaluate_table([{'depth': 1}, {'depth': ''}, {'thickness': 3}])
+        assert parameters['depth'].tolist() == [1.0, 6.0, 9.0]
+        assert parameters['volume'].tolist() == [20.0, 120.0, 270.0]
+
+    def test_failing_rows_give_nan(self):
+        expr = make_chain()
+        expr.set_variable('ratio', "$width / ($thickness - 2) % 7")
+        expr.set_variable('root', "sqrt($thickness - 3)")
+        parameters, _ = expr.evaluate_table([{'thickness': 1}, {'thickness': 2}, {'thickness': 4}])
+        assert np.isnan(parameters['ratio']).tolist() == [False, True, False]
+        assert np.isnan(parameters['root']).tolist() == [True, True, False]
+        assert parameters['ratio'][2] == pytest.approx(5.0)
+
+    def test_errors(self):
+        expr = make_chain()
+        with pytest.raises(ValueError, match="'height' not found"):
+            expr.evaluate_table([{'height': 1}])
+        expr.set_variable('thickness', "$volume / 100")
+        with pytest.raises(ValueError, match="Cyclic dependency"):
+            expr.evaluate_table([{'width': 1}])
+        # Overriding every row breaks the cycle.
+        parameters, _ = expr.evaluate_table([{'thickness': 1}, {'thickness': 2}])
+        assert parameters['volume'].tolist() == [30.0, 120.0]
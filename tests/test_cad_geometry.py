@@ -1,14 +1,16 @@
 """
 Comprehensive tests for BelfryCAD cad_geometry module.
-Covers: Point2D, Line2D, Circle, Arc, Ellipse, BezierPath,
+Covers: Point2D, PointArray, Line2D, Circle, Arc, Ellipse, BezierPath,
         Polygon, PolyLine2D, Rect, Region, Transform2D, shapes, SpurGear
 """
 
+import copy
 import math
 import pytest
 import numpy as np
 
 from BelfryCAD.cad_geometry.point import Point2D
+from BelfryCAD.cad_geometry.point_array import PointArray
 from BelfryCAD.cad_geometry.line import Line2D
 from BelfryCAD.cad_geometry.circle import Circle
 from BelfryCAD.cad_geometry.arc import Arc
@@ -286,6 +288,126 @@ class TestPoint2D:
         assert "Point2D" in repr(p)
 
 
+# ════════════════════════════════════════════════════════════════════
+# PointArray
+# ════════════════════════════════════════════════════════════════════
+
+class TestPointArray:
+    def _points(self):
+        return [Point2D(0, 0), Point2D(1, 2), Point2D(3, -1)]
+
+    def test_init_and_coords(self):
+        pa = PointArray(self._points())
+        assert len(pa) == 3
+        assert pa.coords.dtype == np.float64 and pa.coords.shape == (3, 2)
+        assert pa.xs.tolist() == [0, 1, 3]
+        assert PointArray([(1, 2), [3, 4]]).coords.tolist() == [[1, 2], [3, 4]]
+        assert len(PointArray()) == 0
+
+    def test_from_array_is_zero_copy(self):
+        arr = np.array([[0.0, 0.0], [1.0, 1.0]])
+        pa = PointArray.from_array(arr)
+        arr[1, 0] = 5.0
+        assert pa[1] == Point2D(5, 1)
+        pa.coords[0] = (2, 3)
+        assert arr[0].tolist() == [2, 3]
+        assert PointArray(arr).coords is not arr
+
+    def test_indexing_materializes_points(self):
+        pa = PointArray(self._points())
+        assert isinstance(pa[1], Point2D) and pa[1] == Point2D(1, 2)
+        assert pa[-1] == Point2D(3, -1)
+        assert list(pa) == self._points()
+        assert list(reversed(pa)) == self._points()[::-1]
+        with pytest.raises(IndexError):
+            pa[3]
+
+    def test_list_operations(self):
+        pa = PointArray(self._points())
+        assert isinstance(pa[:2], PointArray) and pa[:2] == self._points()[:2]
+        pa.append(Point2D(7, 7))
+        pa.insert(0, (9, 9))
+        del pa[1]
+        pa[0] = Point2D(8, 8)
+        assert pa == [Point2D(8, 8), Point2D(1, 2), Point2D(3, -1), Point2D(7, 7)]
+        assert pa.pop() == Point2D(7, 7)
+        pa.reverse()
+        assert pa.index(Point2D(8, 8)) == 2
+        assert Point2D(1, 2) in pa and Point2D(1, 3) not in pa
+        pa[1:2] = [Point2D(0, 1), Point2D(0, 2)]
+        assert len(pa) == 4 and pa[2] == Point2D(0, 2)
+
+    def test_concatenation_and_equality(self):
+        pa = PointArray(self._points())
+        assert [Point2D(5, 5)] + pa + [Point2D(6, 6)] == \
+            [Point2D(5, 5)] + self._points() + [Point2D(6, 6)]
+        assert pa != [Point2D(0, 0)]
+        assert pa != "not points"
+        copied = pa.copy()
+        copied[0] = Point2D(1, 1)
+        assert pa[0] == Point2D(0, 0)
+
+    def test_append_grows_storage(self):
+        pa = PointArray()
+        for i in range(100):
+            pa.append(Point2D(i, -i))
+        pa.extend([Point2D(100, -100)])
+        assert len(pa) == 101
+        assert pa.coords[:, 0].tolist() == list(range(101))
+
+    def test_transforms_match_point2d(self):
+        points = self._points()
+        pa = PointArray(points)
+        center = Point2D(1, 1)
+        assert pa.translate(Point2D(1, 2)) == [p.translate(Point2D(1, 2)) for p in points]
+        assert pa.rotate(0.3, center) == [p.rotate(0.3, center) for p in points]
+        assert pa.scale(2, center) == [p.scale(2, center) for p in points]
+        assert pa.scale(Point2D(2, 3)) == [p.scale(Point2D(2, 3)) for p in points]
+        t = Transform2D.rotation(0.5) @ Transform2D.translation(1, 2)
+        assert pa.transform(t) == [p.transform(t) for p in points]
+        assert pa == points
+
+    def test_bounds(self):
+        assert PointArray(self._points()).get_bounds() == (0, -1, 3, 2)
+        assert PointArray().get_bounds() == (0, 0, 0, 0)
+
+    def test_deepcopy(self):
+        pa = PointArray(self._points())
+        copied = copy.deepcopy(pa)
+        assert copied == pa and copied.coords is not pa.coords
+
+    def test_shapes_store_point_arrays(self):
+        points = self._points() + [Point2D(0, 3)]
+        for shape in (Polygon(points), PolyLine2D(points), BezierPath(points)):
+            assert isinstance(shape.points, PointArray)
+            assert shape.points == points
+        poly = Polygon(points)
+        moved = poly.rotate(0.25, Point2D(1, 1)).translate(Point2D(2, 0))
+        assert moved.points == [p.rotate(0.25, Point2D(1, 1)).translate(Point2D(2, 0))
+                                for p in points]
+        assert moved.area == pytest.approx(poly.area)
+        polyline = PolyLine2D(points)
+        polyline.points = list(reversed(points))
+        assert isinstance(polyline.points, PointArray)
+
+    def test_shape_transforms_adopt_results(self, monkeypatch):
+        points = self._points() + [Point2D(0, 3)]
+        shapes = [Polygon(points), PolyLine2D(points), BezierPath(points)]
+        t = Transform2D.rotation(0.5)
+        monkeypatch.setattr(
+            PointArray, "__init__", lambda *args: pytest.fail("points copied"))
+        moved = [
+            (shape.translate(Point2D(1, 2)), shape.rotate(0.3),
+             shape.scale(2), shape.transform(t))
+            for shape in shapes
+        ]
+        monkeypatch.undo()
+        for shape, results in zip(shapes, moved):
+            assert [type(result) for result in results] == [type(shape)] * 4
+        assert moved[0][0].points == [p.translate(Point2D(1, 2)) for p in points]
+        assert moved[2][3].points == [p.transform(t) for p in points]
+
+
 # ════════════════════════════════════════════════════════════════════
 # Transform2D
 # ════════════════════════════════════════════════════════════════════
@@ -0,0 +1,102 @@
+"""
+Unit tests for BelfryCAD/utils/closest_points.py.
+"""
+
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from BelfryCAD.utils.closest_points import (
+    bezier_closest_part, bezier_closest_parts, ellipse_closest_angle,
+    ellipse_closest_angles,
+)
+
+# A two-segment path with an S bend, so most points have several local minima.
+PATH = np.array([
+    [0.0, 0.0], [1.0, 3.0], [2.0, 3.0], [3.0, 0.0],
+    [4.0, -3.0], [5.0, -3.0], [6.0, 0.0],
+])
+
+
+def query_points(count=200, seed=1):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-6.0, 8.0, count), rng.uniform(-6.0, 6.0, count)
+
+
+def ellipse_distances(major_r, minor_r, x, y, t):
+    return np.hypot(major_r * np.cos(t) - x, minor_r * np.sin(t) - y)
+
+
+def path_points(t):
+    segs = (len(PATH) - 1) // 3
+    scaled = np.asarray(t) * segs
+    seg = np.minimum(scaled.astype(int), segs - 1)
+    u = (scaled - seg)[..., None]
+    p0, p1, p2, p3 = (PATH[3 * seg + i] for i in range(4))
+    v = 1.0 - u
+    return v ** 3 * p0 + 3 * v * v * u * p1 + 3 * v * u * u * p2 + u ** 3 * p3
+
+
+class TestEllipseClosestAngles:
+    def test_matches_brute_force(self):
+        x, y = query_points()
+        t = ellipse_closest_angles(5.0, 2.0, x, y)
+        dense = np.linspace(0.0, 2.0 * np.pi, 200001)
+        best = ellipse_distances(5.0, 2.0, x[:, None], y[:, None], dense).min(axis=1)
+        # The dense samples are slightly off the true minima.
+        assert np.all(ellipse_distances(5.0, 2.0, x, y, t) <= best + 1e-12)
+
+    def test_inside_near_center(self):
+        # The closest points are at the ends of the minor axis.
+        t = ellipse_closest_angles(5.0, 2.0, [0.0, 0.0], [0.2, -0.2])
+        assert np.sin(t) == pytest.approx([1.0, -1.0])
+
+    def test_circle(self):
+        t = ellipse_closest_angles(3.0, 3.0, [1.0, 0.0, -6.0], [1.0, 4.0, 0.0])
+        assert np.cos(t) == pytest.approx([np.sqrt(0.5), 0.0, -1.0], abs=1e-12)
+
+    def test_scalar_matches_batch(self):
+        x, y = query_points(20)
+        batch = ellipse_closest_angles(4.0, 1.5, x, y)
+        for xi, yi, ti in zip(x, y, batch):
+            t = ellipse_closest_angle(4.0, 1.5, xi, yi)
+            assert ellipse_distances(4.0, 1.5, xi, yi, t) == pytest.approx(
+                ellipse_distances(4.0, 1.5, xi, yi, ti), abs=1e-12)
+
+    def test_keeps_shape(self):
+        assert ellipse_closest_angles(2.0, 1.0, np.zeros((3, 4)), 1.0).shape == (3, 4)
+
+
+class TestBezierClosestParts:
+    def test_matches_brute_force(self):
+        x, y = query_points()
+        t = bezier_closest_parts(PATH, x, y)
+        queries = np.column_stack([x, y])
+        dense = path_points(np.linspace(0.0, 1.0, 100001))
+        best = np.array([np.hypot(*(dense - q).T).min() for q in queries])
+        found = np.hypot(*(path_points(t) - queries).T)
+        assert np.all(found <= best + 1e-12)
+
+    def test_ends_are_clamped(self):
+        t = bezier_closest_parts(PATH, [-2.0, 8.0], [-1.0, 1.0])
+        assert t == pytest.approx([0.0, 1.0])
+
+    def test_on_curve(self):
+        t = np.array([0.1, 0.37, 0.5, 0.81])
+        x, y = path_points(t).T
+        assert bezier_closest_parts(PATH, x, y) == pytest.approx(t, abs=1e-9)
+
+    def test_scalar_matches_batch(self):
+        x, y = query_points(20)
+        batch = bezier_closest_parts(PATH, x, y)
+        single = [bezier_closest_part(PATH, xi, yi) for xi, yi in zip(x, y)]
+        queries = np.column_stack([x, y])
+        assert np.hypot(*(path_points(single) - queries).T) == pytest.approx(
+            np.hypot(*(path_points(batch) - queries).T), abs=1e-12)
+
+    def test_keeps_shape(self):
+        assert bezier_closest_parts(PATH, np.zeros((2, 5)), 0.5).shape == (2, 5)
@@ -0,0 +1,92 @@
+"""
+Unit tests for BelfryCAD/utils/conflict_isolation.py.
+"""
+
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from BelfryCAD.utils.conflict_isolation import ConflictIsolator, find_minimal_conflict
+from BelfryCAD.utils.constraints import (
+    ConstrainableLine2D, ConstrainablePoint2D, ConstraintSolver,
+    CoincidentConstraint, HorizontalConstraint, LineLengthConstraint,
+    VerticalConstraint,
+)
+
+
+def make_chain(count):
+    """A chain of unit-length segments between count + 1 points."""
+    s = ConstraintSolver()
+    points = [
+        ConstrainablePoint2D(s, (i * 1.0, 0.1 * (i % 2)), label=f"p{i}")
+        for i in range(count + 1)
+    ]
+    lines = [ConstrainableLine2D(s, p, q) for p, q in zip(points, points[1:])]
+    for i, line in enumerate(lines):
+        s.add_constraint(LineLengthConstraint(line, 1.0), f"len{i}")
+    return s, points, lines
+
+
+def is_feasible(solver, labels):
+    sub = solver.make_subproblem(
+        [solver.constraints[solver.constraint_labels.index(label)] for label in labels],
+        labels)
+    sub.gauss_newton_solve(tol=1e-10)
+    return sub.residual_norm <= 1e-6
+
+
+class TestFindMinimalConflict:
+    def test_feasible_has_no_conflict(self):
+        s, *_ = make_chain(10)
+        assert find_minimal_conflict(s) == []
+
+    def test_conflict_on_one_line(self):
+        s, points, lines = make_chain(40)
+        s.add_constraint(HorizontalConstraint(points[20], points[21]), "h")
+        s.add_constraint(VerticalConstraint(points[20], points[21]), "v")
+        s.solve()
+        assert find_minimal_conflict(s) == ["len20", "h", "v"]
+
+    def test_conflict_along_chain(self):
+        s, points, _ = make_chain(30)
+        a = ConstrainablePoint2D(s, (0.0, 0.0), fixed=True, label="a")
+        b = ConstrainablePoint2D(s, (8.0, 0.0), fixed=True, label="b")
+        s.add_constraint(CoincidentConstraint(points[0], a), "anchor_a")
+        s.add_constraint(CoincidentConstraint(points[5], b), "anchor_b")
+        s.solve()
+        conflict = find_minimal_conflict(s)
+        assert conflict == ["len0", "len1", "len2", "len3", "len4", "anchor_a", "anchor_b"]
+        assert not is_feasible(s, conflict)
+        for label in conflict:
+            assert is_feasible(s, [other for other in conflict if other != label])
+
+    def test_variables_left_alone(self):
+        s, points, _ = make_chain(10)
+        s.add_constraint(HorizontalConstraint(points[3], points[4]), "h")
+        s.add_constraint(VerticalConstraint(points[3], points[4]), "v")
+        s.solve()
+        before = list(s.variables)
+        find_minimal_conflict(s)
+        assert s.variables == before
+
+
+class TestConflictIsolator:
+    def test_memoized_solves_stay_few(self):
+        s, points, _ = make_chain(100)
+        s.add_constraint(HorizontalConstraint(points[50], points[51]), "h")
+        s.add_constraint(VerticalConstraint(points[50], points[51]), "v")
+        isolator = ConflictIsolator(s)
+        assert isolator.find() == ["len50", "h", "v"]
+        assert isolator.solves < 40
+
+    def test_order_prefers_earlier_conflict(self):
+        s, points, lines = make_chain(4)
+        s.add_constraint(LineLengthConstraint(lines[0], 2.0), "long0")
+        s.add_constraint(LineLengthConstraint(lines[3], 2.0), "long3")
+        order = list(range(len(s.constraints)))
+        assert ConflictIsolator(s).find(order) == ["len0", "long0"]
+        order.reverse()
+        assert ConflictIsolator(s).find(order) == ["len3", "long3"]
@@ -0,0 +1,118 @@
+"""
+Unit tests for BelfryCAD/utils/constraint_compiler.py.
+"""
+
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from BelfryCAD.utils.constraint_compiler import _compile_source, compile_system
+from BelfryCAD.utils.constraints import (
+    ConstrainableLine2D, ConstrainablePoint2D, ConstraintSolver,
+    CoincidentConstraint, DragTargetConstraint, HorizontalConstraint,
+    LineLengthConstraint, LinesPerpendicularConstraint,
+    PointIsOnLineSegmentConstraint, SparseConstraintSystem,
+)
+
+
+def make_line(solver, x0, y0, x1, y1, label="line"):
+    p1 = ConstrainablePoint2D(solver, (x0, y0), label=f"{label} start")
+    p2 = ConstrainablePoint2D(solver, (x1, y1), label=f"{label} end")
+    return ConstrainableLine2D(solver, p1, p2, label=label)
+
+
+def make_mixed_solver():
+    """Kernel, non-kernel and callable constraints, soft ones, and a fixed point."""
+    s = ConstraintSolver()
+    line1 = make_line(s, 0.0, 0.0, 3.0, 1.0, "a")
+    line2 = make_line(s, 1.0, 2.0, 4.0, 6.5, "b")
+    anchor = ConstrainablePoint2D(s, (0.2, -0.1), fixed=True, label="anchor")
+    s.add_constraint(CoincidentConstraint(line1.p1, anchor))
+    s.add_constraint(LineLengthConstraint(line1, 3.0))
+    s.add_constraint(LineLengthConstraint(line2, 5.0))
+    s.add_constraint(HorizontalConstraint(line1.p2, line2.p1))
+    s.add_constraint(PointIsOnLineSegmentConstraint(line2.p2, line1))
+    s.add_constraint(lambda x: [x[line2.p2.xi] - 2.0 * x[line1.p2.yi]])
+    # Shares its points between both lines, so kernel entries collide.
+    s.add_constraint(LinesPerpendicularConstraint(
+        line1, ConstrainableLine2D(s, line1.p2, line1.p1, label="back")))
+    s.add_soft_constraint(DragTargetConstraint(line2.p2, (4.0, 7.0)), weight=0.1)
+    s.add_soft_constraint(LineLengthConstraint(line2, 4.0), weight=0.5)
+    return s, line1, line2
+
+
+class TestCompiledSystem:
+    def test_matches_interpreted_system(self):
+        s, *_ = make_mixed_solver()
+        free = s.get_free_indices()
+        interpreted = SparseConstraintSystem(s, free)
+        compiled = SparseConstraintSystem(s, free, compiled=True)
+        assert interpreted.compiled is None
+        assert compiled.compiled is not None
+        x = interpreted.gather(s.variables)
+        residuals, jacobian = compiled.evaluate(x)
+        assert residuals == pytest.approx(interpreted.residuals(x))
+        assert compiled.residuals(x) == pytest.approx(interpreted.residuals(x))
+        assert jacobian.toarray() == pytest.approx(
+            interpreted.jacobian(x).toarray(), abs=1e-12)
+        assert compiled.jacobian(x).toarray() == pytest.approx(
+            jacobian.toarray(), abs=1e-12)
+
+    def test_residuals_only(self):
+        s, *_ = make_mixed_solver()
+        system = SparseConstraintSystem(s, s.get_free_indices())
+        residuals, data = compile_system(system)(system.gather(s.variables), False)
+        assert data is None
+        assert len(residuals) == system.num_rows
+
+    def test_refreshed_parameters_apply(self):
+        s, *_ = make_mixed_solver()
+        s.compile_systems = True
+        system = s._get_system(s.get_free_indices())
+        x = system.gather(s.variables)
+        before = system.residuals(x).copy()
+        s.constraints[1].length = 4.0
+        system = s._get_system(s.get_free_indices())
+        assert system.residuals(x)[2] == pytest.approx(before[2] - 1.0)
+
+    def test_same_topology_reuses_code(self):
+        first, *_ = make_mixed_solver()
+        second, *_ = make_mixed_solver()
+        code1 = compile_system(SparseConstraintSystem(first, first.get_free_indices()))
+        hits = _compile_source.cache_info().hits
+        code2 = compile_system(SparseConstraintSystem(second, second.get_free_indices()))
+        assert code1.source == code2.source
+        assert _compile_source.cache_info().hits == hits + 1
+
+    def test_source_is_straight_line_for_kernels(self):
+        s = ConstraintSolver()
+        line = make_line(s, 0.0, 0.0, 1.0, 1.0)
+        s.add_constraint(LineLengthConstraint(line, 2.0))
+        s.add_constraint(HorizontalConstraint(line.p1, line.p2))
+        system = SparseConstraintSystem(s, s.get_free_indices())
+        source = compile_system(system).source
+        assert "LineLengthConstraint x 1" in source
+        assert "HorizontalConstraint x 1" in source
+        assert "ENTRIES" not in source
+
+
+class TestCompiledSolves:
+    @pytest.mark.parametrize("method", ["gauss_newton_solve", "solve"])
+    def test_compiled_solve_matches(self, method):
+        plain, *_ = make_mixed_solver()
+        compiled, *_ = make_mixed_solver()
+        compiled.compile_systems = True
+        getattr(plain, method)()
+        getattr(compiled, method)()
+        assert compiled._system.compiled is not None
+        assert compiled.variables == pytest.approx(plain.variables, abs=1e-6)
+        assert compiled.residual_norm == pytest.approx(plain.residual_norm, abs=1e-8)
+
+    def test_subproblems_inherit_compiling(self):
+        s, *_ = make_mixed_solver()
+        s.compile_systems = True
+        sub = s.make_subproblem(s.constraints[:2], s.constraint_labels[:2])
+        assert sub.compile_systems
@@ -0,0 +1,54 @@
+"""
+Unit tests for BelfryCAD/utils/constraint_diagnostics.py.
+"""
+
+import sys
+import os
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from BelfryCAD.utils import constraint_diagnostics
+from BelfryCAD.utils.constraint_diagnostics import analyze_jacobian
+
+
+class TestAnalyzeJacobian:
+    def test_full_rank(self):
+        diagnostics = analyze_jacobian(np.identity(3))
+        assert diagnostics.rank == 3
+        assert diagnostics.dof == 0
+        assert diagnostics.redundant_rows == []
+        assert diagnostics.exact
+
+    def test_duplicate_row_is_redundant(self):
+        jacobian = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [2.0, 0.0, 0.0]])
+        diagnostics = analyze_jacobian(sparse.csr_matrix(jacobian))
+        assert diagnostics.rank == 2
+        assert diagnostics.dof == 1
+        assert len(diagnostics.redundant_rows) == 1
+        assert diagnostics.redundant_rows[0] in (0, 2)
+
+    def test_columns_dof(self):
+        # x0 == x1, with x2 and x3 untouched.
+        jacobian = np.array([[1.0, -1.0, 0.0, 0.0]])
+        diagnostics = analyze_jacobian(jacobian)
+        assert diagnostics.dof == 3
+        assert diagnostics.columns_dof([0, 1]) == 1
+        assert diagnostics.columns_dof([0]) == 1
+        assert diagnostics.columns_dof([2, 3]) == 2
+        assert diagnostics.columns_dof([]) == 0
+
+    def test_no_free_columns(self):
+        diagnostics = analyze_jacobian(np.zeros((2, 0)))
+        assert diagnostics.rank == 0
+        assert diagnostics.redundant_rows == [0, 1]
+
+    def test_large_jacobian_is_not_factored(self, monkeypatch):
+        monkeypatch.setattr(constraint_diagnostics, "RANK_ANALYSIS_LIMIT", 2)
+        diagnostics = analyze_jacobian(np.identity(3))
+        assert not diagnostics.exact
+        assert diagnostics.rank == 3
+        assert diagnostics.columns_dof([0]) is None
@@ -0,0 +1,84 @@
+"""
+Unit tests for BelfryCAD/utils/constraint_plan.py.
+"""
+
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from BelfryCAD.utils.constraint_plan import (
+    ConstraintCluster,
+    biconnected_components,
+    plan_component,
+)
+
+
+def make_adjacency(edges):
+    adjacency = {}
+    for a, b in edges:
+        adjacency.setdefault(a, set()).add(b)
+        adjacency.setdefault(b, set()).add(a)
+    return adjacency
+
+
+def block_nodes(blocks):
+    return sorted(sorted({n for edge in block for n in edge}) for block in blocks)
+
+
+class TestBiconnectedComponents:
+    def test_path_splits_at_every_node(self):
+        blocks = biconnected_components(make_adjacency([(1, 2), (2, 3), (3, 4)]))
+        assert block_nodes(blocks) == [[1, 2], [2, 3], [3, 4]]
+
+    def test_cycle_is_one_block(self):
+        blocks = biconnected_components(make_adjacency([(1, 2), (2, 3), (3, 1)]))
+        assert block_nodes(blocks) == [[1, 2, 3]]
+        assert len(blocks[0]) == 3
+
+    def test_bowtie(self):
+        edges = [(1, 2), (2, 3), (3, 1), (3, 4), (4, 5), (5, 3)]
+        blocks = biconnected_components(make_adjacency(edges))
+        assert block_nodes(blocks) == [[1, 2, 3], [3, 4, 5]]
+
+    def test_isolated_node_has_no_block(self):
+        adjacency = make_adjacency([(1, 2)])
+        adjacency[3] = set()
+        assert block_nodes(biconnected_components(adjacency)) == [[1, 2]]
+
+    def test_long_path_does_not_recurse(self):
+        count = 5000
+        blocks = biconnected_components(
+            make_adjacency([(i, i + 1) for i in range(count)]))
+        assert len(blocks) == count
+
+
+class TestPlanComponent:
+    def test_every_constraint_planned_once(self):
+        pairs = {
+            "a": ("l1", "l2"), "b": ("l2", "l3"), "c": ("l3", "l1"),
+            "d": ("l3", "l4"), "e": ("l4", None), "f": ("l1", "l1"),
+        }
+        plan = plan_component(
+            pairs, {f"l{i}": 4 for i in range(1, 5)}, {cid: 1 for cid in pairs})
+        assert all(isinstance(cluster, ConstraintCluster) for cluster in plan)
+        planned = [cid for cluster in plan for cid in cluster.constraint_ids]
+        assert sorted(planned) == sorted(pairs)
+
+    def test_rigid_cluster_first(self):
+        pairs = {"a": ("l1", "l2"), "b": ("l2", "l3"), "h": ("l3", None)}
+        rows = {"a": 2, "b": 2, "h": 3}
+        plan = plan_component(pairs, {"l1": 4, "l2": 4, "l3": 4}, rows)
+        assert [sorted(cluster.objects) for cluster in plan] == [
+            ["l2", "l3"], ["l1", "l2"]]
+        assert plan[0].shared == set()
+        assert plan[1].shared == {"l2"}
+        assert plan[0].dof == 3
+
+    def test_single_object_component(self):
+        plan = plan_component({"h": ("l1", None)}, {"l1": 4}, {"h": 1})
+        assert len(plan) == 1
+        assert plan[0].objects == {"l1"}
+        assert plan[0].constraint_ids == ["h"]
@@ -5,13 +5,21 @@ Test the ConstraintsManager class functionality.
 
 import sys
 import os
+
+import pytest
+
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from BelfryCAD.models.document import Document
 from BelfryCAD.models.cad_objects.line_cad_object import LineCadObject
 from BelfryCAD.models.cad_objects.circle_cad_object import CircleCadObject
+from BelfryCAD.models.cad_objects.arc_cad_object import ArcCadObject
 from BelfryCAD.cad_geometry import Point2D
-from BelfryCAD.utils.constraints import CoincidentConstraint, HorizontalConstraint
+from BelfryCAD.utils.constraints import (
+    ArcRadiusConstraint, CoincidentConstraint, HorizontalConstraint,
+    LineLengthConstraint, LinesEqualLengthConstraint,
+    PointCoincidentWithArcEndConstraint, VerticalConstraint
+)
 
 
 def test_constraints_manager():
@@ -136,5 +144,697 @@ def test_constraints_manager():
     print("✅ Constraint clearing works")
 
 
+def make_lines(doc, count):
+    """
+    Adds count short lines to the document, with constrainables.  Lines
+    are registered directly, skipping auto-naming to keep big tests fast.
+    """
+    lines = []
+    for i in range(count):
+        line = LineCadObject(
+            document=doc,
+            start_point=Point2D(i, 0),
+            end_point=Point2D(i + 1, 0.5)
+        )
+        line_id = line.object_id
+        doc.objects[line_id] = line
+        line.make_constrainables(doc.constraints_manager.solver)
+        lines.append((line_id, line))
+    return lines
+
+
+def join(doc, name, first, second):
+    """Adds a coincident constraint from first's end to second's start."""
+    (id1, line1), (id2, line2) = first, second
+    constraint = CoincidentConstraint(
+        line1.constraint_end_point, line2.constraint_start_point)
+    assert doc.add_constraint(name, constraint, id1, id2)
+
+
+def component_sets(manager):
+    return sorted(
+        (sorted(c) for c in manager.get_connected_components()), key=len)
+
+
+class TestComponentTracking:
+    def test_union_on_add(self):
+        doc = Document()
+        lines = make_lines(doc, 4)
+        join(doc, "a", lines[0], lines[1])
+        join(doc, "b", lines[2], lines[3])
+        assert len(component_sets(doc.constraints_manager)) == 2
+        join(doc, "c", lines[1], lines[2])
+        assert component_sets(doc.constraints_manager) == [
+            sorted(line_id for line_id, _ in lines)]
+
+    def test_split_on_remove(self):
+        doc = Document()
+        lines = make_lines(doc, 3)
+        join(doc, "a", lines[0], lines[1])
+        join(doc, "b", lines[1], lines[2])
+        doc.remove_constraint("a")
+        manager = doc.constraints_manager
+        assert component_sets(manager) == [sorted([lines[1][0], lines[2][0]])]
+        assert lines[0][0] not in manager.constrained_objects
+
+    def test_parallel_edge_keeps_component(self):
+        doc = Document()
+        lines = make_lines(doc, 2)
+        join(doc, "a", lines[0], lines[1])
+        join(doc, "b", lines[0], lines[1])
+        doc.remove_constraint("a")
+        assert component_sets(doc.constraints_manager) == [
+            sorted(line_id for line_id, _ in lines)]
+
+    def test_single_object_constraint(self):
+        doc = Document()
+        (line_id, line), = make_lines(doc, 1)
+        doc.add_constraint("h", HorizontalConstraint(
+            line.constraint_start_point, line.constraint_end_point), line_id)
+        assert component_sets(doc.constraints_manager) == [[line_id]]
+        doc.remove_constraint("h")
+        assert component_sets(doc.constraints_manager) == []
+
+    def test_dirty_components(self):
+        doc = Document()
+        lines = make_lines(doc, 4)
+        join(doc, "a", lines[0], lines[1])
+        join(doc, "b", lines[2], lines[3])
+        manager = doc.constraints_manager
+        assert len(manager.get_dirty_components()) == 2
+        manager._dirty_objects.clear()
+        manager.mark_object_dirty(lines[3][0])
+        assert manager.get_dirty_components() == [{lines[2][0], lines[3][0]}]
+
+    def test_long_chain_does_not_recurse(self):
+        doc = Document()
+        lines = make_lines(doc, 1500)
+        for i in range(len(lines) - 1):
+            join(doc, f"c{i}", lines[i], lines[i + 1])
+        doc.remove_constraint("c0")
+        sizes = [len(c) for c in component_sets(doc.constraints_manager)]
+        assert sizes == [len(lines) - 1]
+
+
+class TestConstraintIndex:
+    def test_constraint_objects(self):
+        doc = Document()
+        lines = make_lines(doc, 2)
+        join(doc, "a", lines[0], lines[1])
+        manager = doc.constraints_manager
+        assert manager.constraint_objects["a"] == frozenset(
+            [lines[0][0], lines[1][0]])
+        assert manager.get_constraints_for_object(lines[1][0]) == ["a"]
+        doc.remove_constraint("a")
+        assert "a" not in manager.constraint_objects
+        assert manager.get_constraints_for_object(lines[1][0]) == []
+
+    def test_component_constraint_ids_follow_splits(self):
+        doc = Document()
+        lines = make_lines(doc, 4)
+        join(doc, "a", lines[0], lines[1])
+        join(doc, "b", lines[1], lines[2])
+        join(doc, "c", lines[2], lines[3])
+        manager = doc.constraints_manager
+        assert manager.get_component_constraint_ids(lines[0][0]) == {"a", "b", "c"}
+        doc.remove_constraint("b")
+        assert manager.get_component_constraint_ids(lines[0][0]) == {"a"}
+        assert manager.get_component_constraint_ids(lines[3][0]) == {"c"}
+        info = sorted(c['constraint_count'] for c in manager.get_component_info())
+        assert info == [1, 1]
+
+
+class TestComponentSolving:
+    def test_solve_updates_objects(self):
+        doc = Document()
+        lines = make_lines(doc, 2)
+        (id1, line1), (id2, line2) = lines
+        join(doc, "a", lines[0], lines[1])
+        doc.add_constraint("h", HorizontalConstraint(
+            line1.constraint_start_point, line1.constraint_end_point), id1)
+        assert doc.solve_constraints()
+        assert line1.line.start.y == pytest.approx(line1.line.end.y, abs=1e-6)
+        assert line1.line.end.x == pytest.approx(line2.line.start.x, abs=1e-6)
+        assert line1.line.end.y == pytest.approx(line2.line.start.y, abs=1e-6)
+
+    def test_solve_after_remove(self):
+        doc = Document()
+        lines = make_lines(doc, 3)
+        join(doc, "a", lines[0], lines[1])
+        join(doc, "b", lines[1], lines[2])
+        doc.remove_constraint("a")
+        assert doc.solve_constraints()
+        (_, line1), (_, line2) = lines[1], lines[2]
+        assert line1.line.end.x == pytest.approx(line2.line.start.x, abs=1e-6)
+
+    def test_components_solve_independently(self):
+        doc = Document()
+        lines = make_lines(doc, 4)
+        join(doc, "a", lines[0], lines[1])
+        join(doc, "b", lines[2], lines[3])
+        untouched = lines[2][1].line.start
+        manager = doc.constraints_manager
+        manager._dirty_objects.clear()
+        manager.mark_object_dirty(lines[0][0])
+        assert doc.constraints_manager.solve_constraints(dirty_only=True)
+        assert lines[2][1].line.start == untouched
+        assert lines[0][1].line.end.x == pytest.approx(
+            lines[1][1].line.start.x, abs=1e-6)
+
+    def test_component_solver_is_reused(self):
+        doc = Document()
+        lines = make_lines(doc, 3)
+        join(doc, "a", lines[0], lines[1])
+        manager = doc.constraints_manager
+        manager.solve_constraints()
+        (solver, indices), = manager._component_solvers.values()
+        lines[1][1].line.end = Point2D(4.0, 4.0)
+        manager.solve_constraints()
+        assert list(manager._component_solvers.values()) == [(solver, indices)]
+        assert lines[1][1].line.end == Point2D(4.0, 4.0)
+
+    def test_component_solver_extended_on_add(self):
+        doc = Document()
+        lines = make_lines(doc, 3)
+        join(doc, "a", lines[0], lines[1])
+        manager = doc.constraints_manager
+        manager.solve_constraints()
+        (solver, _), = manager._component_solvers.values()
+        join(doc, "b", lines[1], lines[2])
+        (key, (extended, indices)), = manager._component_solvers.items()
+        assert key == frozenset({"a", "b"})
+        assert extended is solver
+        assert sorted(extended.constraint_labels) == ["a", "b"]
+        assert indices == sorted(manager._object_variable_indices(
+            [line_id for line_id, _ in lines]))
+        assert manager.solve_constraints(dirty_only=True)
+        assert lines[1][1].line.end.x == pytest.approx(lines[2][1].line.start.x, abs=1e-6)
+
+    def test_cached_components_merged_on_add(self):
+        doc = Document()
+        lines = make_lines(doc, 4)
+        join(doc, "a", lines[0], lines[1])
+        join(doc, "c", lines[2], lines[3])
+        manager = doc.constraints_manager
+        manager.solve_constraints()
+        solvers = [solver for solver, _ in manager._component_solvers.values()]
+        join(doc, "b", lines[1], lines[2])
+        (key, (merged, indices)), = manager._component_solvers.items()
+        assert key == frozenset({"a", "b", "c"})
+        assert merged in solvers
+        assert indices == sorted(manager._object_variable_indices(
+            [line_id for line_id, _ in lines]))
+        assert manager.solve_constraints()
+        assert lines[1][1].line.end.x == pytest.approx(lines[2][1].line.start.x, abs=1e-6)
+
+    def test_component_solver_shrunk_on_remove(self):
+        doc = Document()
+        lines = make_lines(doc, 3)
+        join(doc, "a", lines[0], lines[1])
+        join(doc, "b", lines[1], lines[2])
+        manager = doc.constraints_manager
+        manager.solve_constraints()
+        (solver, _), = manager._component_solvers.values()
+        doc.remove_constraint("b")
+        (key, (shrunk, indices)), = manager._component_solvers.items()
+        assert key == frozenset({"a"})
+        assert shrunk is solver
+        assert shrunk.constraint_labels == ["a"]
+        assert indices == sorted(manager._object_variable_indices(
+            [lines[0][0], lines[1][0]]))
+
+    def test_split_keeps_solver_for_largest_part(self):
+        doc = Document()
+        lines = make_lines(doc, 5)
+        for i, name in enumerate("abcd"):
+            join(doc, name, lines[i], lines[i + 1])
+        manager = doc.constraints_manager
+        manager.solve_constraints()
+        (solver, _), = manager._component_solvers.values()
+        doc.remove_constraint("b")
+        (key, (kept, _)), = manager._component_solvers.items()
+        assert key == frozenset({"c", "d"})
+        assert kept is solver
+        lines[3][1].line.start = Point2D(7.0, 7.0)
+        lines[0][1].line.end = Point2D(-7.0, 7.0)
+        assert manager.solve_constraints(dirty_only=True)
+        assert lines[0][1].line.end.x == pytest.approx(lines[1][1].line.start.x, abs=1e-6)
+        assert lines[2][1].line.end.x == pytest.approx(lines[3][1].line.start.x, abs=1e-6)
+        assert len(manager._component_solvers) == 2
+
+    def test_component_length_scale_from_bounds(self):
+        doc = Document()
+        lines = make_lines(doc, 4)
+        join(doc, "a", lines[0], lines[1])
+        join(doc, "b", lines[2], lines[3])
+        manager = doc.constraints_manager
+        lines[1][1].line.end = Point2D(2.0, 30.0)
+        assert manager.solve_constraints()
+        scales = {
+            key: solver.length_scale
+            for key, (solver, _) in manager._component_solvers.items()}
+        assert scales[frozenset({"a"})] == pytest.approx(30.0)
+        assert scales[frozenset({"b"})] == pytest.approx(2.0)
+
+
+class TestTelemetry:
+    def test_component_solves_are_logged(self):
+        doc = Document()
+        lines = make_lines(doc, 3)
+        join(doc, "c0", lines[0], lines[1])
+        join(doc, "c1", lines[1], lines[2])
+        manager = doc.constraints_manager
+        seen = []
+        manager.telemetry.add_listener(seen.append)
+        assert manager.solve_constraints()
+        (stats,) = seen
+        assert stats.kind == "solve"
+        assert stats.num_objects == 3
+        assert stats.constraint_types == {"CoincidentConstraint": 2}
+        assert stats.solves
+        assert stats.status == "converged"
+        assert stats.total_time > 0.0
+
+    def test_failure_is_logged(self, caplog):
+        doc = Document()
+        lines = make_lines(doc, 2)
+        join(doc, "c", lines[0], lines[1])
+        manager = doc.constraints_manager
+
+        def broken(x):
+            raise RuntimeError("broken constraint")
+
+        manager.decompose_components = False
+        component_solver, _, _ = manager._get_component_solver(
+            set(obj_id for obj_id, _ in lines))
+        component_solver.add_constraint(broken, "broken")
+        with caplog.at_level("WARNING"):
+            assert not manager.solve_constraints()
+        assert "broken constraint" in caplog.text
+        (stats,) = manager.telemetry.failures()
+        assert stats.error == "broken constraint"
+
+
+class TestSolvedComponents:
+    def make_joined(self):
+        doc = Document()
+        lines = make_lines(doc, 3)
+        join(doc, "a", lines[0], lines[1])
+        join(doc, "b", lines[1], lines[2])
+        line_id, line = lines[0]
+        doc.add_constraint("len", LineLengthConstraint(line.constraint_line, 2.0), line_id)
+        manager = doc.constraints_manager
+        assert manager.solve_constraints()
+        manager.telemetry.clear()
+        return doc, manager, lines
+
+    def test_unchanged_component_is_skipped(self):
+        doc, manager, lines = self.make_joined()
+        assert manager.solve_constraints()
+        (stats,) = manager.telemetry.entries
+        assert stats.kind == "cached"
+        assert stats.status == "converged"
+        assert not stats.solves
+
+    def test_moved_object_is_solved(self):
+        doc, manager, lines = self.make_joined()
+        lines[2][1].line.end = Point2D(9.0, 9.0)
+        assert manager.solve_constraints()
+        (stats,) = manager.telemetry.entries
+        assert stats.kind == "solve"
+
+    def test_edited_constraint_value_is_solved(self):
+        doc, manager, lines = self.make_joined()
+        manager.constraints["len"].length = 3.0
+        assert manager.solve_constraints()
+        assert manager.telemetry.entries[0].kind == "solve"
+        assert lines[0][1].line.length == pytest.approx(3.0, abs=1e-6)
+
+    def test_marked_dirty_is_solved(self):
+        doc, manager, lines = self.make_joined()
+        manager.mark_object_dirty(lines[1][0])
+        assert manager.solve_constraints()
+        assert manager.telemetry.entries[0].kind == "solve"
+
+    def test_skipping_can_be_disabled(self):
+        doc, manager, lines = self.make_joined()
+        manager.skip_solved_components = False
+        assert manager.solve_constraints()
+        assert manager.telemetry.entries[0].kind == "solve"
+
+    def test_unsolvable_component_is_retried(self):
+        doc, manager, lines = self.make_joined()
+        line_id, line = lines[1]
+        doc.add_constraint("h", HorizontalConstraint(
+            line.constraint_start_point, line.constraint_end_point), line_id)
+        doc.add_constraint("v", VerticalConstraint(
+            line.constraint_start_point, line.constraint_end_point), line_id)
+        doc.add_constraint("len1", LineLengthConstraint(line.constraint_line, 1.0), line_id)
+        manager.solve_constraints()
+        assert not manager._solved_fingerprints
+        manager.telemetry.clear()
+        manager.solve_constraints()
+        assert manager.telemetry.entries[0].kind == "solve"
+
+    def test_inconsistent_component_is_not_cached(self):
+        doc, manager, lines = self.make_joined()
+        manager.decompose_components = False
+        line_id, line = lines[1]
+        doc.add_constraint("h", HorizontalConstraint(
+            line.constraint_start_point, line.constraint_end_point), line_id)
+        doc.add_constraint("v", VerticalConstraint(
+            line.constraint_start_point, line.constraint_end_point), line_id)
+        doc.add_constraint("len1", LineLengthConstraint(line.constraint_line, 5.0), line_id)
+        for _ in range(2):
+            manager.telemetry.clear()
+            manager.solve_constraints()
+            (stats,) = manager.telemetry.entries
+            assert stats.kind == "solve"
+            assert manager.telemetry.failures() == [stats]
+        assert not manager._solved_fingerprints
+
+    def test_arcs_are_skipped(self):
+        doc = Document()
+        arc = ArcCadObject(doc, Point2D(0.0, 0.0), 2.0, -40.0, 120.0)
+        doc.objects[arc.object_id] = arc
+        arc.make_constrainables(doc.constraints_manager.solver)
+        (line_id, line), = make_lines(doc, 1)
+        doc.add_constraint("r", ArcRadiusConstraint(arc.constraint_arc, 3.0), arc.object_id)
+        doc.add_constraint("end", PointCoincidentWithArcEndConstraint(
+            line.constraint_start_point, arc.constraint_arc), line_id, arc.object_id)
+        manager = doc.constraints_manager
+        assert manager.solve_constraints()
+        span = arc.arc.span_degrees
+        manager.telemetry.clear()
+        assert manager.solve_constraints()
+        assert manager.telemetry.entries[0].kind == "cached"
+        assert arc.arc.span_degrees == pytest.approx(span)
+
+
+class TestComponentDof:
+    def test_dof_per_object(self):
+        doc = Document()
+        lines = make_lines(doc, 2)
+        (id0, line0), (id1, line1) = lines
+        join(doc, "c", lines[0], lines[1])
+        doc.add_constraint("h0", HorizontalConstraint(
+            line0.constraint_start_point, line0.constraint_end_point), id0)
+        doc.add_constraint("len0", LineLengthConstraint(line0.constraint_line, 3.0), id0)
+        manager = doc.constraints_manager
+        assert manager.solve_constraints()
+        dof = manager.get_component_dof(id1)
+        assert dof == {id0: 2, id1: 4}
+
+    def test_redundant_constraint_removes_no_dof(self):
+        doc = Document()
+        lines = make_lines(doc, 2)
+        join(doc, "c", lines[0], lines[1])
+        join(doc, "again", lines[0], lines[1])
+        dof = doc.constraints_manager.get_component_dof(lines[0][0])
+        assert sum(dof.values()) == 8
+        assert dof[lines[0][0]] == 4
+
+    def test_unconstrained_object(self):
+        doc = Document()
+        (line_id, _), = make_lines(doc, 1)
+        assert doc.constraints_manager.get_component_dof(line_id) == {}
+
+
+class TestConflicts:
+    def test_find_conflicting_constraints(self):
+        doc = Document()
+        lines = make_lines(doc, 6)
+        for i in range(5):
+            join(doc, f"j{i}", lines[i], lines[i + 1])
+        for line_id, line in lines:
+            doc.add_constraint(f"len{line_id}", LineLengthConstraint(
+                line.constraint_line, 1.0), line_id)
+        line_id, line = lines[3]
+        doc.add_constraint("h", HorizontalConstraint(
+            line.constraint_start_point, line.constraint_end_point), line_id)
+        doc.add_constraint("v", VerticalConstraint(
+            line.constraint_start_point, line.constraint_end_point), line_id)
+        manager = doc.constraints_manager
+        manager.solve_constraints()
+        start = line.line.start
+        conflict = manager.find_conflicting_constraints(lines[0][0])
+        assert sorted(conflict) == sorted([f"len{line_id}", "h", "v"])
+        assert line.line.start == start
+
+    def test_no_conflict(self):
+        doc = Document()
+        lines = make_lines(doc, 2)
+        join(doc, "a", lines[0], lines[1])
+        manager = doc.constraints_manager
+        assert manager.find_conflicting_constraints(lines[0][0]) == []
+        assert manager.find_conflicting_constraints("missing") == []
+
+
+class TestDragSolve:
+    def make_chain(self):
+        doc = Document()
+        lines = make_lines(doc, 3)
+        join(doc, "a", lines[0], lines[1])
+        join(doc, "b", lines[1], lines[2])
+        for line_id, line in lines:
+            doc.add_constraint(f"len{line_id}", LineLengthConstraint(
+                line.constraint_line, 1.5), line_id)
+        doc.solve_constraints()
+        return doc, lines
+
+    def test_drag_moves_handle_and_keeps_constraints(self):
+        doc, lines = self.make_chain()
+        manager = doc.constraints_manager
+        line_id, line = lines[2]
+        assert manager.solve_drag(line_id, "end_point", (3.0, 2.0), budget_ms=1000)
+        assert line.line.end.x == pytest.approx(3.0, abs=1e-2)
+        assert line.line.end.y == pytest.approx(2.0, abs=1e-2)
+        assert lines[1][1].line.end.x == pytest.approx(line.line.start.x, abs=1e-4)
+        assert manager.end_drag()
+        assert manager._drag is None
+        for _, each in lines:
+            assert each.line.length == pytest.approx(1.5, abs=1e-6)
+
+    def test_drag_reuses_constraint(self):
+        doc, lines = self.make_chain()
+        manager = doc.constraints_manager
+        line_id, _ = lines[2]
+        manager.solve_drag(line_id, "end_point", Point2D(3.0, 2.0))
+        solver = manager._drag[1]
+        system = solver._system
+        manager.solve_drag(line_id, "end_point", Point2D(3.1, 2.1))
+        assert manager._drag[1] is solver and solver._system is system
+        assert len(solver.soft_constraints) == 1
+        manager.end_drag(polish=False)
+        assert solver.soft_constraints == []
+
+    def test_drag_respects_budget(self):
+        doc, lines = self.make_chain()
+        manager = doc.constraints_manager
+        line_id, line = lines[2]
+        before = line.line.end
+        manager.solve_drag(line_id, "end_point", (30.0, 20.0), budget_ms=0)
+        assert line.line.end == before
+
+    def test_drag_unconstrained_object(self):
+        doc = Document()
+        (line_id, line), = make_lines(doc, 1)
+        assert doc.constraints_manager.solve_drag(line_id, "start_point", (-1.0, 2.0))
+        assert line.line.start == Point2D(-1.0, 2.0)
+
+    def test_drag_unknown_handle(self):
+        doc, lines = self.make_chain()
+        assert not doc.constraints_manager.solve_drag(lines[0][0], "line", (0, 0))
+
+    def test_drag_uses_compiled_system(self):
+        doc, lines = self.make_chain()
+        manager = doc.constraints_manager
+        line_id, line = lines[2]
+        manager.solve_drag(line_id, "end_point", (3.0, 2.0))
+        assert manager._drag[1]._system.compiled is not None
+        manager.end_drag()
+        for plan in manager._component_plans.values():
+            for cluster_solver, _ in plan:
+                assert not cluster_solver.compile_systems
+
+    def test_drag_without_compiling(self):
+        doc, lines = self.make_chain()
+        manager = doc.constraints_manager
+        manager.compile_constraints = False
+        manager._component_solvers.clear()
+        line_id, line = lines[2]
+        assert manager.solve_drag(line_id, "end_point", (3.0, 2.0), budget_ms=1000)
+        assert manager._drag[1]._system.compiled is None
+        assert line.line.end.x == pytest.approx(3.0, abs=1e-2)
+
+
+class TestClusterDecomposition:
+    def test_decomposed_chain_matches_constraints(self):
+        doc = Document()
+        lines = make_lines(doc, 6)
+        for i in range(len(lines) - 1):
+            join(doc, f"c{i}", lines[i], lines[i + 1])
+        for line_id, line in lines:
+            doc.add_constraint(f"len{line_id}", LineLengthConstraint(
+                line.constraint_line, 2.0), line_id)
+        manager = doc.constraints_manager
+        assert manager.solve_constraints()
+        (plan,) = manager._component_plans.values()
+        assert len(plan) == len(lines) - 1
+        for i, (_, line) in enumerate(lines):
+            assert line.line.length == pytest.approx(2.0, abs=1e-6)
+            if i:
+                assert line.line.start.x == pytest.approx(
+                    lines[i - 1][1].line.end.x, abs=1e-6)
+
+    def test_conflicting_clusters_fall_back(self):
+        doc = Document()
+        lines = make_lines(doc, 3)
+        (id0, line0), (id1, line1), (id2, line2) = lines
+        join(doc, "c", lines[0], lines[1])
+        doc.add_constraint("h0", HorizontalConstraint(
+            line0.constraint_start_point, line0.constraint_end_point), id0)
+        doc.add_constraint("len0", LineLengthConstraint(line0.constraint_line, 3.0), id0)
+        doc.add_constraint("eq", LinesEqualLengthConstraint(
+            line1.constraint_line, line2.constraint_line), id1, id2)
+        doc.add_constraint("len2", LineLengthConstraint(line2.constraint_line, 2.0), id2)
+        assert doc.solve_constraints()
+        assert line1.line.length == pytest.approx(2.0, abs=1e-5)
+        assert line2.line.length == pytest.approx(2.0, abs=1e-5)
+        assert line0.line.length == pytest.approx(3.0, abs=1e-5)
+        assert line0.line.end.x == pytest.approx(line1.line.start.x, abs=1e-5)
+
+
+class TestParallelSolving:
+    def build(self, doc):
+        lines = make_lines(doc, 6)
+        for start in (0, 3):
+            chain = lines[start:start + 3]
+            for i in range(len(chain) - 1):
+                join(doc, f"c{start + i}", chain[i], chain[i + 1])
+        for line_id, line in lines:
+            doc.add_constraint(f"len{line_id}", LineLengthConstraint(
+                line.constraint_line, 2.0), line_id)
+        return lines
+
+    def test_parallel_solve(self):
+        doc = Document()
+        lines = self.build(doc)
+        manager = doc.constraints_manager
+        manager.parallel_solving = True
+        manager.parallel_min_constraints = 0
+        try:
+            assert manager.solve_constraints()
+            assert manager._executor is not None
+        finally:
+            manager.shutdown_executor()
+        assert manager._executor is None
+        assert not manager._dirty_objects
+        for i, (_, line) in enumerate(lines):
+            assert line.line.length == pytest.approx(2.0, abs=1e-6)
+            if i % 3:
+                previous = lines[i - 1][1].line.end
+                assert line.line.start.x == pytest.approx(previous.x, abs=1e-6)
+                assert line.line.start.y == pytest.approx(previous.y, abs=1e-6)
+
+    def test_clear_shuts_down_workers(self):
+        doc = Document()
+        self.build(doc)
+        manager = doc.constraints_manager
+        manager.parallel_solving = True
+        manager.parallel_min_constraints = 0
+        try:
+            assert manager.solve_constraints()
+            executor = manager._executor
+            assert executor is not None
+            doc.clear()
+            assert manager._executor is None
+            with pytest.raises(RuntimeError):
+                executor.submit(abs, -1)
+        finally:
+            manager.shutdown_executor()
+
+    def test_small_components_solve_locally(self):
+        doc = Document()
+        lines = self.build(doc)
+        manager = doc.constraints_manager
+        manager.parallel_solving = True
+        assert manager.solve_constraints()
+        assert manager._executor is None
+        for _, line in lines:
+            assert line.line.length == pytest.approx(2.0, abs=1e-6)
+
+
+class Recorder:
+    """Stands in for a progress signal."""
+    def __init__(self):
+        self.values = []
+
+    def emit(self, value):
+        self.values.append(value)
+
+
+class TestBackgroundSolve:
+    def build(self, doc):
+        lines = make_lines(doc, 4)
+        join(doc, "a", lines[0], lines[1])
+        join(doc, "b", lines[2], lines[3])
+        return lines
+
+    def test_job_works_on_a_copy(self):
+        doc = Document()
+        lines = self.build(doc)
+        job = doc.create_solve_job()
+        assert job.object_ids == {line_id for line_id, _ in lines}
+        end = lines[0][1].line.end
+        progress = Recorder()
+        assert job.run(progress) is job
+        assert progress.values == [50.0, 100.0]
+        assert lines[0][1].line.end == end
+        assert doc.apply_solve_job(job)
+        for first, second in (lines[0:2], lines[2:4]):
+            assert first[1].line.end.x == pytest.approx(second[1].line.start.x, abs=1e-6)
+            assert first[1].line.end.y == pytest.approx(second[1].line.start.y, abs=1e-6)
+        manager = doc.constraints_manager
+        assert not manager._dirty_objects
+        assert manager.telemetry.entries[-1].kind == "background"
+        assert manager.solve_constraints()
+        assert manager.telemetry.entries[-1].kind == "cached"
+
+    def test_cancelled_job_applies_nothing(self):
+        doc = Document()
+        lines = self.build(doc)
+        job = doc.create_solve_job()
+        job.cancel()
+        job.run()
+        end = lines[0][1].line.end
+        assert not doc.apply_solve_job(job)
+        assert lines[0][1].line.end == end
+        assert doc.constraints_manager.get_dirty_components()
+
+    def test_edited_component_not_applied(self):
+        doc = Document()
+        lines = self.build(doc)
+        job = doc.create_solve_job()
+        job.run()
+        lines[0][1].line.start = Point2D(-5.0, -5.0)
+        assert not doc.apply_solve_job(job)
+        assert lines[0][1].line.start == Point2D(-5.0, -5.0)
+        assert lines[2][1].line.end.x == pytest.approx(lines[3][1].line.start.x, abs=1e-6)
+
+    def test_job_on_thread_pool(self):
+        from PySide6.QtCore import QThreadPool
+        from BelfryCAD.utils.worker import Worker
+        doc = Document()
+        lines = self.build(doc)
+        job = doc.create_solve_job()
+        worker = Worker(job.run)
+        QThreadPool.globalInstance().start(worker)
+        assert QThreadPool.globalInstance().waitForDone(10000)
+        assert job.finished
+        assert doc.apply_solve_job(job)
+        assert lines[0][1].line.end.x == pytest.approx(lines[1][1].line.start.x, abs=1e-6)
+
+
 if __name__ == "__main__":
-    test_constraints_manager() 
\ No newline at end of file
+    test_constraints_manager() 
@@ -22,6 +22,10 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 from BelfryCAD.utils.constraints import (
     # Solver
     ConstraintSolver,
+    SparseConstraintSystem,
+    SPARSE_SOLVE_THRESHOLD,
+    ANGLE_SCALE,
+    solve_packed_subproblem,
     # Constrainables
     Constrainable,
     ConstrainableLength,
@@ -129,7 +133,6 @@ def make_bezier(solver, points=None):
     """Single cubic Bezier segment: 4 control points."""
     if points is None:
         points = [(0.0, 0.0), (1.0, 2.0), (3.0, 2.0), (4.0, 0.0)]
-    solver.beziers = getattr(solver, 'beziers', [])
     cpts = [make_point(solver, x, y, label=f"bp{i}") for i, (x, y) in enumerate(points)]
     return ConstrainableBezierPath(solver, cpts), cpts
 
@@ -345,6 +348,675 @@ class TestConstraintSolverSolve:
         assert s.variables[0] == pytest.approx(5.0, abs=0.1)
 
 
+def make_horizontal_chain(solver, count):
+    """Chain of points, each horizontal to and one unit right of the last."""
+    points = [make_point(solver, 0.0, 0.0, fixed=True, label="p0")]
+    for i in range(1, count):
+        points.append(make_point(solver, i + 0.3, 0.5 * (i % 3), label=f"p{i}"))
+    for prev, pt in zip(points, points[1:]):
+        solver.add_constraint(HorizontalConstraint(prev, pt))
+        solver.add_constraint(
+            lambda x, a=prev, b=pt: [x[b.xi] - x[a.xi] - 1.0])
+    return points
+
+
+class TestSparseConstraintSystem:
+    def test_constraint_variable_indices(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0, 0, 1, 0)
+        pt = make_point(s, 2.0, 3.0)
+        c = PointIsOnLineSegmentConstraint(pt, line)
+        assert c.get_variable_indices() == sorted(
+            [p1.xi, p1.yi, p2.xi, p2.yi, pt.xi, pt.yi])
+
+    def test_jacobian_matches_dense_assembly(self):
+        s = make_solver()
+        line1, a1, a2 = make_line(s, 0, 0, 3, 1)
+        line2, b1, b2 = make_line(s, 1, 2, 4, 6)
+        a1_fixed = make_point(s, 0.0, 0.0, fixed=True)
+        s.add_constraint(LinesPerpendicularConstraint(line1, line2))
+        s.add_constraint(CoincidentConstraint(a1, a1_fixed))
+        s.add_constraint(LineLengthConstraint(line2, 5.0))
+        s.add_constraint(lambda x: [x[b2.yi] - 2.0 * x[b1.yi]])
+        s.add_soft_constraint(lambda x: [x[a2.xi] - 3.0], weight=0.5)
+        free = s.get_free_indices()
+        x = np.array(s.variables, dtype=float)
+        system = SparseConstraintSystem(s, free)
+        dense = np.vstack([
+            s.constraints[0].jacobian(x),
+            s.constraints[1].jacobian(x),
+            s.constraints[2].jacobian(x),
+            ConstraintSolver._numerical_jacobian(s.constraints[3], x),
+            ConstraintSolver._numerical_jacobian(
+                s.soft_constraints[0][0], x) * 0.5,
+        ])[:, free]
+        J = system.jacobian(x)
+        assert J.shape == dense.shape
+        assert J.toarray() == pytest.approx(dense, abs=1e-5)
+        pattern = system.sparsity().toarray()
+        assert np.all(pattern[np.abs(dense) > 1e-9] == 1)
+
+    def test_residuals_stack_constraints_then_soft(self):
+        s = make_solver()
+        s.add_variable(2.0, "x")
+        s.add_constraint(lambda x: [x[0] - 5.0])
+        s.add_soft_constraint(lambda x: [x[0]], weight=0.5)
+        system = SparseConstraintSystem(s, s.get_free_indices())
+        res = system.residuals(np.array(s.variables, dtype=float))
+        assert res == pytest.approx([-3.0, 1.0])
+
+    def test_inexact_jacobian_uses_numerical_block(self):
+        s = make_solver()
+        circle, *_ = make_circle(s, 0.0, 0.0, 2.0)
+        line, *_ = make_line(s, -5.0, 3.0, 5.0, 2.5)
+        c = LineTangentToCircleConstraint(line, circle)
+        x = np.array(s.variables, dtype=float)
+        block, cols = c.jacobian_block(x)
+        numeric = ConstraintSolver._numerical_jacobian(c.residual, x)[:, cols]
+        assert block == pytest.approx(numeric, abs=1e-6)
+
+    def test_block_skips_dense_jacobian(self, monkeypatch):
+        s = make_solver()
+        line, *_ = make_line(s, 1.0, 2.0, 4.0, 6.0)
+        ellipse, *_ = make_ellipse(s, 10.0, 0.0)
+        point = make_point(s, 18.0, 1.0)
+        constraints = [
+            LineLengthConstraint(line, 3.0), PointIsOnEllipseConstraint(point, ellipse)]
+        x = np.array(s.variables, dtype=float)
+        dense = [np.asarray(c.jacobian(x)) for c in constraints]
+        for c in constraints:
+            monkeypatch.setattr(type(c), "jacobian", lambda *args: pytest.fail("dense Jacobian"))
+        for c, J in zip(constraints, dense):
+            block, cols = c.jacobian_block(x)
+            assert block == pytest.approx(J[:, cols])
+
+    def test_line_angle_jacobian_matches_numerical(self):
+        s = make_solver()
+        line, *_ = make_line(s, 1.0, 2.0, 4.0, 6.0)
+        c = LineAngleConstraint(line, 30.0)
+        x = np.array(s.variables, dtype=float)
+        numeric = ConstraintSolver._numerical_jacobian(c.residual, x)
+        assert c.jacobian(x) == pytest.approx(numeric, abs=1e-4)
+
+    def test_large_chain_solves_with_sparse_jacobian(self):
+        s = make_solver()
+        count = SPARSE_SOLVE_THRESHOLD
+        points = make_horizontal_chain(s, count)
+        result = s.solve()
+        assert result.success
+        assert points[-1].get(s.variables) == pytest.approx(
+            (count - 1.0, 0.0), abs=1e-6)
+
+    def test_large_chain_solves_with_sparse_finite_differences(self):
+        s = make_solver()
+        count = SPARSE_SOLVE_THRESHOLD
+        points = make_horizontal_chain(s, count)
+        s.solve(analytic_jacobian=False)
+        assert points[-1].get(s.variables) == pytest.approx(
+            (count - 1.0, 0.0), abs=1e-5)
+
+    def test_large_chain_gauss_newton(self):
+        s = make_solver()
+        count = SPARSE_SOLVE_THRESHOLD
+        points = make_horizontal_chain(s, count)
+        s.gauss_newton_solve()
+        assert points[-1].get(s.variables) == pytest.approx(
+            (count - 1.0, 0.0), abs=1e-5)
+
+
+class TestSystemReuse:
+    def test_system_reused_between_solves(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 1.0)
+        s.add_constraint(LineLengthConstraint(line, 2.0))
+        s.solve()
+        system = s._system
+        s.solve()
+        assert s._system is system
+        s.add_constraint(HorizontalConstraint(p1, p2))
+        assert s._system is None
+
+    def test_reused_system_picks_up_edited_parameters(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 0.0)
+        length = LineLengthConstraint(line, 2.0)
+        s.add_constraint(length)
+        s.add_constraint(HorizontalConstraint(p1, p2))
+        s.solve()
+        system = s._system
+        length.length = 5.0
+        s.solve()
+        assert s._system is system
+        assert math.dist(p1.get(s.variables), p2.get(s.variables)) == pytest.approx(5.0, abs=1e-6)
+
+    def test_subproblem_only_moves_its_variables(self):
+        s = make_solver()
+        line1, a1, a2 = make_line(s, 0.0, 0.0, 3.0, 1.0)
+        line2, b1, b2 = make_line(s, 5.0, 5.0, 6.0, 7.0)
+        s.add_constraint(HorizontalConstraint(b1, b2))
+        sub = s.make_subproblem([HorizontalConstraint(a1, a2)], ["h"])
+        before = list(s.variables)
+        sub.solve(variable_indices=line1.get_variable_indices())
+        assert a1.get(s.variables)[1] == pytest.approx(a2.get(s.variables)[1])
+        assert s.variables[b1.xi:] == before[b1.xi:]
+
+
+class TestAutomaticJacobians:
+    def test_callable_jacobian_in_one_evaluation(self):
+        s = make_solver()
+        p1 = make_point(s, 0.0, 0.0)
+        p2 = make_point(s, 3.0, 1.0)
+        calls = []
+
+        def distance(x):
+            calls.append(1)
+            return [np.hypot(x[p2.xi] - x[p1.xi], x[p2.yi] - x[p1.yi]) - 2.0]
+
+        s.add_constraint(distance)
+        system = SparseConstraintSystem(s, s.get_free_indices())
+        calls.clear()
+        J = system.jacobian(system.gather(s.variables)).toarray()
+        assert len(calls) == 1
+        d = math.hypot(3.0, 1.0)
+        assert J[0] == pytest.approx([-3.0 / d, -1.0 / d, 3.0 / d, 1.0 / d])
+
+    def test_constraint_without_jacobian(self):
+        class Distance(Constraint):
+            def __init__(self, p1, p2, length):
+                self.p1, self.p2, self.length = p1, p2, length
+
+            def residual(self, x):
+                return [np.hypot(x[self.p2.xi] - x[self.p1.xi],
+                                 x[self.p2.yi] - x[self.p1.yi]) - self.length]
+
+        s = make_solver()
+        p1 = make_point(s, 0.0, 0.0, fixed=True)
+        p2 = make_point(s, 3.0, 1.0)
+        s.add_constraint(Distance(p1, p2, 2.0))
+        block, cols = s.constraints[0].jacobian_block(np.array(s.variables))
+        assert cols == [0, 1, 2, 3]
+        assert block[0, 2:] == pytest.approx([3.0 / math.hypot(3, 1), 1.0 / math.hypot(3, 1)])
+        s.gauss_newton_solve()
+        assert math.dist(p1.get(s.variables), p2.get(s.variables)) == pytest.approx(2.0)
+
+    def test_float_only_callable_falls_back(self):
+        s = make_solver()
+        p = make_point(s, 3.0, 4.0)
+        s.add_constraint(lambda x: [math.hypot(x[p.xi], x[p.yi]) - 1.0])
+        s.gauss_newton_solve()
+        assert math.hypot(*p.get(s.variables)) == pytest.approx(1.0, abs=1e-6)
+
+
+class TestSolveStats:
+    def test_gauss_newton_stats(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 1.0)
+        s.add_constraint(LineLengthConstraint(line, 2.0))
+        s.gauss_newton_solve()
+        stats = s.last_stats
+        assert stats.method == "gauss_newton"
+        assert stats.status == "converged"
+        assert stats.num_free == 4
+        assert stats.iterations >= 1
+        assert len(stats.residual_norms) >= 2
+        assert stats.residual_norms[-1] < stats.residual_norms[0]
+        assert stats.build_time > 0.0
+        assert stats.jacobian_time > 0.0
+        assert stats.total_time >= stats.jacobian_time + stats.linear_solve_time
+
+    def test_reused_system_has_no_build_time(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 1.0)
+        s.add_constraint(LineLengthConstraint(line, 2.0))
+        s.solve()
+        s.solve()
+        assert s.last_stats.method == "least_squares"
+        assert s.last_stats.build_time == 0.0
+        assert s.last_stats.status == "converged"
+
+    def test_inconsistent_system_stalls(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 1.0)
+        s.add_constraint(HorizontalConstraint(p1, p2))
+        s.add_constraint(VerticalConstraint(p1, p2))
+        s.add_constraint(LineLengthConstraint(line, 5.0))
+        s.solve()
+        assert s.residual_norm > 1.0
+        assert s.last_stats.status == "stalled"
+
+    def test_time_budget_status(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 1.0)
+        s.add_constraint(LineLengthConstraint(line, 2.0))
+        s.gauss_newton_solve(time_budget=0.0)
+        assert s.last_stats.status == "time_budget"
+        assert s.last_stats.iterations == 0
+
+
+def make_length_chain(solver, count, unit=1.0):
+    """Free chain of count lines, each of length unit, joined end to start."""
+    lines = [
+        make_line(solver, i * unit, 0.0, (i + 1.0) * unit, 0.5 * unit)[0]
+        for i in range(count)
+    ]
+    for line in lines:
+        solver.add_constraint(LineLengthConstraint(line, unit))
+    for line1, line2 in zip(lines, lines[1:]):
+        solver.add_constraint(CoincidentConstraint(line1.p2, line2.p1))
+    return lines
+
+
+class TestLevenbergMarquardt:
+    def test_long_underdetermined_chain(self):
+        s = make_solver()
+        make_length_chain(s, 500)
+        s.gauss_newton_solve()
+        assert s.last_stats.status == "converged"
+        assert s.last_stats.iterations < 30
+        assert s.residual_norm < 1e-8
+
+    def test_iterations_independent_of_units(self):
+        iterations = []
+        for unit in (1.0, 1000.0):
+            s = make_solver()
+            make_length_chain(s, 50, unit)
+            s.gauss_newton_solve(tol=1e-8 * unit)
+            assert s.last_stats.status == "converged"
+            iterations.append(s.last_stats.iterations)
+        assert iterations[0] == iterations[1]
+
+    def test_residuals_never_increase(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 0.0)
+        s.add_constraint(VerticalConstraint(p1, p2))
+        s.add_constraint(LineLengthConstraint(line, 2.0))
+        s.gauss_newton_solve(max_iter=200)
+        norms = s.last_stats.residual_norms
+        assert all(b < a for a, b in zip(norms, norms[1:]))
+
+    def test_inconsistent_constraints_stop_early(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 1.0)
+        s.add_constraint(HorizontalConstraint(p1, p2))
+        s.add_constraint(VerticalConstraint(p1, p2))
+        s.add_constraint(LineLengthConstraint(line, 2.0))
+        s.gauss_newton_solve(max_iter=200)
+        assert s.last_stats.status == "stalled"
+        assert s.last_stats.iterations < 100
+        assert s.residual_norm > 1.0
+
+    def test_rtol_zero_disables_early_stop(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 1.0)
+        s.add_constraint(HorizontalConstraint(p1, p2))
+        s.add_constraint(VerticalConstraint(p1, p2))
+        s.add_constraint(LineLengthConstraint(line, 2.0))
+        s.gauss_newton_solve(max_iter=200, rtol=1e-9)
+        early = s.last_stats.iterations
+        s.variables[:] = [0.0, 0.0, 3.0, 1.0]
+        s.gauss_newton_solve(max_iter=200, rtol=0.0)
+        assert s.last_stats.iterations > early
+
+    def test_small_step_with_large_residual_stalls(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 1.0)
+        s.add_constraint(HorizontalConstraint(p1, p2))
+        s.add_constraint(VerticalConstraint(p1, p2))
+        s.add_constraint(LineLengthConstraint(line, 2.0))
+        s.gauss_newton_solve(max_iter=200, rtol=0.0, tol=1e-3)
+        assert s.last_stats.status == "stalled"
+        assert s.residual_norm > 1.0
+
+
+def make_rounded_plate(solver, corners, size):
+    """
+    A plate outline of corner arcs joined by tangent lines, about size
+    across, started off its solution.
+    """
+    ring = 0.4 * size
+    step = 360.0 / corners
+    arcs = []
+    for i in range(corners):
+        angle = math.radians(i * step)
+        arc, *_ = make_arc(
+            solver, ring * math.cos(angle), ring * math.sin(angle), 0.08 * size,
+            i * step - step / 2 + 7.0, step - 9.0)
+        arcs.append(arc)
+    for arc, next_arc in zip(arcs, arcs[1:] + arcs[:1]):
+        (x0, y0), (x1, y1) = arc_end_point(arc, solver), arc_start_point(next_arc, solver)
+        line, p1, p2 = make_line(solver, x0 + 0.02 * size, y0, x1, y1 - 0.02 * size)
+        solver.add_constraint(ArcRadiusConstraint(arc, 0.1 * size))
+        solver.add_constraint(PointCoincidentWithArcEndConstraint(p1, arc))
+        solver.add_constraint(PointCoincidentWithArcStartConstraint(p2, next_arc))
+        solver.add_constraint(LineTangentToArcConstraint(line, next_arc))
+
+
+def arc_start_point(arc, solver):
+    cx, cy, r, start, _ = arc.get(solver.variables)
+    return cx + r * math.cos(math.radians(start)), cy + r * math.sin(math.radians(start))
+
+
+def arc_end_point(arc, solver):
+    cx, cy, r, _, end = arc.get(solver.variables)
+    return cx + r * math.cos(math.radians(end)), cy + r * math.sin(math.radians(end))
+
+
+class TestVariableScaling:
+    def test_kinds_recorded(self):
+        s = make_solver()
+        arc, center, radius, start, span = make_arc(s)
+        other = s.add_variable(1.0, "other")
+        kinds = s.variable_kinds
+        assert [kinds[center.xi], kinds[center.yi]] == ["point", "point"]
+        assert kinds[radius.index] == "length"
+        assert kinds[start.index] == kinds[span.index] == "angle"
+        assert kinds[other] is None
+
+    def test_column_scales(self):
+        s = make_solver()
+        arc, center, radius, start, span = make_arc(s, -500.0, 0.0, 50.0)
+        make_point(s, 1500.0, 200.0)
+        s.add_variable(1.0, "other")
+        s.add_constraint(lambda x: [x[center.xi]])
+        system = SparseConstraintSystem(s, s.get_free_indices())
+        x = system.gather(s.variables)
+        scales = system.column_scales(x)
+        assert scales[system.column_map[center.xi]] == pytest.approx(2000.0)
+        assert scales[system.column_map[radius.index]] == pytest.approx(2000.0)
+        assert scales[system.column_map[span.index]] == pytest.approx(ANGLE_SCALE)
+        assert scales[-1] == 1.0
+        scales = system.column_scales(x, length_scale=10.0)
+        assert scales[system.column_map[center.yi]] == 10.0
+
+    def test_scale_covers_referenced_geometry(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 4.0)
+        make_point(s, 5000.0, 0.0)
+        s.add_constraint(LineLengthConstraint(line, 2.0))
+        system = SparseConstraintSystem(s, line.get_variable_indices())
+        assert system.column_scales(system.gather(s.variables)) == pytest.approx([4.0] * 4)
+
+    @pytest.mark.parametrize("method", ["gauss_newton_solve", "solve"])
+    def test_large_part_solves_faster(self, method):
+        results = []
+        for scaled in (False, True):
+            s = make_solver()
+            make_rounded_plate(s, 20, 2000.0)
+            s.scale_variables = scaled
+            getattr(s, method)()
+            results.append((s.last_stats.iterations, s.residual_norm))
+        (plain_iterations, _), (iterations, residual) = results
+        assert residual < 1e-6
+        assert iterations < plain_iterations
+
+    def test_subproblems_share_kinds(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s)
+        s.scale_variables = False
+        s.length_scale = 5.0
+        sub = s.make_subproblem([LineLengthConstraint(line, 2.0)], ["len"])
+        assert sub.variable_kinds is s.variable_kinds
+        assert not sub.scale_variables
+        assert sub.length_scale == 5.0
+
+
+class TestCancellation:
+    @pytest.mark.parametrize("method", ["gauss_newton_solve", "solve"])
+    def test_cancelled_solve_stops(self, method):
+        s = make_solver()
+        make_length_chain(s, 20)
+        before = list(s.variables)
+        calls = []
+        s.cancel_check = lambda: calls.append(None) or len(calls) > 1
+        getattr(s, method)()
+        assert s.last_stats.status == "cancelled"
+        assert s.residual_norm > 1e-3
+        if method == "solve":
+            assert s.variables == before
+
+    def test_cancel_check_shared_with_subproblems(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s)
+        s.cancel_check = lambda: True
+        sub = s.make_subproblem([LineLengthConstraint(line, 2.0)], ["len"])
+        assert sub.cancel_check is s.cancel_check
+        sub.gauss_newton_solve()
+        assert sub.last_stats.iterations == 0
+
+    def test_cancelled_clusters_stop(self):
+        s = make_solver()
+        line1, a1, b1 = make_line(s, 0.0, 0.0, 3.0, 0.0)
+        line2, a2, b2 = make_line(s, 5.0, 0.0, 9.0, 0.0)
+        s.add_constraint(LineLengthConstraint(line1, 2.0), "len1")
+        s.add_constraint(LineLengthConstraint(line2, 2.0), "len2")
+        plan = [
+            (s.make_subproblem([s.constraints[0]], ["len1"]), line1.get_variable_indices()),
+            (s.make_subproblem([s.constraints[1]], ["len2"]), line2.get_variable_indices()),
+        ]
+        s.cancel_check = lambda: True
+        for cluster_solver, _ in plan:
+            cluster_solver.cancel_check = s.cancel_check
+        runs = s.solve_clusters(plan, s.get_free_indices())
+        assert [run.status for run in runs] == ["cancelled"]
+
+    def test_stalled_cluster_falls_back(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 0.0)
+        s.add_constraint(LineLengthConstraint(line, 2.0), "len")
+        # The cluster's second constraint disagrees slightly, so it stalls
+        # with a residual norm between SOLVED_TOLERANCE and its square root.
+        cluster = s.make_subproblem(
+            [s.constraints[0], LineLengthConstraint(line, 2.00005)], ["len", "near"])
+        runs = s.solve_clusters([(cluster, line.get_variable_indices())],
+                                s.get_free_indices())
+        assert runs[0].status == "stalled"
+        assert 1e-6 < runs[0].residual_norm < 1e-4
+        assert [run.method for run in runs] == ["gauss_newton", "least_squares"]
+        assert runs[-1].status == "converged"
+        assert s.residual_norm < 1e-6
+
+
+class TestRankDiagnostics:
+    def test_redundant_consistent_constraints(self):
+        s = make_solver()
+        p1 = make_point(s, 0.0, 0.0, fixed=True)
+        p2 = make_point(s, 1.0, 1.0)
+        s.add_constraint(CoincidentConstraint(p1, p2), label="a")
+        s.add_constraint(CoincidentConstraint(p1, p2), label="b")
+        s.solve()
+        assert s.diagnostics.rank == 2
+        assert not s.under_constrained
+        assert not s.over_constrained
+        assert len(s.redundant_constraints) == 1
+        assert s.conflicting_constraints == []
+        assert s.constraint_info["dof"] == 0
+
+    def test_redundant_conflicting_constraints(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 0.0)
+        s.add_constraint(LineLengthConstraint(line, 2.0), label="two")
+        s.add_constraint(LineLengthConstraint(line, 4.0), label="four")
+        s.gauss_newton_solve()
+        assert s.over_constrained
+        assert s.redundant_constraints
+        assert sorted(s.conflicting_constraints) == ["four", "two"]
+
+    def test_free_dof(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 1.0)
+        s.add_constraint(HorizontalConstraint(p1, p2))
+        s.solve()
+        assert s.diagnostics.dof == 3
+        assert s.get_free_dof(line.get_variable_indices()) == 3
+        assert s.get_free_dof([p1.xi]) == 1
+
+    def test_final_jacobian_is_reused(self, monkeypatch):
+        s = make_solver()
+        s.compile_systems = True
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 1.0)
+        s.add_constraint(LineLengthConstraint(line, 2.0))
+        s.gauss_newton_solve()
+        monkeypatch.setattr(
+            SparseConstraintSystem, "jacobian",
+            lambda *args: pytest.fail("Jacobian evaluated again"))
+        assert s.diagnostics.rank == 1
+
+    def test_jacobian_is_taken_at_solution(self, monkeypatch):
+        s = make_solver()
+        line, p1, p2 = make_line(s, 0.0, 0.0, 3.0, 1.0)
+        s.add_constraint(LineLengthConstraint(line, 2.0))
+        s.gauss_newton_solve()
+        points = []
+        jacobian = SparseConstraintSystem.jacobian
+
+        def recording_jacobian(system, x):
+            points.append(np.array(x))
+            return jacobian(system, x)
+
+        monkeypatch.setattr(SparseConstraintSystem, "jacobian", recording_jacobian)
+        assert s.diagnostics.rank == 1
+        (x,) = points
+        assert list(x) == pytest.approx(s.variables)
+
+    def test_check_records_current_state(self):
+        s = make_solver()
+        p1 = make_point(s, 0.0, 0.0)
+        p2 = make_point(s, 1.0, 1.0)
+        s.add_constraint(CoincidentConstraint(p1, p2), label="c")
+        s.check()
+        assert s.variables == [0.0, 0.0, 1.0, 1.0]
+        assert s.conflicting_constraints == ["c"]
+        assert s.residual_norm == pytest.approx(2 ** 0.5)
+        assert s.diagnostics.dof == 2
+
+
+class TestPackedSubproblem:
+    def test_packed_solve_matches_local_solve(self):
+        s = make_solver()
+        line1, a1, a2 = make_line(s, 0.0, 0.0, 3.0, 1.0)
+        line2, b1, b2 = make_line(s, 5.0, 5.0, 6.0, 7.0)
+        constraints = [
+            LineLengthConstraint(line2, 4.0),
+            HorizontalConstraint(b1, b2),
+        ]
+        sub = s.make_subproblem(constraints, ["len", "h"])
+        indices = line2.get_variable_indices()
+        packed = sub.pack_subproblem(indices)
+        referenced, values, _ = solve_packed_subproblem(packed)
+        before = list(s.variables)
+        sub.solve(variable_indices=indices)
+        assert referenced == sorted(indices)
+        assert values == pytest.approx([s.variables[i] for i in referenced], abs=1e-6)
+        # Packing copies the constraints, so the originals are untouched.
+        assert constraints[0].line is line2
+        assert b1.xi == indices[0]
+        assert s.variables[:b1.xi] == before[:b1.xi]
+
+    def test_packed_cluster_plan(self):
+        s = make_solver()
+        line1, a1, a2 = make_line(s, 0.0, 0.0, 3.0, 1.0)
+        line2, b1, b2 = make_line(s, 5.0, 5.0, 6.0, 7.0)
+        join = CoincidentConstraint(a2, b1)
+        first = HorizontalConstraint(a1, a2)
+        second = LineLengthConstraint(line2, 2.0)
+        sub = s.make_subproblem([join, first, second], ["c", "h", "len"])
+        indices = line1.get_variable_indices() + line2.get_variable_indices()
+        plan = [
+            (sub.make_subproblem([first], ["h"]), line1.get_variable_indices()),
+            (sub.make_subproblem([join, second], ["c", "len"]), line2.get_variable_indices()),
+        ]
+        referenced, values, _ = solve_packed_subproblem(sub.pack_subproblem(indices, plan))
+        for index, value in zip(referenced, values):
+            s.variables[index] = value
+        assert sub.hard_residual_norm(indices) < 1e-6
+
+    def test_callables_cannot_be_packed(self):
+        s = make_solver()
+        line, p1, p2 = make_line(s)
+        sub = s.make_subproblem([lambda v: v[p1.xi] - 1.0], ["f"])
+        with pytest.raises(TypeError):
+            sub.pack_subproblem(line.get_variable_indices())
+
+
+def make_kernel_constraints(solver):
+    """Builds one of each constraint that has a batch kernel."""
+    line1, a1, a2 = make_line(solver, 0.5, 0.2, 3.0, 1.5)
+    line2, b1, b2 = make_line(solver, 1.0, 2.0, 4.0, 6.5)
+    shared = ConstrainableLine2D(solver, a2, b1, label="shared")
+    circle1, *_ = make_circle(solver, 0.0, 0.0, 2.0)
+    circle2, *_ = make_circle(solver, 5.0, 1.0, 1.5)
+    arc, *_ = make_arc(solver, 1.0, 1.0, 3.0, 350.0, 40.0)
+    pt = make_point(solver, 2.5, 0.5)
+    return [
+        LengthEqualsConstraint(circle1.radius, circle2.radius),
+        AngleEqualsConstraint(arc.start_degrees, arc.span_degrees),
+        CoincidentConstraint(a1, pt),
+        HorizontalConstraint(a1, b2),
+        VerticalConstraint(a2, pt),
+        PointCoincidentWithArcStartConstraint(pt, arc),
+        PointCoincidentWithArcEndConstraint(pt, arc),
+        PointIsOnCircleConstraint(pt, circle1),
+        LineAngleConstraint(line1, 30.0),
+        LineLengthConstraint(line2, 5.0),
+        LinesEqualLengthConstraint(line1, line2),
+        LinesPerpendicularConstraint(line1, shared),
+        LinesParallelConstraint(shared, line2),
+        ArcRadiusConstraint(arc, 2.0),
+        ArcStartAngleConstraint(arc, 10.0),
+        ArcEndAngleConstraint(arc, 60.0),
+        ArcSpanAngleConstraint(arc, 45.0),
+        CircleTangentToCircleConstraint(circle1, circle2),
+    ]
+
+
+class TestBatchKernels:
+    @pytest.mark.parametrize("position", range(18))
+    def test_kernel_matches_scalar(self, position):
+        s = make_solver()
+        c = make_kernel_constraints(s)[position]
+        assert 'batch_evaluate' in vars(type(c))
+        x = np.array(s.variables, dtype=float)
+        cols = c.kernel_variables()
+        R, J = type(c).batch_evaluate(
+            x[np.array([cols])], np.array([list(c.kernel_parameters())]))
+        assert R[0] == pytest.approx(c.residual(x))
+        dense = np.zeros((R.shape[1], len(x)))
+        for j, col in enumerate(cols):
+            dense[:, col] += J[0, :, j]
+        assert dense == pytest.approx(c.jacobian(x), abs=1e-9)
+
+    def test_vectorized_system_matches_loop(self):
+        s = make_solver()
+        for c in make_kernel_constraints(s):
+            s.add_constraint(c)
+        s.add_constraint(lambda x: [x[0] - 1.0])
+        s.add_soft_constraint(LineLengthConstraint(s.lines[0], 2.0), weight=0.5)
+        s.fixed_mask[1] = True
+        free = s.get_free_indices()
+        x = np.array(s.variables, dtype=float)
+        batched = SparseConstraintSystem(s, free)
+        looped = SparseConstraintSystem(s, free, vectorize=False)
+        assert batched.groups and not looped.groups
+        assert batched.residuals(x) == pytest.approx(looped.residuals(x))
+        assert batched.jacobian(x).toarray() == pytest.approx(
+            looped.jacobian(x).toarray(), abs=1e-9)
+
+    def test_shared_variables_sum_into_one_entry(self):
+        s = make_solver()
+        p = make_point(s, 1.0, 2.0)
+        q = make_point(s, 3.0, 2.5)
+        s.add_constraint(LinesPerpendicularConstraint(
+            ConstrainableLine2D(s, p, q, label="a"),
+            ConstrainableLine2D(s, q, p, label="b")))
+        system = SparseConstraintSystem(s, s.get_free_indices())
+        x = np.array(s.variables, dtype=float)
+        J = system.jacobian(x)
+        numeric = ConstraintSolver._numerical_jacobian(s.constraints[0].residual, x)
+        assert J.nnz == 4
+        assert J.toarray() == pytest.approx(numeric, abs=1e-4)
+        assert s.constraints[0].jacobian(x) == pytest.approx(numeric, abs=1e-4)
+
+
 # ===========================================================================
 # 3. ConstrainableLength
 # ===========================================================================
@@ -708,10 +1380,24 @@ class TestConstrainableEllipse:
         el, *_ = make_ellipse(s, cx=0.0, cy=0.0, r1=5.0, r2=3.0, rot=0.0)
         pt = el.closest_point_on_perimeter(s.variables, 10.0, 0.0)
         assert pt is not None
+
         # Closest point should be near (5, 0)
         assert pt[0] == pytest.approx(5.0, abs=0.01)
         assert pt[1] == pytest.approx(0.0, abs=0.01)
 
+    def test_closest_points_on_perimeter_batch(self):
+        s = make_solver()
+        el, *_ = make_ellipse(s, cx=1.0, cy=-2.0, r1=5.0, r2=3.0, rot=30.0)
+        px = np.array([8.0, 1.0, -3.0, 1.5])
+        py = np.array([0.0, 4.0, -2.0, -2.1])
+        xs, ys = el.closest_points_on_perimeter(s.variables, px, py)
+        for i in range(len(px)):
+            assert (xs[i], ys[i]) == pytest.approx(
+                el.closest_point_on_perimeter(s.variables, px[i], py[i]), abs=1e-9)
+            # The closest point is on the perimeter, along the normal.
+            nx, ny = el.perimeter_normal(s.variables, xs[i], ys[i])
+            assert (px[i] - xs[i]) * ny - (py[i] - ys[i]) * nx == pytest.approx(0.0, abs=1e-9)
+
     def test_eccentricity_circle_is_zero(self):
         s = make_solver()
         el, *_ = make_ellipse(s, r1=5.0, r2=5.0)
@@ -761,6 +1447,18 @@ class TestConstrainableBezierPath:
         assert result[0] == pytest.approx((0.0, 0.0))
         assert result[3] == pytest.approx((4.0, 0.0))
 
+    def test_closest_path_parts_batch(self):
+        s = make_solver()
+        bez, _ = make_bezier(s, [(0.0, 0.0), (1.0, 2.0), (3.0, 2.0), (4.0, 0.0)])
+        px = np.array([2.0, -1.0, 5.0, 1.0])
+        py = np.array([3.0, 0.0, -1.0, 1.0])
+        parts = bez.closest_path_parts(s.variables, px, py)
+        assert parts[1] == pytest.approx(0.0)
+        assert parts[2] == pytest.approx(1.0)
+        assert parts[0] == pytest.approx(0.5, abs=1e-9)
+        for t, x, y in zip(parts, px, py):
+            assert bez.closest_path_part(s.variables, x, y) == pytest.approx(t, abs=1e-9)
+
     def test_get_segment(self):
         s = make_solver()
         pts = [(0.0, 0.0), (1.0, 2.0), (3.0, 2.0), (4.0, 0.0)]
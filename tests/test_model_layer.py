@@ -596,10 +596,13 @@ class TestArcCadObject:
         arc.update_constrainables_before_solving(solver)
 
     def test_update_from_solved_constraints(self):
-        arc = make_arc()
+        arc = make_arc(start=30.0, span=90.0)
         solver = ConstraintSolver()
         arc.make_constrainables(solver)
+        start, span = arc.arc.start_degrees, arc.arc.span_degrees
         arc.update_from_solved_constraints(solver)
+        assert arc.arc.start_degrees == pytest.approx(start)
+        assert arc.arc.span_degrees == pytest.approx(span)
 
     def test_get_constrainables_without_setup(self):
         arc = make_arc()
@@ -964,11 +967,11 @@ class TestCubicBezierCadObject:
         assert len(result) == 1
 
     def test_make_constrainables(self):
-        # ConstraintSolver lacks 'beziers' attribute; make_constrainables raises
         bz = make_bezier()
         solver = ConstraintSolver()
-        with pytest.raises(AttributeError):
-            bz.make_constrainables(solver)
+        bz.make_constrainables(solver)
+        assert len(bz._constraint_points) == 4
+        assert solver.bezier_curves == [bz.constraint_bezier]
 
     def test_update_constrainables_before_solving_without_setup(self):
         # Without make_constrainables, update is a no-op
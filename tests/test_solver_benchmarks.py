@@ -0,0 +1,221 @@
+"""
+Scaling benchmarks for the constraint solver.
+
+Parametric sketches are generated through the ConstraintsManager API at
+10, 100, 1000 and 10000 entities, and solved by the manager's component
+solve (solve_constraints()), and by solve() and gauss_newton_solve() on
+the whole system at once.  Solve time, iterations, final residual and
+peak memory are recorded for each run, and each run must leave the
+constraints satisfied.  With --run-benchmarks, the runs are summarized in
+a table at the end of the test session.
+
+Only the 10-entity sketches run by default, as a smoke test.  Run the
+rest with:
+
+    pytest tests/test_solver_benchmarks.py --run-benchmarks \\
+        [--benchmark-max-size 10000] [--benchmark-json results.json]
+"""
+
+import math
+import sys
+import os
+import time
+import tracemalloc
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from BelfryCAD.models.document import Document
+from BelfryCAD.models.cad_objects.arc_cad_object import ArcCadObject
+from BelfryCAD.models.cad_objects.circle_cad_object import CircleCadObject
+from BelfryCAD.models.cad_objects.cubic_bezier_cad_object import CubicBezierCadObject
+from BelfryCAD.models.cad_objects.line_cad_object import LineCadObject
+from BelfryCAD.cad_geometry import Point2D
+from BelfryCAD.utils.constraints import (
+    ArcRadiusConstraint, CircleTangentToCircleConstraint, CoincidentConstraint,
+    HorizontalConstraint, LineLengthConstraint, LineTangentToArcConstraint,
+    PointCoincidentWithArcEndConstraint, PointCoincidentWithArcStartConstraint,
+    PointIsOnBezierPathConstraint, VerticalConstraint,
+)
+
+SIZES = [10, 100, 1000, 10000]
+METHODS = ["solve_constraints", "solve", "gauss_newton_solve"]
+# Largest root-mean-square residual per entity that counts as solved.
+RESIDUAL_TOLERANCE = 1e-5
+
+
+def register(doc, obj):
+    """
+    Adds an object to the document with constrainables, skipping
+    auto-naming, which is too slow for big sketches.
+    """
+    doc.objects[obj.object_id] = obj
+    obj.make_constrainables(doc.constraints_manager.solver)
+    return obj.object_id, obj
+
+
+def constrain(doc, constraint, object_id1, object_id2=None):
+    name = f"k{len(doc.constraints_manager.constraints)}"
+    assert doc.add_constraint(name, constraint, object_id1, object_id2)
+
+
+def build_chain(doc, size):
+    """A chain of lines of fixed length, joined end to start."""
+    lines = [
+        register(doc, LineCadObject(
+            doc, Point2D(i, 0.0), Point2D(i + 1.0, 0.5)))
+        for i in range(size)
+    ]
+    for line_id, line in lines:
+        constrain(doc, LineLengthConstraint(line.constraint_line, 1.0), line_id)
+    for (id1, line1), (id2, line2) in zip(lines, lines[1:]):
+        constrain(doc, CoincidentConstraint(
+            line1.constraint_end_point, line2.constraint_start_point), id1, id2)
+
+
+def build_loop(doc, size):
+    """
+    One closed loop of alternating arcs and lines, like a rounded
+    polygon.  Each line runs from one arc's end to the next arc's start,
+    and is tangent to the next arc.
+    """
+    corners = max(size // 2, 2)
+    ring = corners * 1.5
+    step = 360.0 / corners
+    arcs = []
+    for i in range(corners):
+        angle = i * step
+        center = Point2D(ring * math.cos(math.radians(angle)),
+                         ring * math.sin(math.radians(angle)))
+        arcs.append(register(doc, ArcCadObject(
+            doc, center, 0.5, angle - step / 2, step)))
+    for i, (arc_id, arc) in enumerate(arcs):
+        next_id, next_arc = arcs[(i + 1) % corners]
+        start = arc.arc.end_point
+        end = next_arc.arc.start_point
+        line_id, line = register(doc, LineCadObject(
+            doc, Point2D(start.x, start.y), Point2D(end.x, end.y)))
+        constrain(doc, ArcRadiusConstraint(arc.constraint_arc, 0.5), arc_id)
+        constrain(doc, PointCoincidentWithArcEndConstraint(
+            line.constraint_start_point, arc.constraint_arc), line_id, arc_id)
+        constrain(doc, PointCoincidentWithArcStartConstraint(
+            line.constraint_end_point, next_arc.constraint_arc), line_id, next_id)
+        constrain(doc, LineTangentToArcConstraint(
+            line.constraint_line, next_arc.constraint_arc), line_id, next_id)
+
+
+def build_gear_grid(doc, size):
+    """
+    A grid of meshing gears, as their pitch circles: neighbors are
+    tangent, and centers line up along rows and columns.
+    """
+    columns = max(int(math.ceil(math.sqrt(size))), 1)
+    gears = []
+    for i in range(size):
+        row, column = divmod(i, columns)
+        gears.append(register(doc, CircleCadObject(
+            doc, Point2D(2.1 * column, 2.1 * row + 0.05 * column), 1.0)))
+    for i, (gear_id, gear) in enumerate(gears):
+        row, column = divmod(i, columns)
+        neighbors = []
+        if column + 1 < columns and i + 1 < size:
+            neighbors.append((gears[i + 1], HorizontalConstraint))
+        if i + columns < size:
+            neighbors.append((gears[i + columns], VerticalConstraint))
+        for (other_id, other), alignment in neighbors:
+            constrain(doc, CircleTangentToCircleConstraint(
+                gear.constraint_circle, other.constraint_circle), gear_id, other_id)
+            constrain(doc, alignment(
+                gear.constraint_center, other.constraint_center), gear_id, other_id)
+
+
+def build_bezier(doc, size):
+    """
+    A path of cubic Bezier segments joined end to start, with a line of
+    fixed length hanging off each segment, starting on the curve.
+    """
+    segments = max(size // 2, 1)
+    curves = []
+    for i in range(segments):
+        x = 3.0 * i
+        curves.append(register(doc, CubicBezierCadObject(doc, [
+            Point2D(x, 0.0), Point2D(x + 1.0, 1.0),
+            Point2D(x + 2.0, 1.0), Point2D(x + 3.0, 0.0)])))
+    for (id1, curve1), (id2, curve2) in zip(curves, curves[1:]):
+        constrain(doc, CoincidentConstraint(
+            curve1._constraint_points[-1], curve2._constraint_points[0]), id1, id2)
+    for i, (curve_id, curve) in enumerate(curves):
+        x = 3.0 * i + 1.5
+        line_id, line = register(doc, LineCadObject(
+            doc, Point2D(x, 0.8), Point2D(x, 2.0)))
+        constrain(doc, PointIsOnBezierPathConstraint(
+            line.constraint_start_point, curve.constraint_bezier), line_id, curve_id)
+        constrain(doc, LineLengthConstraint(line.constraint_line, 1.0), line_id)
+
+
+SKETCHES = {
+    "chain": build_chain,
+    "loop": build_loop,
+    "gears": build_gear_grid,
+    "bezier": build_bezier,
+}
+
+
+def run_solve(doc, method):
+    """Solves a sketch, returning (iterations, residual norm)."""
+    manager = doc.constraints_manager
+    if method == "solve_constraints":
+        manager.solve_constraints()
+        iterations = sum(stats.iterations for stats in manager.telemetry.entries)
+        residual = math.sqrt(sum(
+            stats.residual_norm ** 2 for stats in manager.telemetry.entries))
+        return iterations, residual
+    getattr(manager.solver, method)()
+    return manager.solver.last_stats.iterations, manager.solver.residual_norm
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("method", METHODS)
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("sketch", list(SKETCHES))
+def test_solver_scaling(request, sketch, size, method):
+    config = request.config
+    if size > SIZES[0] and not config.getoption("--run-benchmarks"):
+        pytest.skip("needs --run-benchmarks")
+    if size > config.getoption("--benchmark-max-size"):
+        pytest.skip("larger than --benchmark-max-size")
+
+    doc = Document()
+    start = time.perf_counter()
+    SKETCHES[sketch](doc, size)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    iterations, residual = run_solve(doc, method)
+    solve_time = time.perf_counter() - start
+
+    # Memory is measured on a second, traced solve of a fresh sketch,
+    # since tracing slows solving down.  Smoke runs skip it.
+    peak_memory = None
+    if config.getoption("--run-benchmarks"):
+        doc = Document()
+        SKETCHES[sketch](doc, size)
+        tracemalloc.start()
+        try:
+            run_solve(doc, method)
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    config.benchmark_results.append({
+        "sketch": sketch,
+        "size": size,
+        "method": method,
+        "build_time": build_time,
+        "solve_time": solve_time,
+        "iterations": iterations,
+        "residual_norm": residual,
+        "peak_memory": peak_memory,
+    })
+    assert residual <= RESIDUAL_TOLERANCE * math.sqrt(size)
@@ -0,0 +1,66 @@
+"""
+Unit tests for BelfryCAD/utils/solver_telemetry.py.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from BelfryCAD.utils.solver_telemetry import ComponentStats, SolveStats, SolverTelemetry
+
+
+def make_stats(total_time, status="converged", success=True):
+    stats = ComponentStats("solve", 2, {"CoincidentConstraint": 1, "function": 2})
+    run = SolveStats("gauss_newton", 4, 3)
+    run.iterations = 3
+    run.status = status
+    stats.solves.append(run)
+    stats.total_time = total_time
+    stats.success = success
+    return stats
+
+
+class TestComponentStats:
+    def test_summary(self):
+        stats = make_stats(0.5)
+        assert stats.num_constraints == 3
+        assert stats.iterations == 3
+        assert stats.status == "converged"
+        summary = stats.as_dict()
+        assert summary["constraint_types"] == {"CoincidentConstraint": 1, "function": 2}
+        assert summary["solves"][0]["method"] == "gauss_newton"
+
+    def test_failure_status(self):
+        assert make_stats(0.1, success=False).status == "failed"
+
+
+class TestSolverTelemetry:
+    def test_rolling_log(self):
+        telemetry = SolverTelemetry(max_entries=2)
+        for total_time in (0.1, 0.3, 0.2):
+            telemetry.record(make_stats(total_time))
+        assert [stats.total_time for stats in telemetry.entries] == [0.3, 0.2]
+        assert telemetry.entries[0].timestamp > 0.0
+        assert [stats.total_time for stats in telemetry.slowest(1)] == [0.3]
+
+    def test_listeners(self):
+        telemetry = SolverTelemetry()
+        seen = []
+        telemetry.add_listener(seen.append)
+        stats = make_stats(0.1)
+        telemetry.record(stats)
+        telemetry.remove_listener(seen.append)
+        telemetry.record(make_stats(0.2))
+        assert seen == [stats]
+
+    def test_failures(self):
+        telemetry = SolverTelemetry()
+        telemetry.record(make_stats(0.1))
+        stalled = make_stats(0.2, status="stalled")
+        failed = make_stats(0.3, success=False)
+        telemetry.record(stalled)
+        telemetry.record(failed)
+        assert telemetry.failures() == [stalled, failed]
+        telemetry.clear()
+        assert not telemetry.entries